@@ -0,0 +1,107 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2017 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""A :class:`.PlotWidget` rendering images without being displayed.
+
+It is meant to export many plots to images, e.g., to generate previews:
+
+.. code-block:: python
+
+    from silx.gui import qt
+    from silx.gui.plot import OffscreenPlot
+
+    app = qt.QApplication([])
+
+    plot = OffscreenPlot(width=320, height=240)
+    plot.addImage(numpy.zeros((100, 100)), legend='data')
+    image = plot.getImage('data')
+
+    for index, data in enumerate(dataToExport):
+        image.setData(data)
+        plot.resetZoom()
+        plot.saveGraph('preview%04d.png' % index)
+
+A QApplication is needed, but no event loop is run and no window is
+displayed.
+On a computer without display, the ``offscreen`` Qt platform can be used
+(i.e., set the ``QT_QPA_PLATFORM`` environment variable to ``offscreen``).
+
+Reusing the same :class:`OffscreenPlot` and the same items for all images
+is faster than creating new ones.
+"""
+
+__authors__ = ["T. Vincent"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+from .PlotWidget import PlotWidget
+from .backends.BackendMatplotlib import BackendMatplotlibAgg
+
+
+class OffscreenPlot(PlotWidget):
+    """:class:`.PlotWidget` rendering with matplotlib Agg and no widget.
+
+    The plot is only rendered when an image is requested
+    (see :meth:`getImageData` and :meth:`saveGraph`), there is no automatic
+    replot.
+
+    :param int width: Width of the images in pixels
+    :param int height: Height of the images in pixels
+    :param float dpi: Resolution of the images in dot per inch
+    :param parent: The parent of this object
+    """
+
+    def __init__(self, width=640, height=480, dpi=100., parent=None):
+        super(OffscreenPlot, self).__init__(
+            parent=parent, backend=BackendMatplotlibAgg)
+        self.setAutoReplot(False)
+        self.setSize(width, height, dpi)
+
+    def setSize(self, width, height, dpi=None):
+        """Set the size of the images.
+
+        :param int width: Width in pixels
+        :param int height: Height in pixels
+        :param float dpi: Resolution in dot per inch or None to keep it
+        """
+        if dpi is None:
+            dpi = self._backend.fig.dpi
+        self._backend.setSize(width, height, dpi)
+
+    def getSize(self):
+        """Returns the size of the images in pixels.
+
+        :rtype: 2-tuple of int (width, height)
+        """
+        return self._backend.getSize()
+
+    def getImageData(self):
+        """Render the plot and returns it as a RGBA image.
+
+        :returns: Image as a (height, width, 4) array of uint8
+        :rtype: numpy.ndarray
+        """
+        self.replot()
+        return self._backend.getImageData()
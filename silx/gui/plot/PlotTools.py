@@ -29,7 +29,7 @@ from __future__ import division
 
 __authors__ = ["V.A. Sole", "T. Vincent"]
 __license__ = "MIT"
-__date__ = "27/06/2017"
+__date__ = "18/10/2017"
 
 
 import logging
@@ -37,8 +37,6 @@ import numbers
 import traceback
 import weakref
 
-import numpy
-
 from .. import qt
 
 _logger = logging.getLogger(__name__)
@@ -170,16 +168,19 @@ class PositionInfo(qt.QWidget):
                 xData = activeCurve.getXData(copy=False)
                 yData = activeCurve.getYData(copy=False)
                 if activeCurve.getSymbol():  # Only handled if symbols on curve
-                    closestIndex = numpy.argmin(
-                        pow(xData - x, 2) + pow(yData - y, 2))
+                    closestIndex = activeCurve._getSpatialIndex().getNearest(
+                        x, y)
 
-                    xClosest = xData[closestIndex]
-                    yClosest = yData[closestIndex]
+                    closestInPixels = None
+                    if closestIndex is not None:
+                        xClosest = xData[closestIndex]
+                        yClosest = yData[closestIndex]
+                        closestInPixels = self.plot.dataToPixel(
+                            xClosest, yClosest, axis=activeCurve.getYAxis())
+                    pixelPos = self.plot.dataToPixel(x, y, check=False)
 
-                    closestInPixels = self.plot.dataToPixel(
-                        xClosest, yClosest, axis=activeCurve.getYAxis())
-                    if closestInPixels is not None:
-                        xPixel, yPixel = event['xpixel'], event['ypixel']
+                    if closestInPixels is not None and pixelPos is not None:
+                        xPixel, yPixel = pixelPos
 
                         if (abs(closestInPixels[0] - xPixel) < 5 and
                                 abs(closestInPixels[1] - yPixel) < 5):
@@ -324,3 +325,57 @@ class LimitsToolBar(qt.QToolBar):
             yMin, yMax = yMax, yMin
 
         self.plot.getYAxis().setLimits(yMin, yMax)
+
+
+# RenderProfileOverlay #######################################################
+
+class RenderProfileOverlay(qt.QLabel):
+    """QLabel displaying the rendering time of a :class:`PlotWidget` on top
+    of the plot area.
+
+    It enables render profiling of the plot (see
+    :meth:`PlotWidget.setRenderProfilingEnabled`) and displays the
+    profile of the last rendered frame in the top left corner of the plot.
+
+    >>> from silx.gui.plot import Plot1D
+    >>> from silx.gui.plot.PlotTools import RenderProfileOverlay
+
+    >>> plot = Plot1D()
+    >>> overlay = RenderProfileOverlay(plot=plot)
+    >>> plot.show()
+
+    :param plot: :class:`PlotWidget` instance to profile.
+    """
+
+    def __init__(self, plot):
+        assert plot is not None
+        parent = plot.getWidgetHandle()
+        if parent is None:  # Backend without widget
+            parent = plot
+        super(RenderProfileOverlay, self).__init__(parent)
+        self._plotRef = weakref.ref(plot)
+
+        self.setAttribute(qt.Qt.WA_TransparentForMouseEvents)
+        self.setAutoFillBackground(True)  # Avoids redrawing the plot
+        self.setStyleSheet(
+            "background-color: rgb(255, 255, 255); color: rgb(0, 0, 0);")
+        self.move(4, 4)
+
+        plot.setRenderProfilingEnabled(True)
+        plot.sigRenderProfiled.connect(self._renderProfiled)
+        profile = plot.getLastRenderProfile()
+        if profile is not None:
+            self._renderProfiled(profile)
+
+    @property
+    def plot(self):
+        """The :class:`PlotWidget` this widget is attached to."""
+        return self._plotRef()
+
+    def _renderProfiled(self, profile):
+        """Handle a new render profile of the plot.
+
+        :param RenderProfile profile:
+        """
+        self.setText(str(profile))
+        self.adjustSize()
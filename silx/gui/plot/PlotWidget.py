@@ -175,13 +175,14 @@ from __future__ import division
 
 __authors__ = ["V.A. Sole", "T. Vincent"]
 __license__ = "MIT"
-__date__ = "30/08/2017"
+__date__ = "18/10/2017"
 
 
 from collections import OrderedDict, namedtuple
 from contextlib import contextmanager
 import itertools
 import logging
+import warnings
 
 import numpy
 
@@ -200,6 +201,7 @@ from . import items
 
 from .. import qt
 from ._utils.panzoom import ViewConstraints
+from ._utils import profiling
 
 
 _logger = logging.getLogger(__name__)
@@ -235,6 +237,109 @@ _PlotDataRange = namedtuple('PlotDataRange',
                             ['x', 'y', 'yright'])
 
 
+class _DataRangeCache(object):
+    """Bounds of the items of a plot, updated item by item.
+
+    The bounds of each item are stored as an array of
+    (xMin, xMax, yLeftMin, yLeftMax, yRightMin, yRightMax) with NaN for the
+    unused Y axis.
+    Adding an item or extending its bounds extends the range in place.
+    The range is computed again from the stored bounds of all items only
+    when an item that defined one of the limits is removed or shrinks.
+    """
+
+    def __init__(self):
+        self._bounds = {}  # item: bounds array
+        self._range = numpy.array((numpy.nan,) * 6)
+        self._dirtyItems = set()
+        self._dirtyAll = False
+
+    def invalidate(self, item=None):
+        """Mark the bounds of an item to be updated.
+
+        :param item: The item or None to update all items
+        """
+        if item is None:
+            self._dirtyAll = True
+        else:
+            self._dirtyItems.add(item)
+
+    @staticmethod
+    def _getItemBounds(item):
+        """Returns the bounds array of a visible item or None"""
+        if not item.isVisible():
+            return None
+        bounds = item.getBounds()
+        if bounds is None:
+            return None
+        xMin, xMax, yMin, yMax = bounds
+        if isinstance(item, items.YAxisMixIn) and item.getYAxis() == 'right':
+            return numpy.array((xMin, xMax, numpy.nan, numpy.nan, yMin, yMax),
+                               dtype=numpy.float64)
+        else:
+            return numpy.array((xMin, xMax, yMin, yMax, numpy.nan, numpy.nan),
+                               dtype=numpy.float64)
+
+    def _computeRange(self):
+        """Compute the range from the bounds of all items"""
+        if not self._bounds:
+            self._range = numpy.array((numpy.nan,) * 6)
+        else:
+            bounds = numpy.array(list(self._bounds.values()))
+            with warnings.catch_warnings():  # All-NaN columns
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                mins = numpy.nanmin(bounds[:, 0::2], axis=0)
+                maxs = numpy.nanmax(bounds[:, 1::2], axis=0)
+            self._range = numpy.empty(6)
+            self._range[0::2], self._range[1::2] = mins, maxs
+
+    def _isOnLimit(self, bounds):
+        """Returns True if the bounds define one of the limits of the range
+        """
+        return bool(numpy.any(bounds == self._range))
+
+    def getRange(self, plot):
+        """Returns the range of the visible items of the plot.
+
+        :param PlotWidget plot: The plot the items belong to
+        :returns: (xMin, xMax, yLeftMin, yLeftMax, yRightMin, yRightMax)
+            with NaN for axes without data
+        :rtype: numpy.ndarray
+        """
+        if self._dirtyAll:
+            self._dirtyAll = False
+            self._dirtyItems.clear()
+            self._bounds = {}
+            for item in plot._content.values():
+                bounds = self._getItemBounds(item)
+                if bounds is not None:
+                    self._bounds[item] = bounds
+            self._computeRange()
+
+        elif self._dirtyItems:
+            recompute = False
+            for item in self._dirtyItems:
+                previous = self._bounds.pop(item, None)
+                if previous is not None and self._isOnLimit(previous):
+                    recompute = True
+
+                bounds = None
+                if item.getPlot() is plot:  # Item was not removed
+                    bounds = self._getItemBounds(item)
+                if bounds is not None:
+                    self._bounds[item] = bounds
+                    if not recompute:  # Extend range
+                        self._range[0::2] = numpy.fmin(self._range[0::2],
+                                                       bounds[0::2])
+                        self._range[1::2] = numpy.fmax(self._range[1::2],
+                                                       bounds[1::2])
+            self._dirtyItems.clear()
+            if recompute:
+                self._computeRange()
+
+        return self._range
+
+
 class PlotWidget(qt.QMainWindow):
     """Qt Widget providing a 1D/2D plot.
 
@@ -326,12 +431,26 @@ class PlotWidget(qt.QMainWindow):
     It provides the source as passed to :meth:`setInteractiveMode`.
     """
 
+    sigRenderProfiled = qt.Signal(object)
+    """Signal emitted when a frame has been rendered while render profiling
+    is enabled (see :meth:`setRenderProfilingEnabled`).
+
+    It provides the :class:`RenderProfile` of the frame.
+    """
+
     def __init__(self, parent=None, backend=None,
                  legends=False, callback=None, **kw):
         self._autoreplot = False
         self._dirty = False
         self._cursorInPlot = False
         self.__muteActiveItemChanged = False
+        self.__batchDepth = 0
+        self.__batchEvents = []
+        self.__batchResetZoom = False
+        self.__batchDataMargins = None
+        self._renderProfilingEnabled = False
+        self._renderProfile = None
+        self._lastRenderProfile = None
 
         if kw:
             _logger.warning(
@@ -377,9 +496,10 @@ class PlotWidget(qt.QMainWindow):
 
         # Items handling
         self._content = OrderedDict()
-        self._contentToUpdate = []  # Used as an OrderedSet
+        self._contentToUpdate = OrderedDict()  # Used as an OrderedSet
 
         self._dataRange = None
+        self._dataRangeCache = _DataRangeCache()
 
         # line types
         self._styleList = ['-', '--', '-.', ':']
@@ -477,37 +597,27 @@ class PlotWidget(qt.QMainWindow):
         else:
             self._dirty = True
 
-        if self._autoreplot and not wasDirty:
+        if self._autoreplot and not wasDirty and not self.__batchDepth:
             self._backend.postRedisplay()
 
-    def _invalidateDataRange(self):
+    def _invalidateDataRange(self, item=None):
         """
         Notifies this PlotWidget instance that the range has changed
         and will have to be recomputed.
+
+        :param Item item: The item which bounds or visibility have changed
+                          or None (default) if all items are concerned
         """
+        self._dataRangeCache.invalidate(item)
         self._dataRange = None
 
     def _updateDataRange(self):
         """
         Recomputes the range of the data displayed on this PlotWidget.
         """
-        xMin = yMinLeft = yMinRight = float('nan')
-        xMax = yMaxLeft = yMaxRight = float('nan')
-
-        for item in self._content.values():
-            if item.isVisible():
-                bounds = item.getBounds()
-                if bounds is not None:
-                    xMin = numpy.nanmin([xMin, bounds[0]])
-                    xMax = numpy.nanmax([xMax, bounds[1]])
-                    # Take care of right axis
-                    if (isinstance(item, items.YAxisMixIn) and
-                            item.getYAxis() == 'right'):
-                        yMinRight = numpy.nanmin([yMinRight, bounds[2]])
-                        yMaxRight = numpy.nanmax([yMaxRight, bounds[3]])
-                    else:
-                        yMinLeft = numpy.nanmin([yMinLeft, bounds[2]])
-                        yMaxLeft = numpy.nanmax([yMaxLeft, bounds[3]])
+        (xMin, xMax,
+         yMinLeft, yMaxLeft,
+         yMinRight, yMaxRight) = self._dataRangeCache.getRange(self)
 
         def lGetRange(x, y):
             return None if numpy.isnan(x) and numpy.isnan(y) else (x, y)
@@ -574,8 +684,7 @@ class PlotWidget(qt.QMainWindow):
         item._setPlot(self)
         if item.isVisible():
             self._itemRequiresUpdate(item)
-        if isinstance(item, (items.Curve, items.ImageBase)):
-            self._invalidateDataRange()  # TODO handle this automatically
+        self._invalidateDataRange(item)
 
         self._notifyContentChanged(item)
 
@@ -601,12 +710,10 @@ class PlotWidget(qt.QMainWindow):
 
         # Remove item from plot
         self._content.pop(key)
-        if item in self._contentToUpdate:
-            self._contentToUpdate.remove(item)
+        self._contentToUpdate.pop(item, None)
         if item.isVisible():
             self._setDirtyPlot(overlayOnly=item.isOverlay())
-        if item.getBounds() is not None:
-            self._invalidateDataRange()
+        self._invalidateDataRange(item)
         item._removeBackendRenderer(self._backend)
         item._setPlot(None)
 
@@ -624,12 +731,80 @@ class PlotWidget(qt.QMainWindow):
         :param Item item: The item that required update
         """
         assert item.getPlot() == self
-        # Pu item at the end of the list
-        if item in self._contentToUpdate:
-            self._contentToUpdate.remove(item)
-        self._contentToUpdate.append(item)
+        # Put item at the end of the list
+        self._contentToUpdate.pop(item, None)
+        self._contentToUpdate[item] = None
         self._setDirtyPlot(overlayOnly=item.isOverlay())
 
+    @contextmanager
+    def batchUpdate(self):
+        """Context manager deferring the updates of the plot until exit.
+
+        Within this context, signals and callback events are queued,
+        the reset of the zoom is done at most once and the plot is only
+        redrawn once, on exit.
+        This is useful to add or remove many items at once.
+
+        Example:
+
+        .. code-block:: python
+
+            with plot.batchUpdate():
+                for index, curve in enumerate(curves):
+                    plot.addCurve(x, curve, legend=str(index))
+
+        Contexts can be nested, updates are done when the outer one exits.
+        """
+        self.__batchDepth += 1
+        try:
+            yield self
+        finally:
+            self.__batchDepth -= 1
+            if self.__batchDepth == 0:
+                self.__endBatchUpdate()
+
+    def __endBatchUpdate(self):
+        """Process the updates deferred by :meth:`batchUpdate`"""
+        events, self.__batchEvents = self.__batchEvents, []
+        for event, kwargs in events:
+            self.notify(event, **kwargs)
+
+        if self.__batchResetZoom:
+            self.__batchResetZoom = False
+            self.resetZoom(self.__batchDataMargins)
+
+        if self._autoreplot and self._getDirtyPlot():
+            self._backend.postRedisplay()
+
+    def addItems(self, items, resetzoom=True):
+        """Add many :class:`Item` instances to the plot at once.
+
+        The plot is updated only once all items are added
+        (see :meth:`batchUpdate`).
+
+        :param items: Items to add, their legends must not be in the plot
+        :type items: iterable of Item
+        :param bool resetzoom: True (the default) to reset the zoom.
+        """
+        with self.batchUpdate():
+            for item in items:
+                self._add(item)
+            if resetzoom:
+                self.resetZoom()
+
+    def removeItems(self, items):
+        """Remove many :class:`Item` instances from the plot at once.
+
+        The plot is updated only once all items are removed
+        (see :meth:`batchUpdate`).
+
+        :param items: Items of the plot to remove
+        :type items: iterable of Item
+        """
+        with self.batchUpdate():
+            for item in items:
+                self._remove(item)
+
     @contextmanager
     def _muteActiveItemChangedSignal(self):
         self.__muteActiveItemChanged = True
@@ -1015,7 +1190,8 @@ class PlotWidget(qt.QMainWindow):
         assert data.ndim in (2, 3)
 
         image = self.getImage(legend)
-        if image is not None and image.getData(copy=False).ndim != data.ndim:
+        if (image is not None and
+                len(image.getData(copy=False).shape) != data.ndim):
             # Update a data image with RGBA image or the other way around:
             # Remove previous image
             # In this case, we don't retrieve defaults from the previous image
@@ -1529,10 +1705,11 @@ class PlotWidget(qt.QMainWindow):
 
         if legend is None:  # This is a clear
             # Clear each given kind
-            for aKind in kind:
-                for legend in self._getItems(
-                        kind=aKind, just_legend=True, withhidden=True):
-                    self.remove(legend=legend, kind=aKind)
+            with self.batchUpdate():
+                for aKind in kind:
+                    for legend in self._getItems(
+                            kind=aKind, just_legend=True, withhidden=True):
+                        self.remove(legend=legend, kind=aKind)
 
         else:  # This is removing a single element
             # Remove each given kind
@@ -2468,6 +2645,11 @@ class PlotWidget(qt.QMainWindow):
         :param str event: The type of event
         :param kwargs: The information of the event.
         """
+        if self.__batchDepth:
+            # Send events when batch update is over
+            self.__batchEvents.append((event, kwargs))
+            return
+
         eventDict = kwargs.copy()
         eventDict['event'] = event
         self.sigPlotSignal.emit(eventDict)
@@ -2606,11 +2788,72 @@ class PlotWidget(qt.QMainWindow):
         if self._autoreplot and self._getDirtyPlot():
             self._backend.postRedisplay()
 
+    def setRenderProfilingEnabled(self, enabled):
+        """Enable/disable the measurement of the rendering time.
+
+        When enabled, the time spent on each rendering stage and on each item
+        is recorded for each frame.
+        The profile of a frame is provided by :attr:`sigRenderProfiled` and
+        :meth:`getLastRenderProfile`.
+
+        :param bool enabled: True to enable, False (default) to disable
+        """
+        self._renderProfilingEnabled = bool(enabled)
+        if not self._renderProfilingEnabled:
+            self._renderProfile = None
+
+    def isRenderProfilingEnabled(self):
+        """Returns True if render profiling is enabled, False otherwise.
+
+        :rtype: bool
+        """
+        return self._renderProfilingEnabled
+
+    def getLastRenderProfile(self):
+        """Returns the profile of the last frame rendered while render
+        profiling was enabled.
+
+        See :meth:`setRenderProfilingEnabled`.
+
+        :rtype: RenderProfile or None
+        """
+        return self._lastRenderProfile
+
+    def _getRenderProfile(self):
+        """Returns the profile of the frame being rendered.
+
+        It can be accessed by backend to record the timings of rendering.
+
+        :return: The profile or None if render profiling is disabled
+        :rtype: RenderProfile or None
+        """
+        if self._renderProfilingEnabled and self._renderProfile is None:
+            self._renderProfile = profiling.RenderProfile()
+        return self._renderProfile
+
+    def _endRenderProfile(self):
+        """Notify the end of the rendering of a frame.
+
+        This is called by backends once rendering is done.
+        """
+        profile = self._renderProfile
+        if profile is not None:
+            self._renderProfile = None
+            # Report timings of backend renderers to the plot items
+            profile._replaceItems(dict(
+                (item._backendRenderer, item)
+                for item in self._content.values()
+                if item._backendRenderer is not None))
+            self._lastRenderProfile = profile
+            self.sigRenderProfiled.emit(profile)
+
     def replot(self):
         """Redraw the plot immediately."""
+        profile = self._getRenderProfile()
         for item in self._contentToUpdate:
-            item._update(self._backend)
-        self._contentToUpdate = []
+            with profiling.measure(profile, 'sync', item):
+                item._update(self._backend)
+        self._contentToUpdate = OrderedDict()
         self._backend.replot()
         self._dirty = False  # reset dirty flag
 
@@ -2631,6 +2874,12 @@ class PlotWidget(qt.QMainWindow):
                             the plot area for each side (default: no margins).
         :type dataMargins: A 4-tuple of float as (xMin, xMax, yMin, yMax).
         """
+        if self.__batchDepth:
+            # Reset zoom once batch update is over
+            self.__batchResetZoom = True
+            self.__batchDataMargins = dataMargins
+            return
+
         if dataMargins is None:
             dataMargins = self._defaultDataMargins
 
@@ -2841,7 +3090,9 @@ class PlotWidget(qt.QMainWindow):
             if kind == 'curve':
                 curve = self.getCurve(legend)
                 if curve is not None and test(curve):
-                    return kind, curve, item['indices']
+                    # Indices are in the displayed, possibly decimated, data
+                    indices = curve._getPickedIndices(item['indices'])
+                    return kind, curve, indices
 
             elif kind == 'image':
                 image = self.getImage(legend)
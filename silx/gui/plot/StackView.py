@@ -69,7 +69,7 @@ Example::
 
 __authors__ = ["P. Knobel", "H. Payno"]
 __license__ = "MIT"
-__date__ = "11/09/2017"
+__date__ = "18/10/2017"
 
 import numpy
 
@@ -84,6 +84,7 @@ from ..widgets.FrameBrowser import HorizontalSliderWithBrowser
 
 from silx.utils.array_like import DatasetView, ListOfImages
 from silx.math import calibration
+from silx.math.combo import min_max
 from silx.utils.deprecation import deprecated_warning
 
 try:
@@ -94,6 +95,7 @@ except ImportError:
     h5py = None
 else:
     from silx.io.utils import is_dataset
+    from silx.io.statistics import get_statistics
 
 
 class StackView(qt.QMainWindow):
@@ -717,8 +719,10 @@ class StackView(qt.QMainWindow):
         :type colormap: dict or str.
         :param str normalization: Colormap mapping: 'linear' or 'log'.
         :param bool autoscale: Whether to use autoscale or [vmin, vmax] range.
-            Default value of autoscale is False. This option is not compatible
-            with h5py datasets.
+            Default value of autoscale is False. For h5py datasets, the
+            range of the displayed frame is used, unless the statistics
+            of the dataset were already computed (see
+            :mod:`silx.io.statistics`).
         :param float vmin: The minimum value of the range to use if
                            'autoscale' is False.
         :param float vmax: The maximum value of the range to use if
@@ -763,24 +767,23 @@ class StackView(qt.QMainWindow):
             if autoscale is None:
                 # set default
                 autoscale = False
-            elif autoscale and is_dataset(self._stack):
-                # h5py dataset has no min()/max() methods
-                raise RuntimeError(
-                    "Cannot auto-scale colormap for a h5py dataset")
-            else:
-                autoscale = autoscale
             self.__autoscaleCmap = autoscale
 
             if autoscale and (self._stack is not None):
-                _vmin, _vmax = _colormap.getColormapRange(data=self._stack)
+                if is_dataset(self._stack):
+                    positive = _colormap.getNormalization() == Colormap.LOGARITHM
+                    data = self.__getDatasetExtrema(positive=positive)
+                else:
+                    data = self._stack
+                _vmin, _vmax = _colormap.getColormapRange(data=data)
                 _colormap.setVRange(vmin=_vmin, vmax=_vmax)
             else:
                 if vmin is None and self._stack is not None:
-                    _colormap.setVMin(self._stack.min())
+                    _colormap.setVMin(self.__getStackMin())
                 else:
                     _colormap.setVMin(vmin)
                 if vmax is None and self._stack is not None:
-                    _colormap.setVMax(self._stack.max())
+                    _colormap.setVMax(self.__getStackMax())
                 else:
                     _colormap.setVMax(vmax)
 
@@ -794,6 +797,43 @@ class StackView(qt.QMainWindow):
         if isinstance(activeImage, items.ColormapMixIn):
             activeImage.setColormap(self.getColormap())
 
+    def __getDatasetExtrema(self, positive=False):
+        """Returns the minimum and the maximum of a h5py dataset stack.
+
+        Reading a whole dataset can take a while, so the statistics of the
+        dataset are only used if they are available without reading it.
+        Else the extrema of the displayed frame are returned.
+
+        :param bool positive: True to get the strictly positive minimum
+        :return: The finite extrema, or an empty list if there is none
+        :rtype: list
+        """
+        stats = get_statistics(self._stack, nbins=0, compute=False)
+        if stats is not None:
+            minimum = stats.min_positive if positive else stats.minimum
+            maximum = stats.maximum
+        else:
+            frame = self.__transposed_view[self._browser.value()]
+            result = min_max(numpy.array(frame, copy=False),
+                             min_positive=positive, finite=True)
+            minimum = result.min_positive if positive else result.minimum
+            maximum = result.maximum
+        return [value for value in (minimum, maximum) if value is not None]
+
+    def __getStackMin(self):
+        """Returns the minimum of the stack"""
+        if is_dataset(self._stack):
+            extrema = self.__getDatasetExtrema()
+            return extrema[0] if extrema else None
+        return self._stack.min()
+
+    def __getStackMax(self):
+        """Returns the maximum of the stack"""
+        if is_dataset(self._stack):
+            extrema = self.__getDatasetExtrema()
+            return extrema[-1] if extrema else None
+        return self._stack.max()
+
     def getPlot(self):
         """Return the :class:`PlotWidget`.
 
@@ -40,6 +40,9 @@ List of Qt widgets:
 - :class:`.ImageView`: A widget with tools for images and a side histogram.
 - :class:`.StackView`: A widget with tools for a stack of images.
 
+To render plots to images without displaying them, see
+:class:`.OffscreenPlot`.
+
 By default, those widget are using matplotlib_.
 They can optionally use a faster OpenGL-based rendering (beta feature),
 which is enabled by setting the ``backend`` argument to ``'gl'``
@@ -56,13 +59,14 @@ when creating the widgets (See :class:`.PlotWidget`).
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "03/05/2017"
+__date__ = "18/10/2017"
 
 
 from .PlotWidget import PlotWidget  # noqa
 from .PlotWindow import PlotWindow, Plot1D, Plot2D  # noqa
 from .ImageView import ImageView  # noqa
 from .StackView import StackView  # noqa
+from .OffscreenPlot import OffscreenPlot  # noqa
 
-__all__ = ['ImageView', 'PlotWidget', 'PlotWindow', 'Plot1D', 'Plot2D',
-           'StackView']
+__all__ = ['ImageView', 'OffscreenPlot', 'PlotWidget', 'PlotWindow',
+           'Plot1D', 'Plot2D', 'StackView']
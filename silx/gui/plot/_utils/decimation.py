@@ -0,0 +1,202 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2017 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""Min/max decimation of curves with many points, used to display them
+at the resolution of the screen."""
+
+__authors__ = ["T. Vincent"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+import numpy
+
+
+def isMonotonic(x):
+    """Returns True if x is sorted in increasing order (and has no NaN).
+
+    :param numpy.ndarray x: 1D array
+    :rtype: bool
+    """
+    return bool(numpy.all(x[1:] >= x[:-1]))
+
+
+class MinMaxPyramid(object):
+    """Min/max envelopes of a curve at power-of-two decimation levels.
+
+    The curve is cut into blocks of ``blockSize * 2**level`` consecutive
+    points. For each block, the indices of the points with the minimum and
+    maximum y values are stored. Drawing these two points per block gives the
+    same picture as drawing the full curve, as long as a block is not wider
+    than a pixel.
+
+    The x coordinates must be sorted in increasing order
+    (see :func:`isMonotonic`).
+
+    :param numpy.ndarray x: X coordinates of the curve
+    :param numpy.ndarray y: Y coordinates of the curve (can contain NaNs)
+    :param int blockSize: Number of points in the blocks of the first level
+    """
+
+    _CHUNK_SIZE = 2**16
+    """Number of blocks processed at once to build the first level"""
+
+    def __init__(self, x, y, blockSize=8):
+        assert len(x) == len(y)
+        assert blockSize >= 2
+        self._x = x
+        self._y = y
+        self._blockSize = blockSize
+        self._levels = []
+        """List of (imin, imax) arrays of indices, one per level"""
+
+        level = self._firstLevel()
+        while level is not None:
+            self._levels.append(level)
+            level = self._nextLevel(*level)
+
+    def _firstLevel(self):
+        """Compute the first level from the data"""
+        y = self._y
+        size = self._blockSize
+        nbBlocks = (len(y) + size - 1) // size
+        if nbBlocks < 2:
+            return None
+
+        imin = numpy.empty(nbBlocks, dtype=numpy.int64)
+        imax = numpy.empty(nbBlocks, dtype=numpy.int64)
+        nbFull = len(y) // size
+        for first in range(0, nbFull, self._CHUNK_SIZE):
+            last = min(nbFull, first + self._CHUNK_SIZE)
+            blocks = numpy.array(y[first * size:last * size],
+                                 dtype=numpy.float64).reshape(-1, size)
+            nans = numpy.isnan(blocks)
+            offsets = size * numpy.arange(first, last)
+            blocks[nans] = numpy.inf
+            imin[first:last] = offsets + numpy.argmin(blocks, axis=1)
+            blocks[nans] = -numpy.inf
+            imax[first:last] = offsets + numpy.argmax(blocks, axis=1)
+
+        if nbFull < nbBlocks:  # last incomplete block
+            start = nbFull * size
+            tail = numpy.array(y[start:], dtype=numpy.float64)
+            nans = numpy.isnan(tail)
+            tail[nans] = numpy.inf
+            imin[-1] = start + numpy.argmin(tail)
+            tail[nans] = -numpy.inf
+            imax[-1] = start + numpy.argmax(tail)
+        return imin, imax
+
+    def _merge(self, indices, lower):
+        """Merge the blocks of a level by pairs.
+
+        :param numpy.ndarray indices: Indices of the min or max of the blocks
+        :param bool lower: True to keep the minimum, False for the maximum
+        """
+        even, odd = indices[0:len(indices) - 1:2], indices[1::2]
+        yEven, yOdd = self._y[even], self._y[odd]
+        if lower:
+            keepEven = numpy.logical_or(yEven <= yOdd, numpy.isnan(yOdd))
+        else:
+            keepEven = numpy.logical_or(yEven >= yOdd, numpy.isnan(yOdd))
+        merged = numpy.where(keepEven, even, odd)
+        if len(indices) % 2:
+            merged = numpy.append(merged, indices[-1])
+        return merged
+
+    def _nextLevel(self, imin, imax):
+        """Compute the level following the given one"""
+        if len(imin) <= 2:
+            return None
+        return self._merge(imin, lower=True), self._merge(imax, lower=False)
+
+    def getLevelCount(self):
+        """Returns the number of decimation levels
+
+        :rtype: int
+        """
+        return len(self._levels)
+
+    def getBlockSize(self, level):
+        """Returns the number of points per block of a level
+
+        :param int level: The level, starting from 0
+        :rtype: int
+        """
+        return self._blockSize * 2 ** level
+
+    def getRange(self, xMin, xMax):
+        """Returns the range of indices of the points in [xMin, xMax],
+        extended with one point on each side.
+
+        :rtype: tuple of 2 int
+        """
+        first = numpy.searchsorted(self._x, xMin, side='left') - 1
+        last = numpy.searchsorted(self._x, xMax, side='right') + 1
+        return max(0, int(first)), min(len(self._x), int(last))
+
+    def getLevel(self, xMin, xMax, maxPoints):
+        """Returns the level to use to display the curve in [xMin, xMax]
+        with at most maxPoints points, or None to display all points.
+
+        :param float xMin: Lower bound of the displayed range
+        :param float xMax: Upper bound of the displayed range
+        :param int maxPoints: Maximum number of points to display
+        :rtype: int or None
+        """
+        first, last = self.getRange(xMin, xMax)
+        count = last - first
+        if count <= maxPoints or not self._levels:
+            return None
+        for level in range(len(self._levels)):
+            if 2 * count // self.getBlockSize(level) <= maxPoints:
+                return level
+        return len(self._levels) - 1
+
+    def getIndices(self, xMin, xMax, maxPoints):
+        """Returns the indices of the points to display the curve in
+        [xMin, xMax] with at most about maxPoints points.
+
+        :param float xMin: Lower bound of the displayed range
+        :param float xMax: Upper bound of the displayed range
+        :param int maxPoints: Maximum number of points to display
+        :returns: The level (None if no decimation is done) and the indices
+            (a slice if no decimation is done)
+        :rtype: tuple
+        """
+        first, last = self.getRange(xMin, xMax)
+        level = self.getLevel(xMin, xMax, maxPoints)
+        if level is None:
+            return None, slice(first, last)
+
+        size = self.getBlockSize(level)
+        imin, imax = self._levels[level]
+        firstBlock, lastBlock = first // size, (last + size - 1) // size
+        imin = imin[firstBlock:lastBlock]
+        imax = imax[firstBlock:lastBlock]
+        # keep the order of the points in each block
+        indices = numpy.empty(2 * len(imin), dtype=numpy.int64)
+        indices[0::2] = numpy.minimum(imin, imax)
+        indices[1::2] = numpy.maximum(imin, imax)
+        return level, indices
@@ -0,0 +1,136 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2017 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""Timings of the rendering of a plot, see
+:meth:`PlotWidget.setRenderProfilingEnabled`."""
+
+__authors__ = ["T. Vincent"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer
+
+
+class RenderProfile(object):
+    """Timings of the rendering of one frame of a plot.
+
+    Durations are in seconds and are accumulated by stage:
+
+    - 'sync': Synchronisation of the plot items with the backend
+    - 'prepare': Preparation of the rendering by the backend
+    - 'upload': Transfer of the data to the graphics card
+      (only for OpenGL backend)
+    - 'draw': Rendering itself
+    """
+
+    STAGES = 'sync', 'prepare', 'upload', 'draw'
+    """Rendering stages in the order they occur"""
+
+    def __init__(self):
+        self._stages = OrderedDict((stage, 0.) for stage in self.STAGES)
+        self._items = OrderedDict()
+
+    def addTime(self, stage, duration, item=None):
+        """Add a duration to a stage.
+
+        :param str stage: The stage in :attr:`STAGES`
+        :param float duration: The duration in seconds
+        :param item: The item this duration is spent on or None
+        """
+        assert stage in self._stages
+        self._stages[stage] += duration
+        if item is not None:
+            times = self._items.setdefault(item, {})
+            times[stage] = times.get(stage, 0.) + duration
+
+    @contextmanager
+    def measure(self, stage, item=None):
+        """Context manager adding the time spent in the context to a stage.
+
+        :param str stage: The stage in :attr:`STAGES`
+        :param item: The item this duration is spent on or None
+        """
+        start = default_timer()
+        try:
+            yield
+        finally:
+            self.addTime(stage, default_timer() - start, item)
+
+    def _replaceItems(self, mapping):
+        """Replace the items the durations are associated with.
+
+        :param dict mapping: Item to use in place of a key
+        """
+        self._items = OrderedDict(
+            (mapping.get(item, item), times)
+            for item, times in self._items.items())
+
+    def getStageTimes(self):
+        """Returns the duration of each stage.
+
+        :rtype: OrderedDict of {str: float}
+        """
+        return OrderedDict(self._stages)
+
+    def getItemTimes(self):
+        """Returns the duration of each stage spent on each item.
+
+        :returns: For each item, a dict of durations by stage
+        :rtype: OrderedDict
+        """
+        return OrderedDict((item, dict(times))
+                           for item, times in self._items.items())
+
+    def getTotalTime(self):
+        """Returns the total measured duration of the frame.
+
+        :rtype: float
+        """
+        return sum(self._stages.values())
+
+    def __str__(self):
+        return '\n'.join(
+            ['Frame: %.1f ms' % (1000. * self.getTotalTime())] +
+            ['%s: %.1f ms' % (stage, 1000. * duration)
+             for stage, duration in self._stages.items()])
+
+
+@contextmanager
+def measure(profile, stage, item=None):
+    """Context manager measuring the time spent in the context if a
+    profile is provided.
+
+    :param profile: The profile where to record the duration or None
+    :type profile: RenderProfile or None
+    :param str stage: The stage in :attr:`RenderProfile.STAGES`
+    :param item: The item this duration is spent on or None
+    """
+    if profile is None:
+        yield
+    else:
+        with profile.measure(stage, item):
+            yield
@@ -0,0 +1,192 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2017 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""Uniform grid index of 2D points, used to find the points in a rectangle
+or the nearest point to a position without testing all the points."""
+
+__authors__ = ["T. Vincent"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+import numpy
+
+
+class GridIndex(object):
+    """Uniform grid spatial index of 2D points.
+
+    The points are sorted by cell of a regular grid covering the bounding
+    box of the finite points, so that queries only test the points of the
+    cells they overlap.
+    Points with a non-finite coordinate are not indexed.
+
+    :param numpy.ndarray x: X coordinates of the points
+    :param numpy.ndarray y: Y coordinates of the points
+    :param int pointsPerCell: Average number of points per cell
+    """
+
+    def __init__(self, x, y, pointsPerCell=8):
+        x = numpy.array(x, copy=False)
+        y = numpy.array(y, copy=False)
+        assert x.ndim == 1 and x.shape == y.shape
+        assert pointsPerCell >= 1
+        self._x = x
+        self._y = y
+
+        indices = numpy.nonzero(numpy.logical_and(numpy.isfinite(x),
+                                                  numpy.isfinite(y)))[0]
+        self._indices = indices
+        """Indices of finite points sorted by cell"""
+
+        if len(indices) == 0:
+            self._bounds = None
+            return
+
+        xFinite, yFinite = x[indices], y[indices]
+        xMin, xMax = float(numpy.min(xFinite)), float(numpy.max(xFinite))
+        yMin, yMax = float(numpy.min(yFinite)), float(numpy.max(yFinite))
+        self._bounds = xMin, xMax, yMin, yMax
+
+        # Choose a grid shape with cells of similar size in data coordinates
+        nbCells = max(1, len(indices) // pointsPerCell)
+        width, height = xMax - xMin, yMax - yMin
+        if width > 0 and height > 0:
+            nbColumns = int(numpy.sqrt(nbCells * width / height))
+            nbColumns = min(max(1, nbColumns), nbCells)
+            nbRows = max(1, nbCells // nbColumns)
+        elif width > 0:
+            nbColumns, nbRows = nbCells, 1
+        elif height > 0:
+            nbColumns, nbRows = 1, nbCells
+        else:
+            nbColumns, nbRows = 1, 1
+        self._shape = nbRows, nbColumns
+
+        cellWidth = width / nbColumns
+        cellHeight = height / nbRows
+        if cellWidth == 0:
+            cellWidth = cellHeight if cellHeight > 0 else 1.
+        if cellHeight == 0:
+            cellHeight = cellWidth
+        self._cellSize = cellWidth, cellHeight
+
+        columns = self._toCell(xFinite, xMin, cellWidth, nbColumns)
+        rows = self._toCell(yFinite, yMin, cellHeight, nbRows)
+        cells = rows * nbColumns + columns
+
+        self._indices = indices[numpy.argsort(cells)]
+        self._offsets = numpy.zeros(nbRows * nbColumns + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(cells, minlength=nbRows * nbColumns),
+                     out=self._offsets[1:])
+
+    @staticmethod
+    def _toCell(values, origin, size, count):
+        """Convert coordinates to cell indices along one dimension"""
+        cells = numpy.floor((numpy.asarray(values, dtype=numpy.float64) -
+                             origin) / size)
+        return numpy.clip(cells, 0, count - 1).astype(numpy.int64)
+
+    def getBounds(self):
+        """Returns the bounds of the indexed points.
+
+        :return: (xMin, xMax, yMin, yMax) or None if there is no
+                 finite points
+        :rtype: tuple or None
+        """
+        return self._bounds
+
+    def _getCandidates(self, xMin, yMin, xMax, yMax):
+        """Returns the indices of the points in the cells overlapping
+        a rectangle."""
+        if (self._bounds is None or
+                not (xMin <= xMax and yMin <= yMax) or  # Also handles NaN
+                xMax < self._bounds[0] or xMin > self._bounds[1] or
+                yMax < self._bounds[2] or yMin > self._bounds[3]):
+            return numpy.array((), dtype=numpy.int64)
+
+        nbRows, nbColumns = self._shape
+        cellWidth, cellHeight = self._cellSize
+        column0, column1 = self._toCell(
+            (xMin, xMax), self._bounds[0], cellWidth, nbColumns)
+        row0, row1 = self._toCell(
+            (yMin, yMax), self._bounds[2], cellHeight, nbRows)
+
+        # The cells of a row are contiguous
+        offsets = self._offsets
+        slices = [self._indices[offsets[row * nbColumns + column0]:
+                                offsets[row * nbColumns + column1 + 1]]
+                  for row in range(row0, row1 + 1)]
+        return numpy.concatenate(slices)
+
+    def getPointsInRect(self, xMin, yMin, xMax, yMax):
+        """Returns the indices of the points in a rectangle, bounds included.
+
+        :param float xMin: Left of the rectangle
+        :param float yMin: Bottom of the rectangle
+        :param float xMax: Right of the rectangle
+        :param float yMax: Top of the rectangle
+        :return: Indices of the points sorted in increasing order
+        :rtype: numpy.ndarray
+        """
+        candidates = self._getCandidates(xMin, yMin, xMax, yMax)
+        x, y = self._x[candidates], self._y[candidates]
+        inside = numpy.logical_and(
+            numpy.logical_and(x >= xMin, x <= xMax),
+            numpy.logical_and(y >= yMin, y <= yMax))
+        return numpy.sort(candidates[inside])
+
+    def getNearest(self, x, y):
+        """Returns the index of the point which is the closest to a position.
+
+        The distance is the euclidean distance in data coordinates.
+
+        :param float x: X coordinate of the position
+        :param float y: Y coordinate of the position
+        :return: The index of the nearest point or None if there is no
+                 finite points or the position is not finite
+        :rtype: int or None
+        """
+        if (self._bounds is None or
+                not numpy.isfinite(x) or not numpy.isfinite(y)):
+            return None
+
+        xMin, xMax, yMin, yMax = self._bounds
+        cellWidth, cellHeight = self._cellSize
+        radius = 1
+        while True:
+            # Search in a rectangle around the position, growing it until
+            # the nearest point found is closer than the rectangle border
+            halfWidth, halfHeight = radius * cellWidth, radius * cellHeight
+            candidates = self._getCandidates(x - halfWidth, y - halfHeight,
+                                             x + halfWidth, y + halfHeight)
+            coversAll = (x - halfWidth <= xMin and x + halfWidth >= xMax and
+                         y - halfHeight <= yMin and y + halfHeight >= yMax)
+            if len(candidates) > 0:
+                dist2 = ((self._x[candidates] - x) ** 2 +
+                         (self._y[candidates] - y) ** 2)
+                nearest = numpy.argmin(dist2)
+                if coversAll or dist2[nearest] <= min(halfWidth,
+                                                      halfHeight) ** 2:
+                    return int(candidates[nearest])
+            radius *= 2
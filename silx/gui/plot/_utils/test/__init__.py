@@ -27,15 +27,19 @@ from __future__ import absolute_import, division, unicode_literals
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "18/10/2016"
+__date__ = "18/10/2017"
 
 
 import unittest
 
+from .test_decimation import suite as test_decimation_suite
+from .test_spatialindex import suite as test_spatialindex_suite
 from .test_ticklayout import suite as test_ticklayout_suite
 
 
 def suite():
     testsuite = unittest.TestSuite()
+    testsuite.addTest(test_decimation_suite())
+    testsuite.addTest(test_spatialindex_suite())
     testsuite.addTest(test_ticklayout_suite())
     return testsuite
@@ -0,0 +1,103 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2015-2017 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""Tests of the min/max decimation of curves"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+__authors__ = ["T. Vincent"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+import unittest
+
+import numpy
+
+from silx.gui.plot._utils import decimation
+
+
+class TestMinMaxPyramid(unittest.TestCase):
+    """Test :class:`MinMaxPyramid`"""
+
+    def setUp(self):
+        self.x = numpy.arange(1000, dtype=numpy.float64)
+        self.y = numpy.random.random(1000)
+        self.y[123] = 10.
+        self.y[456] = -10.
+        self.y[789] = numpy.nan
+
+    def testLevels(self):
+        """Test the number and content of levels"""
+        pyramid = decimation.MinMaxPyramid(self.x, self.y, blockSize=8)
+        # 125 blocks, 63, 32, 16, 8, 4, 2
+        self.assertEqual(pyramid.getLevelCount(), 7)
+        self.assertEqual(pyramid.getBlockSize(2), 32)
+
+        for level in range(pyramid.getLevelCount()):
+            imin, imax = pyramid._levels[level]
+            size = pyramid.getBlockSize(level)
+            for block, (indexMin, indexMax) in enumerate(zip(imin, imax)):
+                values = self.y[block * size:(block + 1) * size]
+                self.assertEqual(self.y[indexMin], numpy.nanmin(values))
+                self.assertEqual(self.y[indexMax], numpy.nanmax(values))
+
+    def testIndices(self):
+        """Test decimated indices keep extrema in the displayed range"""
+        pyramid = decimation.MinMaxPyramid(self.x, self.y, blockSize=8)
+
+        level, indices = pyramid.getIndices(0, 999, maxPoints=100)
+        self.assertIsNotNone(level)
+        self.assertLessEqual(len(indices), 2 * 100)
+        self.assertTrue(numpy.all(numpy.diff(indices) >= 0))
+        self.assertIn(123, indices)
+        self.assertIn(456, indices)
+
+        # Small range: no decimation
+        level, indices = pyramid.getIndices(100.5, 150.5, maxPoints=100)
+        self.assertIsNone(level)
+        self.assertEqual(indices, slice(100, 152))
+
+    def testAllNaN(self):
+        """Test blocks with only NaN"""
+        y = numpy.full(100, numpy.nan)
+        pyramid = decimation.MinMaxPyramid(numpy.arange(100), y)
+        level, indices = pyramid.getIndices(0, 100, maxPoints=10)
+        self.assertTrue(numpy.all(numpy.isnan(y[indices])))
+
+    def testIsMonotonic(self):
+        self.assertTrue(decimation.isMonotonic(self.x))
+        self.assertFalse(decimation.isMonotonic(self.x[::-1]))
+        self.assertFalse(decimation.isMonotonic(self.y))
+
+
+def suite():
+    testsuite = unittest.TestSuite()
+    testsuite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestMinMaxPyramid))
+    return testsuite
+
+
+if __name__ == '__main__':
+    unittest.main()
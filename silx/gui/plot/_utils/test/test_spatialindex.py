@@ -0,0 +1,107 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2015-2017 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""Tests of the spatial index of points"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+__authors__ = ["T. Vincent"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+import unittest
+
+import numpy
+
+from silx.gui.plot._utils.spatialindex import GridIndex
+
+
+class TestGridIndex(unittest.TestCase):
+    """Test :class:`GridIndex` against brute force search"""
+
+    def setUp(self):
+        state = numpy.random.RandomState(0)
+        self.x = state.normal(size=10000) * 100.
+        self.y = state.random_sample(10000)
+        self.x[10] = numpy.nan
+        self.y[20] = numpy.inf
+        self.index = GridIndex(self.x, self.y)
+
+    def tearDown(self):
+        del self.index
+
+    def _bruteForceRect(self, xMin, yMin, xMax, yMax):
+        return numpy.nonzero((self.x >= xMin) & (self.x <= xMax) &
+                             (self.y >= yMin) & (self.y <= yMax))[0]
+
+    def testPointsInRect(self):
+        """Test getPointsInRect"""
+        for rect in ((-10., 0.1, 10., 0.2),
+                     (-1000., -1., 1000., 2.),
+                     (150., 0.5, 500., 0.9),
+                     (1000., 0., 2000., 1.),
+                     (5., 0.5, 5., 0.5)):
+            indices = self.index.getPointsInRect(*rect)
+            self.assertTrue(numpy.array_equal(indices,
+                                              self._bruteForceRect(*rect)))
+
+        self.assertEqual(len(self.index.getPointsInRect(
+            numpy.nan, 0., 1., 1.)), 0)
+
+    def testNearest(self):
+        """Test getNearest"""
+        finite = numpy.isfinite(self.x) & numpy.isfinite(self.y)
+        for x, y in ((0., 0.5), (-250., 0.1), (1000., 10.), (-1e6, -1e6)):
+            dist2 = (self.x - x) ** 2 + (self.y - y) ** 2
+            dist2[~finite] = numpy.inf
+            nearest = self.index.getNearest(x, y)
+            self.assertEqual(dist2[nearest], dist2.min())
+
+        self.assertIsNone(self.index.getNearest(numpy.nan, 0.))
+
+    def testDegenerated(self):
+        """Test with points on a line and without finite points"""
+        x = numpy.ones(100)
+        y = numpy.arange(100.)
+        index = GridIndex(x, y)
+        self.assertTrue(numpy.array_equal(
+            index.getPointsInRect(0., 10., 2., 20.), numpy.arange(10, 21)))
+        self.assertEqual(index.getNearest(5., 50.2), 50)
+
+        index = GridIndex((numpy.nan,), (1.,))
+        self.assertIsNone(index.getBounds())
+        self.assertEqual(len(index.getPointsInRect(0., 0., 1., 1.)), 0)
+        self.assertIsNone(index.getNearest(0., 0.))
+
+
+def suite():
+    testsuite = unittest.TestSuite()
+    testsuite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestGridIndex))
+    return testsuite
+
+
+if __name__ == '__main__':
+    unittest.main()
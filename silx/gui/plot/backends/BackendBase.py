@@ -31,7 +31,7 @@ This API is a simplified version of PyMca PlotBackend API.
 
 __authors__ = ["V.A. Sole", "T. Vincent"]
 __license__ = "MIT"
-__date__ = "16/08/2017"
+__date__ = "18/10/2017"
 
 
 import weakref
@@ -145,6 +145,60 @@ class BackendBase(object):
         """
         return legend
 
+    def addScatter(self, x, y, value, legend, colormap, symbol,
+                   xerror, yerror, z, selectable, alpha, symbolsize):
+        """Add a scatter plot given by x, y and value to the graph.
+
+        The default implementation applies the colormap to the values and
+        adds a curve with one color per point (see :meth:`addCurve`).
+
+        :param numpy.ndarray x: The data corresponding to the x axis
+        :param numpy.ndarray y: The data corresponding to the y axis
+        :param numpy.ndarray value: The values used for the colormap
+        :param str legend: The legend to be associated to the scatter
+        :param Colormap colormap: The :class:`.Colormap` to apply
+        :param str symbol: Symbol to be drawn at each (x, y) position
+                           (see :meth:`addCurve`)
+        :param xerror: Values with the uncertainties on the x values
+        :type xerror: numpy.ndarray or None
+        :param yerror: Values with the uncertainties on the y values
+        :type yerror: numpy.ndarray or None
+        :param int z: Layer on which to draw the scatter
+        :param bool selectable: indicate if the scatter can be selected
+        :param float alpha: Opacity, as a float in [0., 1.]
+        :param float symbolsize: Size of the symbol drawn
+                                 at each (x, y) position.
+        :returns: The handle used by the backend to univocally access
+                  the scatter
+        """
+        return self.addCurve(x, y, legend,
+                             color=colormap.applyToData(value),
+                             symbol=symbol,
+                             linewidth=0,
+                             linestyle="",
+                             yaxis='left',
+                             xerror=xerror,
+                             yerror=yerror,
+                             z=z,
+                             selectable=selectable,
+                             fill=False,
+                             alpha=alpha,
+                             symbolsize=symbolsize)
+
+    def updateScatterColormap(self, item, value, colormap):
+        """Update the colormap of a scatter added with :meth:`addScatter`
+        in place.
+
+        :param item: The scatter handle returned by :meth:`addScatter`
+        :param numpy.ndarray value: The values of the scatter, used for
+                                    the autoscale range of the colormap
+        :param Colormap colormap: The new :class:`.Colormap` to apply
+        :returns: True if the scatter was updated, False if it must be
+                  removed and added again
+        :rtype: bool
+        """
+        return False
+
     def addImage(self, data, legend,
                  origin, scale, z,
                  selectable, draggable,
@@ -171,6 +225,42 @@ class BackendBase(object):
         """
         return legend
 
+    def updateImageData(self, item, data, colormap, regions=None):
+        """Update the data of an image added with :meth:`addImage` in place.
+
+        This is only possible for data of the same shape and type as the
+        current data of the image.
+
+        :param item: The image handle returned by :meth:`addImage`
+        :param numpy.ndarray data: The new (nrows, ncolumns) data
+        :param colormap: :class:`.Colormap` of the image, used to update
+                         the autoscale range
+        :param regions: List of (row, column, height, width) regions of
+                        the data that have changed or None for all data
+        :returns: True if the image was updated, False if it must be
+                  removed and added again
+        :rtype: bool
+        """
+        return False
+
+    def updateCurveData(self, item, x, y, removed, bounds):
+        """Update the data of a curve added with :meth:`addCurve` in place.
+
+        This is used for curves whose points are removed at the beginning
+        and appended at the end, e.g., when streaming data.
+
+        :param item: The curve handle returned by :meth:`addCurve`
+        :param numpy.ndarray x: The x coordinates of the appended points
+        :param numpy.ndarray y: The y coordinates of the appended points
+        :param int removed: Number of points removed at the beginning
+        :param bounds: (xmin, xmax, ymin, ymax) of the finite values of all
+                       the points of the curve, or None if there is none
+        :returns: True if the curve was updated, False if it must be
+                  removed and added again
+        :rtype: bool
+        """
+        return False
+
     def addItem(self, x, y, legend, shape, color, fill, overlay, z):
         """Add an item (i.e. a shape) to the plot.
 
@@ -317,8 +407,15 @@ class BackendBase(object):
             plot.replot()
 
     def replot(self):
-        """Redraw the plot."""
-        pass
+        """Redraw the plot.
+
+        Backends must call :meth:`PlotWidget._endRenderProfile` once the
+        plot is rendered.
+        Default implementation does not render anything.
+        """
+        plot = self._plotRef()
+        if plot is not None:
+            plot._endRenderProfile()
 
     def saveGraph(self, fileName, fileFormat, dpi):
         """Save the graph to a file (or a StringIO)
@@ -28,7 +28,7 @@ from __future__ import division
 
 __authors__ = ["V.A. Sole", "T. Vincent, H. Payno"]
 __license__ = "MIT"
-__date__ = "16/08/2017"
+__date__ = "18/10/2017"
 
 
 import logging
@@ -40,6 +40,7 @@ _logger = logging.getLogger(__name__)
 
 
 from ... import qt
+from ..._utils import convertArrayToQImage
 
 # First of all init matplotlib and set its backend
 from ..matplotlib import Colormap as MPLColormap
@@ -47,6 +48,7 @@ from ..matplotlib import FigureCanvasQTAgg
 import matplotlib
 from matplotlib.container import Container
 from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.patches import Rectangle, Polygon
 from matplotlib.image import AxesImage
 from matplotlib.backend_bases import MouseEvent
@@ -56,6 +58,7 @@ from matplotlib.collections import PathCollection, LineCollection
 from ..matplotlib.ModestImage import ModestImage
 from . import BackendBase
 from .._utils import FLOAT32_MINPOS
+from .._utils import profiling
 
 
 class BackendMatplotlib(BackendBase.BackendBase):
@@ -223,6 +226,9 @@ class BackendMatplotlib(BackendBase.BackendBase):
                           selectable, draggable):
             assert parameter is not None
 
+        # h5py-like datasets are loaded
+        data = numpy.array(data, copy=False)
+
         origin = float(origin[0]), float(origin[1])
         scale = float(scale[0]), float(scale[1])
         height, width = data.shape[0:2]
@@ -814,13 +820,16 @@ class BackendMatplotlibQt(FigureCanvasQTAgg, BackendMatplotlib):
 
     def draw(self):
         """Override canvas draw method to support faster draw of overlays."""
+        profile = self._plot._getRenderProfile()
+
         if self._plot._getDirtyPlot():  # Need a full redraw
             # Store previous limits
             xLimits = self.getGraphXLimits()
             yLimits = self.getGraphYLimits(axis='left')
             yRightLimits = self.getGraphYLimits(axis='right')
 
-            FigureCanvasQTAgg.draw(self)
+            with profiling.measure(profile, 'draw'):
+                FigureCanvasQTAgg.draw(self)
             self._background = None  # Any saved background is dirty
 
             # Check if limits changed due to a resize of the widget
@@ -835,25 +844,29 @@ class BackendMatplotlibQt(FigureCanvasQTAgg, BackendMatplotlib):
                 self._plot._getDirtyPlot() == 'overlay'):
             # There are overlays or crosshair, or they is just no more overlays
 
-            # Specific case: called from resizeEvent:
-            # avoid store/restore background, just draw the overlay
-            if not self._insideResizeEventMethod:
-                if self._background is None:  # First store the background
-                    self._background = self.copy_from_bbox(self.fig.bbox)
+            with profiling.measure(profile, 'draw'):
+                # Specific case: called from resizeEvent:
+                # avoid store/restore background, just draw the overlay
+                if not self._insideResizeEventMethod:
+                    if self._background is None:  # First store background
+                        self._background = self.copy_from_bbox(self.fig.bbox)
+
+                    self.restore_region(self._background)
 
-                self.restore_region(self._background)
+                # This assume that items are only on left/bottom Axes
+                for item in self._overlays:
+                    self.ax.draw_artist(item)
 
-            # This assume that items are only on left/bottom Axes
-            for item in self._overlays:
-                self.ax.draw_artist(item)
+                for item in self._graphCursor:
+                    self.ax.draw_artist(item)
 
-            for item in self._graphCursor:
-                self.ax.draw_artist(item)
+                self.blit(self.fig.bbox)
 
-            self.blit(self.fig.bbox)
+        self._plot._endRenderProfile()
 
     def replot(self):
-        BackendMatplotlib.replot(self)
+        with profiling.measure(self._plot._getRenderProfile(), 'prepare'):
+            BackendMatplotlib.replot(self)
         self.draw()
 
     # cursor
@@ -871,3 +884,129 @@ class BackendMatplotlibQt(FigureCanvasQTAgg, BackendMatplotlib):
         cursor = self._QT_CURSORS[cursor]
 
         FigureCanvasQTAgg.setCursor(self, qt.QCursor(cursor))
+
+
+class BackendMatplotlibAgg(BackendMatplotlib):
+    """Offscreen matplotlib backend using an Agg canvas.
+
+    It does not provide a widget and only renders the plot when
+    :meth:`replot` is called.
+
+    The axes are drawn in a background which is reused as long as the
+    size, limits, scales and labels of the plot do not change.
+    Only the plot content is then drawn on top of it.
+    """
+
+    def __init__(self, plot, parent=None):
+        BackendMatplotlib.__init__(self, plot, parent)
+        FigureCanvasAgg(self.fig)  # Attach canvas to the figure
+
+        self._background = None  # Rendering of the axes
+        self._backgroundKey = None  # State of the axes in the background
+
+    def getWidgetHandle(self):
+        return None
+
+    def postRedisplay(self):
+        pass  # Rendering only occurs on replot
+
+    def setSize(self, width, height, dpi):
+        """Set the size of the rendered image.
+
+        :param int width: Width in pixels
+        :param int height: Height in pixels
+        :param float dpi: Resolution in dot per inch
+        """
+        self.fig.set_dpi(dpi)
+        self.fig.set_size_inches(width / dpi, height / dpi)
+        self._plot._setDirtyPlot()
+
+    def getSize(self):
+        """Returns the size of the rendered image in pixels.
+
+        :rtype: 2-tuple of int (width, height)
+        """
+        return self.fig.canvas.get_width_height()
+
+    def setGraphGrid(self, which):
+        BackendMatplotlib.setGraphGrid(self, which)
+        self._background = None
+
+    def _getBackgroundKey(self):
+        """Returns the state of the axes the background depends on.
+
+        :rtype: tuple
+        """
+        key = [self.getSize(), self.fig.dpi]
+        for axes in (self.ax, self.ax2):
+            key += [axes.get_xlim(), axes.get_ylim(),
+                    axes.get_xscale(), axes.get_yscale(),
+                    axes.get_title(), axes.get_xlabel(), axes.get_ylabel(),
+                    axes.axison, axes.get_aspect(),
+                    axes.get_position(original=True).bounds,
+                    axes.get_yaxis().get_visible()]
+        return tuple(key)
+
+    def _getContentArtists(self):
+        """Returns the artists of the plot content in drawing order.
+
+        :rtype: list
+        """
+        artists = []
+        for axes in (self.ax2, self.ax):  # ax2 is below ax
+            content = (axes.images + axes.collections + axes.patches +
+                       axes.lines + axes.texts + axes.artists)
+            artists += sorted(content, key=lambda artist: artist.zorder)
+        return artists
+
+    def replot(self):
+        profile = self._plot._getRenderProfile()
+
+        with profiling.measure(profile, 'prepare'):
+            BackendMatplotlib.replot(self)
+            artists = self._getContentArtists()
+
+        with profiling.measure(profile, 'draw'):
+            canvas = self.fig.canvas
+            if (self._background is None or
+                    self._getBackgroundKey() != self._backgroundKey):
+                # Draw the background without the content
+                visibleArtists = [artist for artist in artists
+                                  if artist.get_visible()]
+                for artist in visibleArtists:
+                    artist.set_visible(False)
+                canvas.draw()
+                for artist in visibleArtists:
+                    artist.set_visible(True)
+
+                self._background = canvas.copy_from_bbox(self.fig.bbox)
+                # Limits might have been updated by drawing
+                self._backgroundKey = self._getBackgroundKey()
+            else:
+                canvas.restore_region(self._background)
+
+            for artist in artists:
+                artist.axes.draw_artist(artist)
+
+        self._plot._endRenderProfile()
+
+    def saveGraph(self, fileName, fileFormat, dpi):
+        self._plot.replot()
+        if (fileFormat != 'png' or dpi is not None or
+                not hasattr(fileName, 'lower')):
+            BackendMatplotlib.saveGraph(self, fileName, fileFormat, dpi)
+        else:  # Save the rendered image without drawing the figure again
+            image = convertArrayToQImage(self.getImageData()[:, :, :3])
+            if not image.save(fileName, 'PNG'):
+                raise IOError('Cannot save image to %s' % fileName)
+
+    def getImageData(self):
+        """Returns the RGBA image of the last rendering of the plot.
+
+        :returns: Image as a (height, width, 4) array of uint8
+        :rtype: numpy.ndarray
+        """
+        renderer = self.fig.canvas.get_renderer()
+        data = numpy.frombuffer(renderer.buffer_rgba(), dtype=numpy.uint8)
+        return data.reshape(
+            int(renderer.height), int(renderer.width), 4).copy()
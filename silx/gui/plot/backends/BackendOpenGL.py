@@ -28,7 +28,7 @@ from __future__ import division
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "16/08/2017"
+__date__ = "18/10/2017"
 
 from collections import OrderedDict, namedtuple
 from ctypes import c_void_p
@@ -37,6 +37,7 @@ import logging
 import numpy
 
 from .._utils import FLOAT32_MINPOS
+from .._utils import profiling
 from . import BackendBase
 from .. import Colors
 from ..Colormap import Colormap
@@ -50,6 +51,7 @@ from .glutils import (
     LEFT, RIGHT, BOTTOM, TOP,
     Text2D, Shape2D)
 from .glutils.PlotImageFile import saveImageToFile
+from ....io.statistics import get_statistics
 
 _logger = logging.getLogger(__name__)
 
@@ -462,7 +464,7 @@ class BackendOpenGL(BackendBase.BackendBase, glu.OpenGLWidget):
         self._renderMarkersGL()
         self._renderOverlayGL()
 
-    def _paintFBOGL(self):
+    def _paintFBOGL(self, profile=None):
         context = glu.getGLContext()
         plotFBOTex = self._plotFBOs.get(context)
         if (self._plot._getDirtyPlot() or self._plotFrame.isDirty or
@@ -489,8 +491,9 @@ class BackendOpenGL(BackendBase.BackendBase, glu.OpenGLWidget):
 
             with plotFBOTex:
                 gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_STENCIL_BUFFER_BIT)
-                self._renderPlotAreaGL()
-                self._plotFrame.render()
+                self._renderPlotAreaGL(profile)
+                with profiling.measure(profile, 'draw'):
+                    self._plotFrame.render()
 
         # Render plot in screen coords
         gl.glViewport(0, 0, self._plotFrame.size[0], self._plotFrame.size[1])
@@ -519,11 +522,17 @@ class BackendOpenGL(BackendBase.BackendBase, glu.OpenGLWidget):
                                  gl.GL_FALSE,
                                  stride, texCoordsPtr)
 
-        with plotFBOTex.texture:
-            gl.glDrawArrays(gl.GL_TRIANGLE_STRIP, 0, len(self._plotVertices))
+        with profiling.measure(profile, 'draw'):
+            with plotFBOTex.texture:
+                gl.glDrawArrays(gl.GL_TRIANGLE_STRIP, 0,
+                                len(self._plotVertices))
 
-        self._renderMarkersGL()
-        self._renderOverlayGL()
+            self._renderMarkersGL()
+            self._renderOverlayGL()
+
+            if profile is not None:
+                # Wait for the end of rendering to measure it
+                gl.glFinish()
 
     def paintGL(self):
         global _current_context
@@ -531,24 +540,27 @@ class BackendOpenGL(BackendBase.BackendBase, glu.OpenGLWidget):
 
         glu.setGLContextGetter(_getContext)
 
-        # Release OpenGL resources
-        for item in self._glGarbageCollector:
-            item.discard()
-        self._glGarbageCollector = []
+        profile = self._plot._getRenderProfile()
+
+        with profiling.measure(profile, 'prepare'):
+            # Release OpenGL resources
+            for item in self._glGarbageCollector:
+                item.discard()
+            self._glGarbageCollector = []
 
-        gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_STENCIL_BUFFER_BIT)
+            gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_STENCIL_BUFFER_BIT)
 
         # Check if window is large enough
         plotWidth, plotHeight = self.getPlotBoundsInPixels()[2:]
-        if plotWidth <= 2 or plotHeight <= 2:
-            return
-
-        # self._paintDirectGL()
-        self._paintFBOGL()
+        if plotWidth > 2 and plotHeight > 2:
+            # self._paintDirectGL()
+            self._paintFBOGL(profile)
 
         glu.setGLContextGetter()
         _current_context = None
 
+        self._plot._endRenderProfile()
+
     def _nonOrthoAxesLineMarkerPrimitives(self, marker, pixelOffset):
         """Generates the vertices and label for a line marker.
 
@@ -847,10 +859,11 @@ class BackendOpenGL(BackendBase.BackendBase, glu.OpenGLWidget):
 
             gl.glDisable(gl.GL_SCISSOR_TEST)
 
-    def _renderPlotAreaGL(self):
+    def _renderPlotAreaGL(self, profile=None):
         plotWidth, plotHeight = self.getPlotBoundsInPixels()[2:]
 
-        self._plotFrame.renderGrid()
+        with profiling.measure(profile, 'draw'):
+            self._plotFrame.renderGrid()
 
         gl.glScissor(self._plotFrame.margins.left,
                      self._plotFrame.margins.bottom,
@@ -874,40 +887,54 @@ class BackendOpenGL(BackendBase.BackendBase, glu.OpenGLWidget):
         # sorted is stable: original order is preserved when key is the same
         for item in self._plotContent.zOrderedPrimitives():
             if item.info.get('yAxis') == 'right':
-                item.render(self._plotFrame.transformedDataY2ProjMat,
-                            isXLog, isYLog)
+                matrix = self._plotFrame.transformedDataY2ProjMat
             else:
-                item.render(self._plotFrame.transformedDataProjMat,
-                            isXLog, isYLog)
+                matrix = self._plotFrame.transformedDataProjMat
+
+            if profile is None:
+                item.render(matrix, isXLog, isYLog)
+            else:
+                # Handle of the item as returned by addCurve/addImage
+                handle = item.info['legend'], (
+                    'curve' if isinstance(item, GLPlotCurve2D) else 'image')
+                with profile.measure('upload', handle):
+                    if isinstance(item, GLPlotCurve2D):
+                        item.prepare(isXLog, isYLog)
+                    else:
+                        item.prepare()
+                with profile.measure('draw', handle):
+                    item.render(matrix, isXLog, isYLog)
 
         # Render Items
-        self._progBase.use()
-        gl.glUniformMatrix4fv(self._progBase.uniforms['matrix'], 1, gl.GL_TRUE,
-                              self._plotFrame.transformedDataProjMat)
-        gl.glUniform2i(self._progBase.uniforms['isLog'],
-                       self._plotFrame.xAxis.isLog,
-                       self._plotFrame.yAxis.isLog)
-        gl.glUniform1f(self._progBase.uniforms['tickLen'], 0.)
+        with profiling.measure(profile, 'draw'):
+            self._progBase.use()
+            gl.glUniformMatrix4fv(self._progBase.uniforms['matrix'], 1,
+                                  gl.GL_TRUE,
+                                  self._plotFrame.transformedDataProjMat)
+            gl.glUniform2i(self._progBase.uniforms['isLog'],
+                           self._plotFrame.xAxis.isLog,
+                           self._plotFrame.yAxis.isLog)
+            gl.glUniform1f(self._progBase.uniforms['tickLen'], 0.)
 
-        for item in self._items.values():
-            shape2D = item.get('_shape2D')
-            if shape2D is None:
-                shape2D = Shape2D(tuple(zip(item['x'], item['y'])),
-                                  fill=item['fill'],
-                                  fillColor=item['color'],
-                                  stroke=True,
-                                  strokeColor=item['color'])
-                item['_shape2D'] = shape2D
-
-            if ((isXLog and shape2D.xMin < FLOAT32_MINPOS) or
-                    (isYLog and shape2D.yMin < FLOAT32_MINPOS)):
-                # Ignore items <= 0. on log axes
-                continue
+            for item in self._items.values():
+                shape2D = item.get('_shape2D')
+                if shape2D is None:
+                    shape2D = Shape2D(tuple(zip(item['x'], item['y'])),
+                                      fill=item['fill'],
+                                      fillColor=item['color'],
+                                      stroke=True,
+                                      strokeColor=item['color'])
+                    item['_shape2D'] = shape2D
+
+                if ((isXLog and shape2D.xMin < FLOAT32_MINPOS) or
+                        (isYLog and shape2D.yMin < FLOAT32_MINPOS)):
+                    # Ignore items <= 0. on log axes
+                    continue
 
-            posAttrib = self._progBase.attributes['position']
-            colorUnif = self._progBase.uniforms['color']
-            hatchStepUnif = self._progBase.uniforms['hatchStep']
-            shape2D.render(posAttrib, colorUnif, hatchStepUnif)
+                posAttrib = self._progBase.attributes['position']
+                colorUnif = self._progBase.uniforms['color']
+                hatchStepUnif = self._progBase.uniforms['hatchStep']
+                shape2D.render(posAttrib, colorUnif, hatchStepUnif)
 
         gl.glDisable(gl.GL_SCISSOR_TEST)
 
@@ -1008,6 +1035,77 @@ class BackendOpenGL(BackendBase.BackendBase, glu.OpenGLWidget):
 
         return legend, 'curve'
 
+    @staticmethod
+    def _getColormapLut(colormap):
+        """Returns the 256 colors LUT of a colormap.
+
+        :param Colormap colormap: The colormap
+        :rtype: numpy.ndarray
+        """
+        # Retrieve colormap LUT from name and color array
+        colormapDisp = Colormap(name=colormap.getName(),
+                                normalization=Colormap.LINEAR,
+                                vmin=0,
+                                vmax=255,
+                                colors=colormap.getColormapLUT())
+        return colormapDisp.applyToData(numpy.arange(256, dtype=numpy.uint8))
+
+    def addScatter(self, x, y, value, legend, colormap, symbol,
+                   xerror, yerror, z, selectable, alpha, symbolsize):
+        for parameter in (x, y, value, legend, colormap, symbol,
+                          z, selectable, symbolsize):
+            assert parameter is not None
+
+        x = numpy.array(x, dtype=numpy.float32, copy=False, order='C')
+        y = numpy.array(y, dtype=numpy.float32, copy=False, order='C')
+        value = numpy.array(value, dtype=numpy.float32, copy=False, order='C')
+        if xerror is not None:
+            xerror = numpy.array(
+                xerror, dtype=numpy.float32, copy=False, order='C')
+        if yerror is not None:
+            yerror = numpy.array(
+                yerror, dtype=numpy.float32, copy=False, order='C')
+
+        behaviors = set()
+        if selectable:
+            behaviors.add('selectable')
+
+        # The colormap is applied to the values by the shader
+        curve = GLPlotCurve2D(x, y,
+                              xError=xerror,
+                              yError=yerror,
+                              lineStyle='',
+                              marker=symbol,
+                              markerSize=symbolsize,
+                              valueData=value)
+        curve.colormap = self._getColormapLut(colormap)
+        curve.cmapIsLog = colormap.getNormalization() == 'log'
+        curve.cmapRange = colormap.getColormapRange(data=value)
+        curve.markerAlpha = alpha
+        curve.info = {
+            'legend': legend,
+            'zOrder': z,
+            'behaviors': behaviors,
+            'yAxis': 'left',
+        }
+
+        self._plotContent.add(curve)
+
+        return legend, 'curve'
+
+    def updateScatterColormap(self, item, value, colormap):
+        legend, kind = item
+        curve = self._plotContent.get('curve', legend)
+        if curve is None or curve.valueData is None:
+            return False
+
+        colormapLut = self._getColormapLut(colormap)
+        if not numpy.array_equal(colormapLut, curve.colormap):
+            curve.colormap = colormapLut
+        curve.cmapIsLog = colormap.getNormalization() == 'log'
+        curve.cmapRange = colormap.getColormapRange(data=value)
+        return True
+
     def addImage(self, data, legend,
                  origin, scale, z,
                  selectable, draggable,
@@ -1022,32 +1120,39 @@ class BackendOpenGL(BackendBase.BackendBase, glu.OpenGLWidget):
         if draggable:
             behaviors.add('draggable')
 
-        if data.ndim == 2:
+        if len(data.shape) == 2:
+            colormapIsLog = colormap.getNormalization() == 'log'
+
+            if not isinstance(data, numpy.ndarray):
+                # h5py-like dataset: it is read by tiles when displayed
+                # and the colormap autoscale uses its statistics
+                vmin, vmax = colormap.getVMin(), colormap.getVMax()
+                if colormap.isAutoscale() or (
+                        colormapIsLog and min(vmin, vmax) <= 0.):
+                    stats = get_statistics(data, nbins=0)
+                    rangeData = numpy.array(
+                        [value for value in
+                         (stats.minimum, stats.min_positive, stats.maximum)
+                         if value is not None])
+                else:
+                    rangeData = None
+
             # Ensure array is contiguous and eventually convert its type
-            if data.dtype in (numpy.float32, numpy.uint8, numpy.uint16):
+            elif data.dtype in (numpy.float32, numpy.uint8, numpy.uint16):
                 data = numpy.array(data, copy=False, order='C')
+                rangeData = data
             else:
                 _logger.info(
                     'addImage: Convert %s data to float32', str(data.dtype))
                 data = numpy.array(data, dtype=numpy.float32, order='C')
+                rangeData = data
 
-            colormapIsLog = colormap.getNormalization() == 'log'
-
-            cmapRange = colormap.getColormapRange(data=data)
-
-            # Retrieve colormap LUT from name and color array
-            colormapDisp = Colormap(name=colormap.getName(),
-                                    normalization=Colormap.LINEAR,
-                                    vmin=0,
-                                    vmax=255,
-                                    colors=colormap.getColormapLUT())
-            colormapLut = colormapDisp.applyToData(
-                numpy.arange(256, dtype=numpy.uint8))
+            cmapRange = colormap.getColormapRange(data=rangeData)
 
             image = GLPlotColormap(data,
                                    origin,
                                    scale,
-                                   colormapLut,
+                                   self._getColormapLut(colormap),
                                    colormapIsLog,
                                    cmapRange,
                                    alpha)
@@ -1085,6 +1190,48 @@ class BackendOpenGL(BackendBase.BackendBase, glu.OpenGLWidget):
 
         return legend, 'image'
 
+    def updateImageData(self, item, data, colormap, regions=None):
+        legend, kind = item
+        image = self._plotContent.get('image', legend)
+        if (not isinstance(image, GLPlotColormap) or data.ndim != 2 or
+                not isinstance(image.data, numpy.ndarray) or
+                data.shape != image.data.shape):
+            return False
+
+        if data.dtype in (numpy.float32, numpy.uint8, numpy.uint16):
+            glData = numpy.array(data, copy=False, order='C')
+            if glData.dtype != image.data.dtype:
+                return False
+        elif image.data.dtype == numpy.float32:
+            # The image keeps the float32 copy made by addImage:
+            # only convert the updated regions
+            glData = image.data
+            for row, column, height, width in (
+                    regions if regions is not None else [(0, 0) + data.shape]):
+                block = (slice(row, row + height), slice(column, column + width))
+                glData[block] = data[block]
+        else:
+            return False
+
+        image.cmapRange = colormap.getColormapRange(data=data)
+        if regions is None:
+            image.updateData(glData)
+        else:
+            for region in regions:
+                image.updateData(glData, region)
+        return True
+
+    def updateCurveData(self, item, x, y, removed, bounds):
+        legend, kind = item
+        curve = self._plotContent.get('curve', legend)
+        if curve is None:
+            return False
+
+        # Only the appended points are converted
+        x = numpy.array(x, dtype=numpy.float32, copy=False)
+        y = numpy.array(y, dtype=numpy.float32, copy=False)
+        return curve.appendData(x, y, removed, bounds)
+
     def addItem(self, x, y, legend, shape, color, fill, overlay, z):
         # TODO handle overlay
         if shape not in ('polygon', 'rectangle', 'line', 'vline', 'hline'):
@@ -28,7 +28,7 @@ This module provides classes to render 2D lines and scatter plots
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "03/04/2017"
+__date__ = "18/10/2017"
 
 
 import math
@@ -39,8 +39,10 @@ import numpy
 from silx.math.combo import min_max
 
 from ...._glutils import gl
-from ...._glutils import numpyToGLType, Program, vertexBuffer
+from ...._glutils import numpyToGLType, Program, Texture, vertexBuffer
 from ..._utils import FLOAT32_MINPOS
+from ..._utils.decimation import isMonotonic
+from ..._utils.spatialindex import GridIndex
 from .GLSupport import buildFillMaskIndices
 
 
@@ -561,6 +563,27 @@ class _Points2D(object):
         vColor = color;
         gl_PointSize = size;
     }
+    """,
+
+        'vertexColormap': """
+    #version 120
+
+    uniform mat4 matrix;
+    uniform int transform;
+    uniform float size;
+    attribute float xPos;
+    attribute float yPos;
+    attribute float value;
+
+    varying float vValue;
+
+    %s
+
+    void main(void) {
+        gl_Position = matrix * transformXY(xPos, yPos);
+        vValue = value;
+        gl_PointSize = size;
+    }
     """,
 
         'fragmentSymbols': {
@@ -659,11 +682,55 @@ class _Points2D(object):
             gl_FragColor = vec4(vColor.rgb, alpha * clamp(vColor.a, 0.0, 1.0));
         }
     }
+    """,
+
+        'fragmentColormap': """
+    #version 120
+
+    uniform float size;
+    uniform struct {
+        sampler2D texture;
+        bool isLog;
+        float min;
+        float oneOverRange;
+    } cmap;
+    uniform float alpha;
+
+    varying float vValue;
+
+    %s
+
+    const float oneOverLog10 = 0.43429448190325176;
+
+    void main(void) {
+        float alphaSym = alphaSymbol(gl_PointCoord, size);
+        float value = vValue;
+        if (alphaSym <= 0.0 || value != value) { /* Also discard NaN */
+            discard;
+        }
+
+        if (cmap.isLog) {
+            if (value > 0.) {
+                value = clamp(cmap.oneOverRange *
+                              (oneOverLog10 * log(value) - cmap.min),
+                              0., 1.);
+            } else {
+                value = 0.;
+            }
+        } else { /*Linear mapping*/
+            value = clamp(cmap.oneOverRange * (value - cmap.min), 0., 1.);
+        }
+
+        vec4 color = texture2D(cmap.texture, vec2(value, 0.5));
+        gl_FragColor = vec4(color.rgb, alphaSym * alpha * color.a);
+    }
     """
     }
 
     _programs = {}
 
+    _CMAP_TEX_UNIT = 0
+
     def __init__(self, xVboData=None, yVboData=None, colorVboData=None,
                  marker=SQUARE, color=(0., 0., 0., 1.), size=7):
         self.color = color
@@ -677,6 +744,30 @@ class _Points2D(object):
         self.colorVboData = colorVboData
         self.useColorVboData = colorVboData is not None
 
+        self.valueVboData = None
+        self._colormap = None
+        self.cmapIsLog = False
+        self.cmapRange = 1., 10.
+        self.alpha = 1.
+        self._cmapTexture = None
+        self._cmapTextureIsDirty = False
+
+    @property
+    def colormap(self):
+        """Colormap LUT as a (256, 3|4) uint8 array or None.
+
+        If set, the color of the points is computed from
+        :attr:`valueVboData` through the colormap.
+        """
+        return self._colormap
+
+    @colormap.setter
+    def colormap(self, colormap):
+        if colormap is not None:
+            colormap = numpy.array(colormap, copy=False)
+        self._colormap = colormap
+        self._cmapTextureIsDirty = True
+
     @property
     def marker(self):
         return self._marker
@@ -707,22 +798,26 @@ class _Points2D(object):
         self._size = size
 
     @classmethod
-    def _getProgram(cls, transform, marker):
+    def _getProgram(cls, transform, marker, colormap=False):
         """On-demand shader program creation."""
         if marker == PIXEL:
             marker = SQUARE
         elif marker == POINT:
             marker = CIRCLE
         try:
-            prgm = cls._programs[(transform, marker)]
+            prgm = cls._programs[(transform, marker, colormap)]
         except KeyError:
-            vertShdr = cls._SHADERS['vertex'] % \
+            if colormap:
+                vertex, fragment = 'vertexColormap', 'fragmentColormap'
+            else:
+                vertex, fragment = 'vertex', 'fragment'
+            vertShdr = cls._SHADERS[vertex] % \
                 cls._SHADERS['vertexTransforms'][transform]
-            fragShdr = cls._SHADERS['fragment'] % \
+            fragShdr = cls._SHADERS[fragment] % \
                 cls._SHADERS['fragmentSymbols'][marker]
             prgm = Program(vertShdr, fragShdr, attrib0='xPos')
 
-            cls._programs[(transform, marker)] = prgm
+            cls._programs[(transform, marker, colormap)] = prgm
         return prgm
 
     @classmethod
@@ -740,13 +835,54 @@ class _Points2D(object):
 
     render = _renderNone
 
+    def _setColormap(self, prog):
+        """Set the colormap texture and uniforms of the program"""
+        if self._cmapTextureIsDirty and self._cmapTexture is not None:
+            self._cmapTexture.discard()
+            self._cmapTexture = None
+        self._cmapTextureIsDirty = False
+
+        if self._cmapTexture is None:
+            colormap = numpy.empty((16, 256, self.colormap.shape[1]),
+                                   dtype=self.colormap.dtype)
+            colormap[:] = self.colormap
+            format_ = gl.GL_RGBA if colormap.shape[-1] == 4 else gl.GL_RGB
+            self._cmapTexture = Texture(internalFormat=format_,
+                                        data=colormap,
+                                        format_=format_,
+                                        texUnit=self._CMAP_TEX_UNIT,
+                                        minFilter=gl.GL_NEAREST,
+                                        magFilter=gl.GL_NEAREST,
+                                        wrap=(gl.GL_CLAMP_TO_EDGE,
+                                              gl.GL_CLAMP_TO_EDGE))
+
+        dataMin, dataMax = self.cmapRange  # If log, it is stricly positive
+        if self.cmapIsLog:
+            dataMin = math.log10(dataMin)
+            dataMax = math.log10(dataMax)
+
+        gl.glUniform1i(prog.uniforms['cmap.texture'],
+                       self._cmapTexture.texUnit)
+        gl.glUniform1i(prog.uniforms['cmap.isLog'], self.cmapIsLog)
+        gl.glUniform1f(prog.uniforms['cmap.min'], dataMin)
+        if dataMax > dataMin:
+            oneOverRange = 1. / (dataMax - dataMin)
+        else:
+            oneOverRange = 0.  # Fall-back
+        gl.glUniform1f(prog.uniforms['cmap.oneOverRange'], oneOverRange)
+        gl.glUniform1f(prog.uniforms['alpha'], self.alpha)
+
+        self._cmapTexture.bind()
+
     def _renderMarkers(self, matrix, isXLog, isYLog):
         if isXLog:
             transform = self._LOG10_X_Y if isYLog else self._LOG10_X
         else:
             transform = self._LOG10_Y if isYLog else self._LINEAR
 
-        prog = self._getProgram(transform, self.marker)
+        useColormap = (self.valueVboData is not None and
+                       self.colormap is not None)
+        prog = self._getProgram(transform, self.marker, useColormap)
         prog.use()
         gl.glUniformMatrix4fv(prog.uniforms['matrix'], 1, gl.GL_TRUE, matrix)
         if self.marker == PIXEL:
@@ -758,13 +894,19 @@ class _Points2D(object):
         gl.glUniform1f(prog.uniforms['size'], size)
         # gl.glPointSize(self.size)
 
-        cAttrib = prog.attributes['color']
-        if self.useColorVboData and self.colorVboData is not None:
-            gl.glEnableVertexAttribArray(cAttrib)
-            self.colorVboData.setVertexAttrib(cAttrib)
+        if useColormap:
+            self._setColormap(prog)
+            valueAttrib = prog.attributes['value']
+            gl.glEnableVertexAttribArray(valueAttrib)
+            self.valueVboData.setVertexAttrib(valueAttrib)
         else:
-            gl.glDisableVertexAttribArray(cAttrib)
-            gl.glVertexAttrib4f(cAttrib, *self.color)
+            cAttrib = prog.attributes['color']
+            if self.useColorVboData and self.colorVboData is not None:
+                gl.glEnableVertexAttribArray(cAttrib)
+                self.colorVboData.setVertexAttrib(cAttrib)
+            else:
+                gl.glDisableVertexAttribArray(cAttrib)
+                gl.glVertexAttrib4f(cAttrib, *self.color)
 
         xAttrib = prog.attributes['xPos']
         gl.glEnableVertexAttribArray(xAttrib)
@@ -778,6 +920,12 @@ class _Points2D(object):
 
         gl.glUseProgram(0)
 
+    def discard(self):
+        """Release the colormap texture"""
+        if self._cmapTexture is not None:
+            self._cmapTexture.discard()
+            self._cmapTexture = None
+
 
 # error bars ##################################################################
 
@@ -1012,15 +1160,30 @@ def _proxyProperty(*componentsAttributes):
 
 
 class GLPlotCurve2D(object):
+    _MIN_VBO_RESERVE = 1024
+    """Minimum number of points reserved in the VBO when appending data"""
+
     def __init__(self, xData, yData, colorData=None,
                  xError=None, yError=None,
                  lineStyle=None, lineColor=None,
                  lineWidth=None, lineDashPeriod=None,
                  marker=None, markerColor=None, markerSize=None,
-                 fillColor=None):
+                 fillColor=None, valueData=None):
         self._isXLog = False
         self._isYLog = False
         self.xData, self.yData, self.colorData = xData, yData, colorData
+        self.valueData = valueData
+        self._hasErrorBars = xError is not None or yError is not None
+
+        self._vboReserve = 0  # Number of points to reserve for appended data
+        self._vboStart = 0  # Index of the first displayed point in the VBO
+        self._vboCapacity = 0  # Number of points the VBO can store
+        self._vboUpdate = None  # (removed, appended) points to update in VBO
+        self._dataBuffers = None  # (x, y) buffers of xData, yData when appending
+        self._dataStart = 0  # Index of the first point in the data buffers
+
+        self._pickIndex = None  # GridIndex of the points, built on pick
+        self._isXSorted = None  # Whether x is sorted, checked on pick
 
         if fillColor is not None:
             self.fill = _Fill2D(color=fillColor)
@@ -1092,6 +1255,16 @@ class GLPlotCurve2D(object):
 
     distVboData = _proxyProperty(('lines', 'distVboData'))
 
+    valueVboData = _proxyProperty(('points', 'valueVboData'))
+
+    colormap = _proxyProperty(('points', 'colormap'))
+
+    cmapIsLog = _proxyProperty(('points', 'cmapIsLog'))
+
+    cmapRange = _proxyProperty(('points', 'cmapRange'))
+
+    markerAlpha = _proxyProperty(('points', 'alpha'))
+
     lineStyle = _proxyProperty(('lines', 'style'))
 
     lineColor = _proxyProperty(('lines', 'color'))
@@ -1112,36 +1285,32 @@ class GLPlotCurve2D(object):
         _Points2D.init()
 
     @staticmethod
-    def _logFilterData(x, y, color=None, xLog=False, yLog=False):
-        # Copied from Plot.py
+    def _logFilterData(x, y, color=None, value=None, xLog=False, yLog=False):
+        """Filter out points with x or y <= 0 on log axes.
+
+        :returns: The filtered (x, y, color, value)
+        """
         if xLog and yLog:
             idx = numpy.nonzero((x > 0) & (y > 0))[0]
-            x = numpy.take(x, idx)
-            y = numpy.take(y, idx)
         elif yLog:
             idx = numpy.nonzero(y > 0)[0]
-            x = numpy.take(x, idx)
-            y = numpy.take(y, idx)
         elif xLog:
             idx = numpy.nonzero(x > 0)[0]
-            x = numpy.take(x, idx)
-            y = numpy.take(y, idx)
         else:
-            idx = None
-
-        if idx is not None and isinstance(color, numpy.ndarray):
-            colors = numpy.zeros((x.size, 4), color.dtype)
-            colors[:, 0] = color[idx, 0]
-            colors[:, 1] = color[idx, 1]
-            colors[:, 2] = color[idx, 2]
-            colors[:, 3] = color[idx, 3]
-        else:
-            colors = color
-        return x, y, colors
+            return x, y, color, value
+
+        x = numpy.take(x, idx)
+        y = numpy.take(y, idx)
+        if isinstance(color, numpy.ndarray):
+            color = numpy.take(color, idx, axis=0)
+        if value is not None:
+            value = numpy.take(value, idx)
+        return x, y, color, value
 
     def prepare(self, isXLog, isYLog):
         # init only supports updating isXLog, isYLog
-        xData, yData, colorData = self.xData, self.yData, self.colorData
+        xData, yData = self.xData, self.yData
+        colorData, valueData = self.colorData, self.valueData
 
         if self._isXLog != isXLog or self._isYLog != isYLog:
             # Log state has changed
@@ -1150,12 +1319,15 @@ class GLPlotCurve2D(object):
             # Check if data <= 0. with log scale
             if (isXLog and self.xMin <= 0.) or (isYLog and self.yMin <= 0.):
                 # Filtering data is needed
-                xData, yData, colorData = self._logFilterData(
-                    self.xData, self.yData, self.colorData,
+                xData, yData, colorData, valueData = self._logFilterData(
+                    self.xData, self.yData, self.colorData, self.valueData,
                     self._isXLog, self._isYLog)
 
                 self.discard()  # discard existing VBOs
 
+        if self._vboUpdate is not None:
+            self._updateVbo()
+
         if self.xVboData is None:
             xAttrib, yAttrib, cAttrib, dAttrib = None, None, None, None
             if self.lineStyle in (DASHED, DASHDOT, DOTTED):
@@ -1169,11 +1341,17 @@ class GLPlotCurve2D(object):
                         (xData, yData, colorData, dists),
                         prefix=(1, 1, 0, 0), suffix=(1, 1, 0, 0))
             elif self.colorData is None:
+                reserve = self._vboReserve if self.fill is None else 0
                 xAttrib, yAttrib = vertexBuffer(
-                    (xData, yData), prefix=(1, 1), suffix=(1, 1))
+                    (xData, yData),
+                    prefix=(1, 1),
+                    suffix=(1 + reserve, 1 + reserve))
+                self._vboStart = 0
+                self._vboCapacity = len(xData) + reserve
             else:
                 xAttrib, yAttrib, cAttrib = vertexBuffer(
-                    (xData, yData, colorData), prefix=(1, 1, 0))
+                    (xData, yData, colorData),
+                    prefix=(1, 1, 0), suffix=(1, 1, 0))
 
             # Shrink VBO
             self.xVboData = xAttrib.copy()
@@ -1184,12 +1362,19 @@ class GLPlotCurve2D(object):
             self.yVboData.size -= 2
             self.yVboData.offset += yAttrib.itemsize
 
+            if self._vboCapacity > len(xData):  # Hide reserved points
+                self.xVboData.size = len(xData)
+                self.yVboData.size = len(yData)
+
             if cAttrib is not None and colorData.dtype.kind == 'u':
                 cAttrib.normalization = True  # Normalize uint to [0, 1]
             self.colorVboData = cAttrib
             self.useColorVboData = cAttrib is not None
             self.distVboData = dAttrib
 
+            if valueData is not None:
+                self.valueVboData = vertexBuffer((valueData,))[0]
+
             if self.fill is not None:
                 xData = xData.reshape(xData.size, 1)
                 zero = numpy.array((1e-32,), dtype=self.yData.dtype)
@@ -1227,14 +1412,124 @@ class GLPlotCurve2D(object):
     def discard(self):
         if self.xVboData is not None:
             self.xVboData.vbo.discard()
+        if self.valueVboData is not None:
+            self.valueVboData.vbo.discard()
 
         self.xVboData = None
         self.yVboData = None
         self.colorVboData = None
         self.distVboData = None
+        self.valueVboData = None
+        self.points.discard()
+        self._vboCapacity = 0
+        self._vboUpdate = None
 
         self._errorBars.discard()
 
+    def _updateVbo(self):
+        """Update the VBO in place with the data changed by
+        :meth:`appendData`, or discard it if it is too small."""
+        removed, appended = self._vboUpdate
+        self._vboUpdate = None
+
+        start = self._vboStart + removed
+        length = self.xVboData.size - removed
+        if length > 0 and start + length + appended <= self._vboCapacity:
+            self._vboStart = start
+            for attrib, data in ((self.xVboData, self.xData),
+                                 (self.yVboData, self.yData)):
+                attrib.offset += removed * attrib.itemsize
+                if appended > 0:
+                    attrib.vbo.update(data[length:],
+                                      attrib.offset + length * attrib.itemsize,
+                                      appended * attrib.itemsize)
+                attrib.size = len(data)
+        else:
+            # Create a larger VBO
+            self._vboReserve = max(self._MIN_VBO_RESERVE, len(self.xData))
+            self.discard()
+
+    def _appendToData(self, xAppended, yAppended, removed):
+        """Remove points at the beginning of xData and yData and append
+        points at the end.
+
+        The data is stored in buffers owned by the curve, with room to
+        append points, so only the appended points are copied, except when
+        the buffers are full (the kept points are then copied to new
+        buffers twice as large as the data).
+
+        :param numpy.ndarray xAppended: float32 X coordinates to append
+        :param numpy.ndarray yAppended: float32 Y coordinates to append
+        :param int removed: Number of points to remove at the beginning
+        """
+        kept = len(self.xData) - removed
+        length = kept + len(xAppended)
+        start = self._dataStart + removed
+        if (self._dataBuffers is None or
+                start + length > len(self._dataBuffers[0])):
+            capacity = max(self._MIN_VBO_RESERVE, 2 * length)
+            self._dataBuffers = tuple(
+                numpy.empty(capacity, dtype=numpy.float32) for _ in range(2))
+            for buffer_, data in zip(self._dataBuffers,
+                                     (self.xData, self.yData)):
+                buffer_[:kept] = data[removed:]
+            start = 0
+
+        self._dataStart = start
+        xBuffer, yBuffer = self._dataBuffers
+        xBuffer[start + kept:start + length] = xAppended
+        yBuffer[start + kept:start + length] = yAppended
+        self.xData = xBuffer[start:start + length]
+        self.yData = yBuffer[start:start + length]
+
+    def appendData(self, xAppended, yAppended, removed, bounds):
+        """Update the data of the curve with points removed at the
+        beginning and points appended at the end.
+
+        When possible, only the appended points are uploaded to the
+        vertex buffer at next rendering.
+        This is only supported for curves with a single color,
+        a solid line style, no fill and no error bars.
+
+        :param numpy.ndarray xAppended: float32 X coordinates of the
+            appended points
+        :param numpy.ndarray yAppended: float32 Y coordinates of the
+            appended points
+        :param int removed: Number of points removed at the beginning
+        :param bounds: (xmin, xmax, ymin, ymax) of the finite values of all
+            the points of the curve, or None if there is none
+        :returns: True if the curve was updated, False if it must be
+                  created again
+        :rtype: bool
+        """
+        previousLength = len(self.xData)
+        appended = len(xAppended)
+        if (self.colorData is not None or self.valueData is not None or
+                self.fill is not None or self._hasErrorBars or
+                self._isXLog or self._isYLog or
+                self.lineStyle in (DASHED, DASHDOT, DOTTED) or
+                len(yAppended) != appended or removed >= previousLength or
+                bounds is None):
+            return False
+
+        self._appendToData(xAppended, yAppended, removed)
+        self._pickIndex = None
+        self._isXSorted = None
+
+        # Bounds are provided by the caller to avoid going through all
+        # the points. The positive minimum is only used with log scales,
+        # for which the curve is created again.
+        self.xMin, self.xMax, self.yMin, self.yMax = bounds
+        self.xMinPos = self.xMin if self.xMin > 0. else None
+        self.yMinPos = self.yMin if self.yMin > 0. else None
+
+        if self.xVboData is not None:  # Update VBO at next rendering
+            if self._vboUpdate is not None:
+                removed += self._vboUpdate[0]
+                appended += self._vboUpdate[1]
+            self._vboUpdate = removed, appended
+        return True
+
     def pick(self, xPickMin, yPickMin, xPickMax, yPickMax):
         """Perform picking on the curve according to its rendering.
 
@@ -1256,19 +1551,33 @@ class GLPlotCurve2D(object):
             return None
 
         elif self.lineStyle is not None:
+            xData, yData = self.xData, self.yData
+            if self._isXSorted is None:
+                self._isXSorted = isMonotonic(xData)
+
+            first = 0
+            if self._isXSorted:
+                # Only segments around the picking area can cross it
+                first = max(0, int(numpy.searchsorted(
+                    xData, xPickMin, side='left')) - 1)
+                last = int(numpy.searchsorted(
+                    xData, xPickMax, side='right')) + 1
+                xData, yData = xData[first:last], yData[first:last]
+
             # Using Cohen-Sutherland algorithm for line clipping
-            codes = ((self.yData > yPickMax) << 3) | \
-                    ((self.yData < yPickMin) << 2) | \
-                    ((self.xData > xPickMax) << 1) | \
-                    (self.xData < xPickMin)
+            codes = ((yData > yPickMax) << 3) | \
+                    ((yData < yPickMin) << 2) | \
+                    ((xData > xPickMax) << 1) | \
+                    (xData < xPickMin)
 
             # Add all points that are inside the picking area
-            indices = numpy.nonzero(codes == 0)[0].tolist()
+            indices = (numpy.nonzero(codes == 0)[0] + first).tolist()
 
             # Segment that might cross the area with no end point inside it
             segToTestIdx = numpy.nonzero((codes[:-1] != 0) &
                                          (codes[1:] != 0) &
                                          ((codes[:-1] & codes[1:]) == 0))[0]
+            segToTestIdx += first
 
             TOP, BOTTOM, RIGHT, LEFT = (1 << 3), (1 << 2), (1 << 1), (1 << 0)
 
@@ -1276,7 +1585,7 @@ class GLPlotCurve2D(object):
                 if index not in indices:
                     x0, y0 = self.xData[index], self.yData[index]
                     x1, y1 = self.xData[index + 1], self.yData[index + 1]
-                    code1 = codes[index + 1]
+                    code1 = codes[index + 1 - first]
 
                     # check for crossing with horizontal bounds
                     # y0 == y1 is a never event:
@@ -1309,9 +1618,9 @@ class GLPlotCurve2D(object):
             indices.sort()
 
         else:
-            indices = numpy.nonzero((self.xData >= xPickMin) &
-                                    (self.xData <= xPickMax) &
-                                    (self.yData >= yPickMin) &
-                                    (self.yData <= yPickMax))[0].tolist()
+            if self._pickIndex is None:
+                self._pickIndex = GridIndex(self.xData, self.yData)
+            indices = self._pickIndex.getPointsInRect(
+                xPickMin, yPickMin, xPickMax, yPickMax).tolist()
 
         return indices
@@ -28,7 +28,7 @@ This module provides a class to render 2D array as a colormap or RGB(A) image
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "03/04/2017"
+__date__ = "18/10/2017"
 
 
 import math
@@ -39,7 +39,7 @@ from silx.math.combo import min_max
 from ...._glutils import gl, Program, Texture
 from ..._utils import FLOAT32_MINPOS
 from .GLSupport import mat4Translate, mat4Scale
-from .GLTexture import Image
+from .GLTexture import Image, ImagePyramid
 
 
 class _GLPlotData2D(object):
@@ -207,6 +207,13 @@ class GLPlotColormap(_GLPlotData2D):
         numpy.dtype(numpy.uint8): gl.GL_R8,
     }
 
+    _PYRAMID_THRESHOLD = 2**24
+    """Number of pixels above which images are rendered from a pyramid"""
+
+    _OVERVIEW_SIZE = 4096
+    """Maximum size of the image rendered with log scale axes from a pyramid
+    """
+
     _linearProgram = Program(_SHADERS['linear']['vertex'],
                              _SHADERS['fragment'] %
                              _SHADERS['linear']['fragTransform'],
@@ -222,8 +229,14 @@ class GLPlotColormap(_GLPlotData2D):
                  alpha=1.0):
         """Create a 2D colormap
 
+        Large images and h5py-like datasets are displayed from a
+        multi-resolution pyramid of tiles (see :class:`ImagePyramid`):
+        only the tiles visible at the resolution of the screen are read
+        and uploaded to the GPU.
+
         :param data: The 2D scalar data array to display
         :type data: numpy.ndarray with 2 dimensions (dtype=numpy.float32)
+                    or h5py-like dataset
         :param origin: (x, y) coordinates of the origin of the data array
         :type origin: 2-tuple of floats.
         :param scale: (sx, sy) scale factors of the data array.
@@ -238,7 +251,8 @@ class GLPlotColormap(_GLPlotData2D):
         :type cmapRange: (float, float) or None
         :param float alpha: Opacity from 0 (transparent) to 1 (opaque)
         """
-        assert data.dtype in self._INTERNAL_FORMATS
+        assert (data.dtype in self._INTERNAL_FORMATS or
+                not isinstance(data, numpy.ndarray))
 
         super(GLPlotColormap, self).__init__(data, origin, scale)
         self.colormap = numpy.array(colormap, copy=False)
@@ -250,6 +264,20 @@ class GLPlotColormap(_GLPlotData2D):
         self._cmap_texture = None
         self._texture = None
         self._textureIsDirty = False
+        self._dirtyRegions = []
+        self._pyramid = None
+
+    def _isPyramid(self):
+        """Returns True if the data is rendered from a pyramid of tiles"""
+        return (not isinstance(self.data, numpy.ndarray) or
+                self.data.size > self._PYRAMID_THRESHOLD)
+
+    def _getTextureDType(self):
+        """Returns the type of the data uploaded to textures"""
+        if self.data.dtype in self._INTERNAL_FORMATS:
+            return self.data.dtype
+        else:  # Datasets of other types are converted tile by tile
+            return numpy.dtype(numpy.float32)
 
     def discard(self):
         if self._cmap_texture is not None:
@@ -260,6 +288,11 @@ class GLPlotColormap(_GLPlotData2D):
             self._texture.discard()
             self._texture = None
         self._textureIsDirty = False
+        self._dirtyRegions = []
+
+        if self._pyramid is not None:
+            self._pyramid.discard()
+            self._pyramid = None
 
     @property
     def cmapRange(self):
@@ -277,17 +310,32 @@ class GLPlotColormap(_GLPlotData2D):
     def alpha(self):
         return self._alpha
 
-    def updateData(self, data):
-        assert data.dtype in self._INTERNAL_FORMATS
+    def updateData(self, data, region=None):
+        """Update the data of the image.
+
+        If the data has the same shape and type, the texture is updated in
+        place rather than created again.
+
+        :param data: The new 2D data
+        :param region: (row, column, height, width) of the region of the
+            data that has changed, or None (default) for the whole image
+        """
+        assert (data.dtype in self._INTERNAL_FORMATS or
+                not isinstance(data, numpy.ndarray))
         oldData = self.data
         self.data = data
 
-        if self._texture is not None:
+        if self._pyramid is not None:
+            # Tiles are read again from the new data when rendered
+            self.discard()
+        elif self._texture is not None:
             if (self.data.shape != oldData.shape or
                     self.data.dtype != oldData.dtype):
                 self.discard()
-            else:
+            elif region is None:
                 self._textureIsDirty = True
+            else:
+                self._dirtyRegions.append(region)
 
     def prepare(self):
         if self._cmap_texture is None:
@@ -306,7 +354,16 @@ class GLPlotColormap(_GLPlotData2D):
                                          wrap=(gl.GL_CLAMP_TO_EDGE,
                                                gl.GL_CLAMP_TO_EDGE))
 
-        if self._texture is None:
+        if self._isPyramid():
+            if self._pyramid is None:
+                dtype = self._getTextureDType()
+                self._pyramid = ImagePyramid(self._INTERNAL_FORMATS[dtype],
+                                             self.data,
+                                             format_=gl.GL_RED,
+                                             dtype=dtype,
+                                             texUnit=self._DATA_TEX_UNIT)
+
+        elif self._texture is None:
             internalFormat = self._INTERNAL_FORMATS[self.data.dtype]
 
             self._texture = Image(internalFormat,
@@ -314,16 +371,22 @@ class GLPlotColormap(_GLPlotData2D):
                                   format_=gl.GL_RED,
                                   texUnit=self._DATA_TEX_UNIT)
         elif self._textureIsDirty:
-            self._textureIsDirty = True
+            self._textureIsDirty = False
+            self._dirtyRegions = []
             self._texture.updateAll(format_=gl.GL_RED, data=self.data)
+        elif self._dirtyRegions:
+            for region in self._dirtyRegions:
+                self._texture.updateRegion(gl.GL_RED, self.data, region)
+            self._dirtyRegions = []
 
     def _setCMap(self, prog):
         dataMin, dataMax = self.cmapRange  # If log, it is stricly positive
 
-        if self.data.dtype in (numpy.uint16, numpy.uint8):
+        dtype = self._getTextureDType()
+        if dtype in (numpy.uint16, numpy.uint8):
             # Using unsigned int as normalized integer in OpenGL
             # So normalize range
-            maxInt = float(numpy.iinfo(self.data.dtype).max)
+            maxInt = float(numpy.iinfo(dtype).max)
             dataMin, dataMax = dataMin / maxInt, dataMax / maxInt
 
         if self.cmapIsLog:
@@ -357,9 +420,35 @@ class GLPlotColormap(_GLPlotData2D):
 
         self._setCMap(prog)
 
-        self._texture.render(prog.attributes['position'],
-                             prog.attributes['texCoords'],
-                             self._DATA_TEX_UNIT)
+        if self._pyramid is not None:
+            level, bounds = self._getPyramidView(mat)
+            self._pyramid.render(prog.attributes['position'],
+                                 prog.attributes['texCoords'],
+                                 level, bounds,
+                                 self._DATA_TEX_UNIT)
+        else:
+            self._texture.render(prog.attributes['position'],
+                                 prog.attributes['texCoords'],
+                                 self._DATA_TEX_UNIT)
+
+    def _getPyramidView(self, matrix):
+        """Returns the level of the pyramid to render and the visible area.
+
+        :param matrix: Transform from data pixels to normalized coordinates
+        :returns: level and (xMin, xMax, yMin, yMax) in data pixels
+        """
+        matrix = numpy.array(matrix, dtype=numpy.float64)
+        inverse = numpy.linalg.inv(matrix[:2, :2])
+        corners = numpy.array(((-1., -1.), (1., -1.), (-1., 1.), (1., 1.)))
+        pixels = numpy.dot(corners - matrix[:2, 3], inverse.T)
+        xMin, yMin = numpy.min(pixels, axis=0)
+        xMax, yMax = numpy.max(pixels, axis=0)
+
+        _x, _y, width, height = gl.glGetIntegerv(gl.GL_VIEWPORT)
+        dataPerPixel = min((xMax - xMin) / max(1, width),
+                           (yMax - yMin) / max(1, height))
+        level = self._pyramid.getLevel(dataPerPixel)
+        return level, (xMin, xMax, yMin, yMax)
 
     def _renderLog10(self, matrix, isXLog, isYLog):
         xMin, yMin = self.xMin, self.yMin
@@ -378,7 +467,21 @@ class GLPlotColormap(_GLPlotData2D):
         gl.glUniform1i(prog.uniforms['data'], self._DATA_TEX_UNIT)
 
         gl.glUniformMatrix4fv(prog.uniforms['matrix'], 1, gl.GL_TRUE, matrix)
-        mat = mat4Translate(ox, oy) * mat4Scale(*self.scale)
+        sx, sy = self.scale
+        if self._pyramid is not None:
+            # Render a subsampled overview of the image in a single texture
+            if self._texture is None:
+                level = 0
+                while max(self.data.shape) > self._OVERVIEW_SIZE * 2 ** level:
+                    level += 1
+                self._texture = Image(self._pyramid.internalFormat,
+                                      self._pyramid.readLevel(level),
+                                      format_=gl.GL_RED,
+                                      texUnit=self._DATA_TEX_UNIT)
+            # Scale the overview to the extent of the full image
+            sx *= float(self.data.shape[1]) / self._texture.width
+            sy *= float(self.data.shape[0]) / self._texture.height
+        mat = mat4Translate(ox, oy) * mat4Scale(sx, sy)
         gl.glUniformMatrix4fv(prog.uniforms['matOffset'], 1, gl.GL_TRUE, mat)
 
         gl.glUniform2i(prog.uniforms['isLog'], isXLog, isYLog)
@@ -26,9 +26,10 @@
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "03/04/2017"
+__date__ = "18/10/2017"
 
 
+import collections
 from ctypes import c_void_p
 import logging
 
@@ -211,6 +212,33 @@ class Image(object):
                 # unpackSkipPixels=info['xOrigData'],
                 # unpackSkipRows=info['yOrigData'])
 
+    def updateRegion(self, format_, data, region, texUnit=0):
+        """Update the textures with a rectangular region of the data.
+
+        Only the part of the textures covering the region is uploaded.
+
+        :param format_: The OpenGL format of the data
+        :param numpy.ndarray data: The full image data
+        :param region: (row, column, height, width) of the region to update
+        :param int texUnit: The texture unit to use
+        """
+        if not hasattr(self, 'tiles'):
+            raise RuntimeError("No texture, discard has already been called")
+
+        assert data.shape[:2] == (self.height, self.width)
+        row, col, height, width = region
+        for texture, _, info in self.tiles:
+            yOrig, xOrig = info['yOrigData'], info['xOrigData']
+            yStart = max(row, yOrig)
+            yEnd = min(row + height, yOrig + info['hData'])
+            xStart = max(col, xOrig)
+            xEnd = min(col + width, xOrig + info['wData'])
+            if yStart < yEnd and xStart < xEnd:
+                texture.update(format_,
+                               data[yStart:yEnd, xStart:xEnd],
+                               offset=(yStart - yOrig, xStart - xOrig),
+                               texUnit=texUnit)
+
     def render(self, posAttrib, texAttrib, texUnit=0):
         try:
             tiles = self.tiles
@@ -237,3 +265,173 @@ class Image(object):
                                      gl.GL_FALSE,
                                      stride, texCoordsPtr)
             gl.glDrawArrays(gl.GL_TRIANGLE_STRIP, 0, len(vertices))
+
+
+class ImagePyramid(object):
+    """Image displayed from a multi-resolution pyramid of tiles.
+
+    Level n of the pyramid is the data subsampled by 2**n (nearest pixel).
+    Tiles are read from the data and uploaded to textures only when they
+    are visible, and at most ``maxTiles`` textures are kept, the least
+    recently used ones being discarded.
+
+    Coordinates are in pixels of the full resolution image for all levels.
+
+    :param internalFormat: OpenGL internal format of the textures
+    :param data: 2D numpy array or h5py-like dataset
+    :param format_: OpenGL format of the data
+    :param dtype: Type to convert the tiles to before upload or None
+    :param int texUnit: The texture unit to use
+    :param int tileSize: Size in pixels of the square tiles
+    :param int maxTiles: Maximum number of textures kept in memory
+    """
+
+    _WRAP = (gl.GL_CLAMP_TO_EDGE, gl.GL_CLAMP_TO_EDGE)
+    _MIN_FILTER = gl.GL_NEAREST
+    _MAG_FILTER = gl.GL_NEAREST
+
+    def __init__(self, internalFormat, data, format_=None, dtype=None,
+                 texUnit=0, tileSize=512, maxTiles=64):
+        self.internalFormat = internalFormat
+        self.format = format_
+        self.height, self.width = data.shape[0:2]
+        self.texUnit = texUnit
+        self.tileSize = tileSize
+        self.maxTiles = maxTiles
+        self._data = data
+        self._dtype = dtype
+        self._tiles = collections.OrderedDict()
+        """Tiles uploaded to textures: (level, row, col): (texture, vertices)
+        """
+
+    def getLevelCount(self):
+        """Returns the number of levels, the last one fits in a tile.
+
+        :rtype: int
+        """
+        level, size = 0, max(self.height, self.width)
+        while size > self.tileSize:
+            level += 1
+            size = (size + 1) // 2
+        return level + 1
+
+    def getLevel(self, dataPerPixel):
+        """Returns the level to display with the given number of data pixels
+        per screen pixel.
+
+        :param float dataPerPixel: Full resolution pixels per screen pixel
+        :rtype: int
+        """
+        level = 0
+        while 2 ** (level + 1) <= dataPerPixel:
+            level += 1
+        return min(level, self.getLevelCount() - 1)
+
+    def readLevel(self, level, rows=slice(None), cols=slice(None)):
+        """Read data of a level of the pyramid.
+
+        :param int level: The level to read
+        :param slice rows: Range of rows in the level to read
+        :param slice cols: Range of columns in the level to read
+        :rtype: numpy.ndarray
+        """
+        step = 2 ** level
+        rows = slice(*rows.indices((self.height + step - 1) // step))
+        cols = slice(*cols.indices((self.width + step - 1) // step))
+        data = self._data[rows.start * step:rows.stop * step:step,
+                          cols.start * step:cols.stop * step:step]
+        return numpy.array(data, dtype=self._dtype, copy=False, order='C')
+
+    def getVisibleTiles(self, level, bounds):
+        """Returns the (row, column) of the tiles of a level in bounds.
+
+        :param int level: The level of the pyramid
+        :param bounds: (xMin, xMax, yMin, yMax) in full resolution pixels
+        :rtype: List[tuple]
+        """
+        xMin, xMax, yMin, yMax = bounds
+        size = self.tileSize * 2 ** level
+        nRows = (self.height + size - 1) // size
+        nCols = (self.width + size - 1) // size
+        firstRow = max(0, int(numpy.floor(yMin / size)))
+        lastRow = min(nRows, int(numpy.ceil(yMax / size)))
+        firstCol = max(0, int(numpy.floor(xMin / size)))
+        lastCol = min(nCols, int(numpy.ceil(xMax / size)))
+        return [(row, col)
+                for row in range(firstRow, lastRow)
+                for col in range(firstCol, lastCol)]
+
+    def _getTile(self, level, row, col):
+        """Returns the texture and vertices of a tile, uploading it if needed
+        """
+        key = level, row, col
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            tileSize = self.tileSize
+            data = self.readLevel(level,
+                                  slice(row * tileSize, (row + 1) * tileSize),
+                                  slice(col * tileSize, (col + 1) * tileSize))
+            texture = Texture(self.internalFormat,
+                              data,
+                              self.format,
+                              texUnit=self.texUnit,
+                              minFilter=self._MIN_FILTER,
+                              magFilter=self._MAG_FILTER,
+                              wrap=self._WRAP)
+            step = 2 ** level
+            xOrig, yOrig = col * tileSize * step, row * tileSize * step
+            xEnd = min(self.width, xOrig + data.shape[1] * step)
+            yEnd = min(self.height, yOrig + data.shape[0] * step)
+            vertices = numpy.array((
+                (xOrig, yOrig, 0., 0.),
+                (xEnd, yOrig, 1., 0.),
+                (xOrig, yEnd, 0., 1.),
+                (xEnd, yEnd, 1., 1.)), dtype=numpy.float32)
+            tile = texture, vertices
+        self._tiles[key] = tile  # Most recently used at the end
+        return tile
+
+    def _discardLeastRecentlyUsed(self, count):
+        """Discard textures until at most count are kept"""
+        while len(self._tiles) > count:
+            _key, (texture, _vertices) = self._tiles.popitem(last=False)
+            texture.discard()
+
+    def discard(self):
+        """Discard all textures, they are uploaded again when rendered"""
+        self._discardLeastRecentlyUsed(0)
+
+    def render(self, posAttrib, texAttrib, level, bounds, texUnit=0):
+        """Render the tiles of a level visible in bounds.
+
+        :param posAttrib: Attribute of the vertex positions
+        :param texAttrib: Attribute of the texture coordinates
+        :param int level: The level of the pyramid to render
+        :param bounds: (xMin, xMax, yMin, yMax) in full resolution pixels
+        :param int texUnit: The texture unit to use
+        """
+        visibleTiles = self.getVisibleTiles(level, bounds)
+        for row, col in visibleTiles:
+            texture, vertices = self._getTile(level, row, col)
+            texture.bind(texUnit)
+
+            stride = vertices.shape[-1] * vertices.itemsize
+            gl.glEnableVertexAttribArray(posAttrib)
+            gl.glVertexAttribPointer(posAttrib,
+                                     2,
+                                     gl.GL_FLOAT,
+                                     gl.GL_FALSE,
+                                     stride, vertices)
+
+            texCoordsPtr = c_void_p(vertices.ctypes.data +
+                                    2 * vertices.itemsize)
+            gl.glEnableVertexAttribArray(texAttrib)
+            gl.glVertexAttribPointer(texAttrib,
+                                     2,
+                                     gl.GL_FLOAT,
+                                     gl.GL_FALSE,
+                                     stride, texCoordsPtr)
+            gl.glDrawArrays(gl.GL_TRIANGLE_STRIP, 0, len(vertices))
+
+        # Keep at least the textures of the displayed tiles
+        self._discardLeastRecentlyUsed(max(self.maxTiles, len(visibleTiles)))
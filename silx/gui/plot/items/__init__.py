@@ -30,12 +30,12 @@ access to its content such as :meth:`.PlotWidget.getCurve`, :meth:`.PlotWidget.g
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "22/06/2017"
+__date__ = "18/10/2017"
 
 from .core import (Item, LabelsMixIn, DraggableMixIn, ColormapMixIn,  # noqa
                    SymbolMixIn, ColorMixIn, YAxisMixIn, FillMixIn,  # noqa
                    AlphaMixIn, LineMixIn, ItemChangedType)  # noqa
-from .curve import Curve  # noqa
+from .curve import Curve, StreamingCurve  # noqa
 from .histogram import Histogram  # noqa
 from .image import ImageBase, ImageData, ImageRgba, MaskImageData  # noqa
 from .shape import Shape  # noqa
@@ -27,7 +27,7 @@
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "27/06/2017"
+__date__ = "18/10/2017"
 
 import collections
 from copy import deepcopy
@@ -39,6 +39,7 @@ from silx.third_party import six, enum
 from ... import qt
 from .. import Colors
 from ..Colormap import Colormap
+from .._utils.spatialindex import GridIndex
 
 
 _logger = logging.getLogger(__name__)
@@ -195,6 +196,10 @@ class Item(qt.QObject):
         visible = bool(visible)
         if visible != self._visible:
             self._visible = visible
+            # Hidden items are not part of the data range
+            plot = self.getPlot()
+            if plot is not None:
+                plot._invalidateDataRange(self)
             # When visibility has changed, always mark as dirty
             self._updated(ItemChangedType.VISIBLE,
                           checkVisibility=False)
@@ -598,6 +603,10 @@ class YAxisMixIn(object):
         assert yaxis in ('left', 'right')
         if yaxis != self._yaxis:
             self._yaxis = yaxis
+            # Handle data extent changed for DataRange
+            plot = self.getPlot()
+            if plot is not None:
+                plot._invalidateDataRange(self)
             self._updated(ItemChangedType.YAXIS)
 
 
@@ -684,6 +693,8 @@ class Points(Item, SymbolMixIn, AlphaMixIn):
         # key is (isXPositiveFilter, isYPositiveFilter)
         self._boundsCache = {}
 
+        self._spatialIndex = None  # GridIndex of the data, built on demand
+
     @staticmethod
     def _logFilterError(value, error):
         """Filter/convert error values if they go <= 0.
@@ -812,6 +823,18 @@ class Points(Item, SymbolMixIn, AlphaMixIn):
             )
         return self._boundsCache[(xPositive, yPositive)]
 
+    def _getSpatialIndex(self):
+        """Returns a spatial index of the data points.
+
+        It is built on first call and reset when the data changes.
+
+        :rtype: GridIndex
+        """
+        if self._spatialIndex is None:
+            self._spatialIndex = GridIndex(self.getXData(copy=False),
+                                           self.getYData(copy=False))
+        return self._spatialIndex
+
     def _getCachedData(self):
         """Return cached filtered data if applicable,
         i.e. if any axis is in log scale.
@@ -930,10 +953,10 @@ class Points(Item, SymbolMixIn, AlphaMixIn):
         self._boundsCache = {}  # Reset cached bounds
         self._filteredCache = {}  # Reset cached filtered data
         self._clippedCache = {}  # Reset cached clipped bool array
+        self._spatialIndex = None  # Reset spatial index
 
         # TODO hackish data range implementation
-        if self.isVisible():
-            plot = self.getPlot()
-            if plot is not None:
-                plot._invalidateDataRange()
+        plot = self.getPlot()
+        if plot is not None:
+            plot._invalidateDataRange(self)
         self._updated(ItemChangedType.DATA)
@@ -27,12 +27,17 @@
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "06/03/2017"
+__date__ = "18/10/2017"
 
 
+import collections
 import logging
 
+import numpy
+
+from silx.math.combo import min_max
 from .. import Colors
+from .._utils.decimation import MinMaxPyramid, isMonotonic
 from .core import (Points, LabelsMixIn, ColorMixIn, YAxisMixIn,
                    FillMixIn, LineMixIn, ItemChangedType)
 
@@ -58,6 +63,9 @@ class Curve(Points, ColorMixIn, YAxisMixIn, FillMixIn, LabelsMixIn, LineMixIn):
     _DEFAULT_HIGHLIGHT_COLOR = (0, 0, 0, 255)
     """Default highlight color of the item"""
 
+    _LOD_THRESHOLD = 2**17
+    """Number of points above which the curve is decimated for display"""
+
     def __init__(self):
         Points.__init__(self)
         ColorMixIn.__init__(self)
@@ -69,6 +77,108 @@ class Curve(Points, ColorMixIn, YAxisMixIn, FillMixIn, LabelsMixIn, LineMixIn):
         self._highlightColor = self._DEFAULT_HIGHLIGHT_COLOR
         self._highlighted = False
 
+        self._lodEnabled = False
+        self._lodCache = {}  # MinMaxPyramid per log filtering state
+        self._lodRendered = None  # (xMin, xMax, level) of displayed data
+        self._lodIndices = None  # Indices of the displayed data
+
+    def _setPlot(self, plot):
+        previousPlot = self.getPlot()
+        if previousPlot is not None:
+            previousPlot.getXAxis().sigLimitsChanged.disconnect(
+                self._xLimitsChanged)
+        super(Curve, self)._setPlot(plot)
+        if plot is not None:
+            plot.getXAxis().sigLimitsChanged.connect(self._xLimitsChanged)
+
+    def isLevelOfDetailEnabled(self):
+        """Returns True if large curves are decimated for display.
+
+        :rtype: bool
+        """
+        return self._lodEnabled
+
+    def setLevelOfDetailEnabled(self, enabled):
+        """Set whether or not to decimate large curves for display.
+
+        When enabled, curves with many points sorted along the x axis,
+        displayed with a line, without symbols nor error bars, are displayed
+        with the minimum and maximum of the points falling in each pixel
+        column.
+
+        Decimation is disabled by default: the displayed curve keeps all
+        the points, and it can be enabled for large curves sampled
+        densely enough for a line to show their envelope.
+
+        :param bool enabled: True to decimate large curves,
+            False to display all the points (default)
+        """
+        enabled = bool(enabled)
+        if enabled != self._lodEnabled:
+            self._lodEnabled = enabled
+            self._lodCache = {}
+            self._updated()
+
+    def _getLodKey(self):
+        """Returns the key of the decimation cache for the plot log state"""
+        plot = self.getPlot()
+        return (plot.getXAxis()._isLogarithmic(),
+                plot.getYAxis()._isLogarithmic())
+
+    def _getPyramid(self, x, y, xerror, yerror):
+        """Returns the :class:`MinMaxPyramid` of the displayed data or None
+        if the curve is not decimated."""
+        if (not self._lodEnabled or len(x) <= self._LOD_THRESHOLD or
+                xerror is not None or yerror is not None):
+            return None
+        if (self.getSymbol() not in (None, '', ' ') or
+                self.getLineStyle() in (None, '', ' ')):
+            # Only the line of the decimated points matches the curve
+            return None
+
+        key = self._getLodKey()
+        if key not in self._lodCache:
+            # Decimation needs x sorted in increasing order
+            self._lodCache[key] = MinMaxPyramid(x, y) if isMonotonic(x) else None
+        return self._lodCache[key]
+
+    def _getLodParameters(self):
+        """Returns the x range and the maximum number of points to render"""
+        plot = self.getPlot()
+        xMin, xMax = plot.getXAxis().getLimits()
+        width = xMax - xMin
+        maxPoints = 2 * max(1, plot.getPlotBoundsInPixels()[2])
+        # Render one plot width more on each side to avoid updates while panning
+        return xMin - width, xMax + width, maxPoints
+
+    def _xLimitsChanged(self, xMin, xMax):
+        """Handle x axis limits change to update the decimated data"""
+        if self._lodRendered is None or self._dirty:
+            return
+        pyramid = self._lodCache.get(self._getLodKey())
+        if pyramid is None:
+            return
+        renderedMin, renderedMax, level = self._lodRendered
+        xRangeMin, xRangeMax, maxPoints = self._getLodParameters()
+        if (xMin < renderedMin or xMax > renderedMax or
+                pyramid.getLevel(xRangeMin, xRangeMax, maxPoints) != level):
+            self._updated()
+
+    def _getPickedIndices(self, indices):
+        """Convert indices of picked points of the backend renderer to
+        indices in the data of the curve.
+
+        :param indices: Indices in the rendered data
+        :rtype: numpy.ndarray
+        """
+        indices = numpy.asarray(indices, dtype=numpy.int64)
+        if isinstance(self._lodIndices, slice):
+            return indices + self._lodIndices.start
+        elif self._lodIndices is not None:
+            return numpy.unique(self._lodIndices[indices])
+        else:
+            return indices
+
     def _addBackendRenderer(self, backend):
         """Update backend renderer"""
         # Filter-out values <= 0
@@ -78,6 +188,18 @@ class Curve(Points, ColorMixIn, YAxisMixIn, FillMixIn, LabelsMixIn, LineMixIn):
         if len(xFiltered) == 0:
             return None  # No data to display, do not add renderer to backend
 
+        self._lodRendered = None
+        self._lodIndices = None
+        pyramid = self._getPyramid(xFiltered, yFiltered, xerror, yerror)
+        if pyramid is not None:
+            xMin, xMax, maxPoints = self._getLodParameters()
+            level, indices = pyramid.getIndices(xMin, xMax, maxPoints)
+            self._lodRendered = xMin, xMax, level
+            self._lodIndices = indices
+            xFiltered, yFiltered = xFiltered[indices], yFiltered[indices]
+            if len(xFiltered) == 0:
+                return None
+
         return backend.addCurve(xFiltered, yFiltered, self.getLegend(),
                                 color=self.getCurrentColor(),
                                 symbol=self.getSymbol(),
@@ -125,19 +247,11 @@ class Curve(Points, ColorMixIn, YAxisMixIn, FillMixIn, LabelsMixIn, LineMixIn):
         else:
             raise IndexError("Index out of range: %s", str(item))
 
-    def setVisible(self, visible):
-        """Set visibility of item.
+    def setData(self, x, y, xerror=None, yerror=None, copy=True):
+        self._lodCache = {}  # Reset decimation
+        super(Curve, self).setData(x, y, xerror, yerror, copy)
 
-        :param bool visible: True to display it, False otherwise
-        """
-        visible = bool(visible)
-        # TODO hackish data range implementation
-        if self.isVisible() != visible:
-            plot = self.getPlot()
-            if plot is not None:
-                plot._invalidateDataRange()
-
-        super(Curve, self).setVisible(visible)
+    setData.__doc__ = Points.setData.__doc__
 
     def isHighlighted(self):
         """Returns True if curve is highlighted.
@@ -188,3 +302,340 @@ class Curve(Points, ColorMixIn, YAxisMixIn, FillMixIn, LabelsMixIn, LineMixIn):
             return self.getHighlightedColor()
         else:
             return self.getColor()
+
+
+class StreamingCurve(Curve):
+    """Curve with data appended by chunks, e.g., for live monitoring.
+
+    Data is stored in preallocated buffers, so that :meth:`append` only
+    copies the new points.
+    If a maximum length is provided, only the last points are kept
+    (i.e., a scrolling window) and data is stored in a ring buffer.
+
+    :param int maxLength: Maximum number of points to keep or
+                          None (default) to keep all points.
+    """
+
+    _INITIAL_CAPACITY = 1024
+    """Initial number of points of the buffers"""
+
+    def __init__(self, maxLength=None):
+        Curve.__init__(self)
+
+        if maxLength is not None:
+            maxLength = int(maxLength)
+            assert maxLength > 0
+        self._maxLength = maxLength
+
+        self._xBuffer = None
+        self._yBuffer = None
+        self._count = 0  # Total number of points appended to the buffers
+        self._streamBounds = None
+        """(xmin, xmax, ymin, ymax) bounds of finite values or None,
+        with None values for an axis without finite values"""
+
+        # Bounds of blocks of points of the ring buffer, to update the bounds
+        # without going through all the points when the first ones are removed
+        self._blockSize = None if maxLength is None else \
+            max(1, int(numpy.sqrt(maxLength)))
+        self._blockBounds = collections.deque()  # (first point, bounds)
+
+        self._appended = None
+        """(removed, appended) number of points since last update of the
+        backend or None if the curve must be added again to the backend"""
+
+    def getMaxLength(self):
+        """Returns the maximum number of points kept by the curve.
+
+        :return: The maximum length or None if all points are kept
+        :rtype: int or None
+        """
+        return self._maxLength
+
+    def _updated(self, event=None, checkVisibility=True):
+        # Any change requires to add the curve again to the backend,
+        # except appended data (see append)
+        self._appended = None
+        super(StreamingCurve, self)._updated(event, checkVisibility)
+
+    def _update(self, backend):
+        appended, self._appended = self._appended, None
+        plot = self.getPlot()
+        if (self._dirty and appended is not None and self.isVisible() and
+                self._backendRenderer is not None and
+                not self.isLevelOfDetailEnabled() and
+                plot is not None and
+                not plot.getXAxis()._isLogarithmic() and
+                not plot.getYAxis()._isLogarithmic()):
+            removed, appended = appended
+            x, y = self.getXData(copy=False), self.getYData(copy=False)
+            start = max(0, len(x) - appended)
+            if backend.updateCurveData(self._backendRenderer,
+                                       x[start:], y[start:], removed,
+                                       self._getStreamBounds()):
+                self._dirty = False
+                return
+        super(StreamingCurve, self)._update(backend)
+
+    def _getLength(self):
+        """Returns the number of points currently kept in the buffers"""
+        if self._maxLength is None:
+            return self._count
+        else:
+            return min(self._count, self._maxLength)
+
+    def _getViews(self):
+        """Returns views of the buffers on the points of the curve"""
+        length = self._getLength()
+        if self._maxLength is None:
+            start = 0
+        else:
+            start = (self._count - length) % self._maxLength
+        return (self._xBuffer[start:start + length],
+                self._yBuffer[start:start + length])
+
+    def _write(self, x, y):
+        """Write points at the end of the buffers.
+
+        Buffers are converted to a type which can hold both the previous
+        and the new points if needed.
+
+        :param numpy.ndarray x: 1D array of x coordinates to append
+        :param numpy.ndarray y: 1D array of y coordinates to append
+        """
+        if self._xBuffer is None:
+            capacity = self._INITIAL_CAPACITY if self._maxLength is None \
+                else 2 * self._maxLength
+            self._xBuffer = numpy.empty(capacity, dtype=x.dtype)
+            self._yBuffer = numpy.empty(capacity, dtype=y.dtype)
+        else:
+            for name, data in (('_xBuffer', x), ('_yBuffer', y)):
+                previous = getattr(self, name)
+                dtype = numpy.result_type(previous.dtype, data.dtype)
+                if dtype != previous.dtype:  # Do not downcast new points
+                    setattr(self, name, previous.astype(dtype))
+
+        if self._maxLength is None:
+            length = self._count + len(x)
+            if length > len(self._xBuffer):  # Grow buffers
+                capacity = max(2 * len(self._xBuffer), length)
+                for name in ('_xBuffer', '_yBuffer'):
+                    previous = getattr(self, name)
+                    buffer_ = numpy.empty(capacity, dtype=previous.dtype)
+                    buffer_[:self._count] = previous[:self._count]
+                    setattr(self, name, buffer_)
+            self._xBuffer[self._count:length] = x
+            self._yBuffer[self._count:length] = y
+
+        else:
+            # Ring buffer with each point written twice,
+            # so that the points of the curve are contiguous
+            x, y = x[-self._maxLength:], y[-self._maxLength:]
+            indices = (self._count + numpy.arange(len(x))) % self._maxLength
+            for buffer_, data in ((self._xBuffer, x), (self._yBuffer, y)):
+                buffer_[indices] = data
+                buffer_[indices + self._maxLength] = data
+
+        self._count += len(x)
+
+    @staticmethod
+    def _getChunkBounds(x, y):
+        """Returns the (xmin, xmax, ymin, ymax) bounds of finite values,
+        with None for an axis without finite values"""
+        xResult = min_max(x, finite=True)
+        yResult = min_max(y, finite=True)
+        return (xResult.minimum, xResult.maximum,
+                yResult.minimum, yResult.maximum)
+
+    @staticmethod
+    def _mergeBounds(bounds1, bounds2):
+        """Returns the bounds containing both bounds, which can be None"""
+        if bounds1 is None:
+            return bounds2
+        if bounds2 is None:
+            return bounds1
+        result = []
+        for index in (0, 2):
+            if bounds1[index] is None:
+                result += bounds2[index:index + 2]
+            elif bounds2[index] is None:
+                result += bounds1[index:index + 2]
+            else:
+                result += [min(bounds1[index], bounds2[index]),
+                           max(bounds1[index + 1], bounds2[index + 1])]
+        return tuple(result)
+
+    @staticmethod
+    def _isOnBounds(bounds, totalBounds):
+        """Returns True if bounds reach the limits of totalBounds"""
+        if bounds is None or totalBounds is None:
+            return False
+        for index in (0, 2):
+            if bounds[index] is not None and (
+                    bounds[index] <= totalBounds[index] or
+                    bounds[index + 1] >= totalBounds[index + 1]):
+                return True
+        return False
+
+    def _getStreamBounds(self):
+        """Returns the (xmin, xmax, ymin, ymax) bounds of finite values
+        or None if there is no finite values"""
+        bounds = self._streamBounds
+        if bounds is None or bounds[0] is None or bounds[2] is None:
+            return None
+        return bounds
+
+    def _updateBlockBounds(self, previousCount):
+        """Update the bounds of the blocks of the ring buffer and of the
+        curve once points were written.
+
+        Only blocks with removed or new points are read, and the bounds of
+        the curve are merged from the bounds of the blocks when a removed
+        point was on the bounds.
+
+        :param int previousCount: :attr:`_count` before writing the points
+        """
+        size = self._blockSize
+        last = self._count
+        first = last - self._getLength()
+        xView, yView = self._getViews()
+        blocks = self._blockBounds
+
+        def getBounds(start, end):
+            return self._getChunkBounds(xView[start - first:end - first],
+                                        yView[start - first:end - first])
+
+        bounds = self._streamBounds
+        merge = False
+        # Remove blocks of removed points
+        while blocks and blocks[0][0] + size <= first:
+            merge = merge or self._isOnBounds(blocks[0][1], bounds)
+            blocks.popleft()
+        if blocks and blocks[0][0] < first:  # Partly removed block
+            start, blockBounds = blocks[0]
+            merge = merge or self._isOnBounds(blockBounds, bounds)
+            blocks[0] = start, getBounds(first, min(start + size, last))
+
+        # Add the new points to the last block and to new blocks
+        start = max(previousCount, first)
+        if blocks and blocks[-1][0] + size > start:
+            blockStart, blockBounds = blocks[-1]
+            end = min(blockStart + size, last)
+            chunkBounds = getBounds(start, end)
+            blocks[-1] = blockStart, self._mergeBounds(blockBounds, chunkBounds)
+            bounds = self._mergeBounds(bounds, chunkBounds)
+            start = end
+        blockStart = start - start % size
+        while start < last:
+            end = min(blockStart + size, last)
+            chunkBounds = getBounds(start, end)
+            blocks.append((blockStart, chunkBounds))
+            bounds = self._mergeBounds(bounds, chunkBounds)
+            blockStart, start = blockStart + size, end
+
+        if merge:
+            bounds = None
+            for _, blockBounds in blocks:
+                bounds = self._mergeBounds(bounds, blockBounds)
+        self._streamBounds = bounds
+
+    def _getBounds(self):
+        plot = self.getPlot()
+        if plot is not None and (plot.getXAxis()._isLogarithmic() or
+                                 plot.getYAxis()._isLogarithmic()):
+            return super(StreamingCurve, self)._getBounds()
+        return self._getStreamBounds()
+
+    def setData(self, x, y, xerror=None, yerror=None, copy=True):
+        """Set the data of the curve, replacing all the previous points.
+
+        Errors are not supported.
+
+        :param numpy.ndarray x: The data corresponding to the x coordinates.
+        :param numpy.ndarray y: The data corresponding to the y coordinates.
+        :param xerror: Not supported, must be None
+        :param yerror: Not supported, must be None
+        :param bool copy: Not used, data is always copied to the buffers
+        """
+        assert xerror is None and yerror is None
+        x = numpy.array(x, copy=False)
+        y = numpy.array(y, copy=False)
+        assert len(x) == len(y)
+        assert x.ndim == y.ndim == 1
+
+        self._xBuffer, self._yBuffer = None, None
+        self._count = 0
+        self._streamBounds = None
+        self._blockBounds.clear()
+        if len(x) > 0:
+            self._write(x, y)
+            xView, yView = self._getViews()
+            if self._maxLength is None:
+                self._streamBounds = self._getChunkBounds(xView, yView)
+            else:
+                self._updateBlockBounds(0)
+        else:
+            xView, yView = x, y
+        super(StreamingCurve, self).setData(xView, yView, copy=False)
+
+    def append(self, x, y):
+        """Append points at the end of the curve.
+
+        If the curve has a maximum length, the first points are removed
+        to keep only the last points.
+
+        :param numpy.ndarray x: 1D array of the x coordinates of new points
+        :param numpy.ndarray y: 1D array of the y coordinates of new points
+        """
+        x = numpy.array(x, copy=False)
+        y = numpy.array(y, copy=False)
+        assert len(x) == len(y)
+        assert x.ndim == y.ndim == 1
+        if len(x) == 0:
+            return
+        if self._xBuffer is None:  # No data yet
+            self.setData(x, y)
+            return
+
+        previousLength = self._getLength()
+        previousCount = self._count
+        if self._maxLength is None:
+            removed = 0
+        else:
+            removed = min(previousLength,
+                          max(0, previousLength + len(x) - self._maxLength))
+
+        dtypes = self._xBuffer.dtype, self._yBuffer.dtype
+        self._write(x, y)
+        xView, yView = self._getViews()
+        appended = len(xView) - (previousLength - removed)
+        dtypeChanged = dtypes != (self._xBuffer.dtype, self._yBuffer.dtype)
+
+        if self._maxLength is None:  # Only check new points
+            self._streamBounds = self._mergeBounds(
+                self._streamBounds, self._getChunkBounds(x, y))
+        else:
+            self._updateBlockBounds(previousCount)
+
+        self._x, self._y = xView, yView
+        self._boundsCache = {}  # Reset cached bounds
+        self._filteredCache = {}  # Reset cached filtered data
+        self._clippedCache = {}  # Reset cached clipped bool array
+        self._spatialIndex = None  # Reset spatial index
+        self._lodCache = {}  # Reset decimation
+
+        plot = self.getPlot()
+        if plot is not None:
+            plot._invalidateDataRange(self)
+
+        if dtypeChanged:  # The curve must be added again
+            pending = None
+        elif not self._dirty:
+            pending = removed, appended
+        elif self._appended is not None:
+            pending = (self._appended[0] + removed,
+                       self._appended[1] + appended)
+        else:  # The curve is already going to be added again
+            pending = None
+        self._updated(ItemChangedType.DATA)
+        self._appended = pending
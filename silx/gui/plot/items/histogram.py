@@ -27,7 +27,7 @@
 
 __authors__ = ["H. Payno", "T. Vincent"]
 __license__ = "MIT"
-__date__ = "27/06/2017"
+__date__ = "18/10/2017"
 
 
 import logging
@@ -211,19 +211,6 @@ class Histogram(Item, AlphaMixIn, ColorMixIn, FillMixIn,
                     min(0, numpy.nanmin(values)),
                     max(0, numpy.nanmax(values)))
 
-    def setVisible(self, visible):
-        """Set visibility of item.
-
-        :param bool visible: True to display it, False otherwise
-        """
-        visible = bool(visible)
-        # TODO hackish data range implementation
-        if self.isVisible() != visible:
-            plot = self.getPlot()
-            if plot is not None:
-                plot._invalidateDataRange()
-        super(Histogram, self).setVisible(visible)
-
     def getValueData(self, copy=True):
         """The values of the histogram
 
@@ -291,4 +278,9 @@ class Histogram(Item, AlphaMixIn, ColorMixIn, FillMixIn,
             self._histogram = histogram
             self._edges = edges
 
+        # TODO hackish data range implementation
+        plot = self.getPlot()
+        if plot is not None:
+            plot._invalidateDataRange(self)
+
         self._updated(ItemChangedType.DATA)
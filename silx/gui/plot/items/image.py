@@ -28,7 +28,7 @@ of the :class:`Plot`.
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "27/06/2017"
+__date__ = "18/10/2017"
 
 
 from collections import Sequence
@@ -40,6 +40,14 @@ from .core import (Item, LabelsMixIn, DraggableMixIn, ColormapMixIn,
                    AlphaMixIn, ItemChangedType)
 from ..Colors import applyColormapToData
 
+try:
+    import h5py
+except ImportError:
+    def is_dataset(obj):
+        return False
+else:
+    from ....io.utils import is_dataset
+
 
 _logger = logging.getLogger(__name__)
 
@@ -126,19 +134,6 @@ class ImageBase(Item, LabelsMixIn, DraggableMixIn, AlphaMixIn):
         else:
             raise IndexError("Index out of range: %s" % str(item))
 
-    def setVisible(self, visible):
-        """Set visibility of item.
-
-        :param bool visible: True to display it, False otherwise
-        """
-        visible = bool(visible)
-        # TODO hackish data range implementation
-        if self.isVisible() != visible:
-            plot = self.getPlot()
-            if plot is not None:
-                plot._invalidateDataRange()
-        super(ImageBase, self).setVisible(visible)
-
     def _isPlotLinear(self, plot):
         """Return True if plot only uses linear scale for both of x and y
         axes."""
@@ -208,10 +203,9 @@ class ImageBase(Item, LabelsMixIn, DraggableMixIn, AlphaMixIn):
             self._origin = origin
 
             # TODO hackish data range implementation
-            if self.isVisible():
-                plot = self.getPlot()
-                if plot is not None:
-                    plot._invalidateDataRange()
+            plot = self.getPlot()
+            if plot is not None:
+                plot._invalidateDataRange(self)
 
             self._updated(ItemChangedType.POSITION)
 
@@ -237,10 +231,9 @@ class ImageBase(Item, LabelsMixIn, DraggableMixIn, AlphaMixIn):
             self._scale = scale
 
             # TODO hackish data range implementation
-            if self.isVisible():
-                plot = self.getPlot()
-                if plot is not None:
-                    plot._invalidateDataRange()
+            plot = self.getPlot()
+            if plot is not None:
+                plot._invalidateDataRange(self)
 
             self._updated(ItemChangedType.SCALE)
 
@@ -253,6 +246,44 @@ class ImageData(ImageBase, ColormapMixIn):
         ColormapMixIn.__init__(self)
         self._data = numpy.zeros((0, 0), dtype=numpy.float32)
         self._alternativeImage = None
+        self._dataRegions = None
+        """Regions of the data updated since last update of the backend or
+        None if the image must be added again to the backend"""
+
+    def _updated(self, event=None, checkVisibility=True):
+        # Any change requires to add the image again to the backend,
+        # except data updates (see _dataRegionUpdated)
+        self._dataRegions = None
+        super(ImageData, self)._updated(event, checkVisibility)
+
+    def _dataRegionUpdated(self, region):
+        """Mark a region of the data as updated.
+
+        If only the data was updated since the last update of the backend,
+        the backend image is updated in place.
+
+        :param region: (row, column, height, width) of the updated region
+        """
+        if not self._dirty:
+            regions = [region]
+        elif self._dataRegions is not None:
+            regions = self._dataRegions + [region]
+        else:  # The image is already going to be added again
+            regions = None
+        self._updated(ItemChangedType.DATA)
+        self._dataRegions = regions
+
+    def _update(self, backend):
+        regions, self._dataRegions = self._dataRegions, None
+        if (self._dirty and regions is not None and self.isVisible() and
+                self._backendRenderer is not None and
+                backend.updateImageData(self._backendRenderer,
+                                        self.getData(copy=False),
+                                        self.getColormap(),
+                                        regions)):
+            self._dirty = False
+        else:
+            super(ImageData, self)._update(backend)
 
     def _addBackendRenderer(self, backend):
         """Update backend renderer"""
@@ -291,6 +322,19 @@ class ImageData(ImageBase, ColormapMixIn):
 
         return params
 
+    def getData(self, copy=True):
+        """Returns the image data
+
+        :param bool copy: True (Default) to get a copy,
+                          False to use internal representation (do not modify!)
+        :returns: The data, or the h5py-like dataset it was set with if
+            copy is False
+        :rtype: numpy.ndarray
+        """
+        if copy or isinstance(self._data, numpy.ndarray):
+            return numpy.array(self._data, copy=copy)
+        return self._data
+
     def getRgbaImageData(self, copy=True):
         """Get the displayed RGB(A) image
 
@@ -302,8 +346,9 @@ class ImageData(ImageBase, ColormapMixIn):
         else:
             # Apply colormap, in this case an new array is always returned
             colormap = self.getColormap()
-            image = applyColormapToData(self.getData(copy=False),
-                                        **colormap)
+            image = applyColormapToData(
+                numpy.array(self.getData(copy=False), copy=False),
+                **colormap)
             return image
 
     def getAlternativeImageData(self, copy=True):
@@ -322,6 +367,9 @@ class ImageData(ImageBase, ColormapMixIn):
     def setData(self, data, alternative=None, copy=True):
         """"Set the image data and optionally an alternative RGB(A) representation
 
+        With copy=False, a h5py-like dataset is kept as is and it is only
+        read when displayed, if the backend supports it.
+
         :param numpy.ndarray data: Data array with 2 dimensions (h, w)
         :param alternative: RGB(A) image to display instead of data,
                             shape: (h, w, 3 or 4)
@@ -329,8 +377,10 @@ class ImageData(ImageBase, ColormapMixIn):
         :param bool copy: True (Default) to get a copy,
                           False to use internal representation (do not modify!)
         """
-        data = numpy.array(data, copy=copy)
-        assert data.ndim == 2
+        if (copy or not is_dataset(data) or
+                data.dtype.kind not in 'iuf' or len(data.shape) != 2):
+            data = numpy.array(data, copy=copy)
+        assert len(data.shape) == 2
         if data.dtype.kind == 'b':
             _logger.warning(
                 'Converting boolean image to int8 to plot it.')
@@ -339,6 +389,7 @@ class ImageData(ImageBase, ColormapMixIn):
             _logger.warning(
                 'Converting complex image to absolute value to plot it.')
             data = numpy.absolute(data)
+        previousData = self._data
         self._data = data
 
         if alternative is not None:
@@ -346,16 +397,51 @@ class ImageData(ImageBase, ColormapMixIn):
             assert alternative.ndim == 3
             assert alternative.shape[2] in (3, 4)
             assert alternative.shape[:2] == data.shape[:2]
+        previousAlternative = self._alternativeImage
         self._alternativeImage = alternative
 
+        if (alternative is None and previousAlternative is None and
+                isinstance(data, numpy.ndarray) and
+                isinstance(previousData, numpy.ndarray) and
+                data.shape == previousData.shape and
+                data.dtype == previousData.dtype):
+            # Same kind of data: the backend can update the image in place
+            self._dataRegionUpdated((0, 0) + data.shape)
+            return
+
         # TODO hackish data range implementation
-        if self.isVisible():
-            plot = self.getPlot()
-            if plot is not None:
-                plot._invalidateDataRange()
+        plot = self.getPlot()
+        if plot is not None:
+            plot._invalidateDataRange(self)
 
         self._updated(ItemChangedType.DATA)
 
+    def updateRegion(self, row, column, block):
+        """Update a rectangular region of the image data.
+
+        The image data is modified in place, so with
+        :meth:`setData` ``copy=False``, the provided array is modified.
+        Only the updated region is sent to the backend when supported.
+
+        :param int row: Row of the top-left corner of the region
+        :param int column: Column of the top-left corner of the region
+        :param numpy.ndarray block: 2D array of the new values of the region
+        """
+        assert isinstance(self._data, numpy.ndarray)
+        block = numpy.array(block, copy=False)
+        assert block.ndim == 2
+        height, width = block.shape
+        assert 0 <= row and row + height <= self._data.shape[0]
+        assert 0 <= column and column + width <= self._data.shape[1]
+
+        self._data[row:row + height, column:column + width] = block
+
+        if self._alternativeImage is not None:
+            # The displayed alternative image is not changed
+            self.sigItemChanged.emit(ItemChangedType.DATA)
+        else:
+            self._dataRegionUpdated((row, column, height, width))
+
 
 class ImageRgba(ImageBase):
     """Description of an RGB(A) image"""
@@ -406,10 +492,9 @@ class ImageRgba(ImageBase):
         self._data = data
 
         # TODO hackish data range implementation
-        if self.isVisible():
-            plot = self.getPlot()
-            if plot is not None:
-                plot._invalidateDataRange()
+        plot = self.getPlot()
+        if plot is not None:
+            plot._invalidateDataRange(self)
 
         self._updated(ItemChangedType.DATA)
 
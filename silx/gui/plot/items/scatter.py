@@ -27,7 +27,7 @@
 
 __authors__ = ["T. Vincent", "P. Knobel"]
 __license__ = "MIT"
-__date__ = "29/03/2017"
+__date__ = "18/10/2017"
 
 
 import logging
@@ -50,6 +50,34 @@ class Scatter(Points, ColormapMixIn):
         ColormapMixIn.__init__(self)
         self._value = ()
 
+        self._colormapUpdated = False
+        """True if only the colormap was updated since last update of the
+        backend, False if the scatter must be added again to the backend"""
+
+    def _updated(self, event=None, checkVisibility=True):
+        # Any change requires to add the scatter again to the backend,
+        # except colormap updates (see _colormapChanged)
+        self._colormapUpdated = False
+        super(Scatter, self)._updated(event, checkVisibility)
+
+    def _colormapChanged(self):
+        """Handle updates of the colormap"""
+        colormapUpdated = not self._dirty or self._colormapUpdated
+        super(Scatter, self)._colormapChanged()
+        self._colormapUpdated = colormapUpdated
+
+    def _update(self, backend):
+        colormapUpdated, self._colormapUpdated = self._colormapUpdated, False
+        if (self._dirty and colormapUpdated and self.isVisible() and
+                self._backendRenderer is not None and
+                backend.updateScatterColormap(
+                    self._backendRenderer,
+                    self.getData(copy=False, displayed=True)[2],
+                    self.getColormap())):
+            self._dirty = False
+        else:
+            super(Scatter, self)._update(backend)
+
     def _addBackendRenderer(self, backend):
         """Update backend renderer"""
         # Filter-out values <= 0
@@ -59,22 +87,16 @@ class Scatter(Points, ColormapMixIn):
         if len(xFiltered) == 0:
             return None  # No data to display, do not add renderer to backend
 
-        cmap = self.getColormap()
-        rgbacolors = cmap.applyToData(self._value)
-
-        return backend.addCurve(xFiltered, yFiltered, self.getLegend(),
-                                color=rgbacolors,
-                                symbol=self.getSymbol(),
-                                linewidth=0,
-                                linestyle="",
-                                yaxis='left',
-                                xerror=xerror,
-                                yerror=yerror,
-                                z=self.getZValue(),
-                                selectable=self.isSelectable(),
-                                fill=False,
-                                alpha=self.getAlpha(),
-                                symbolsize=self.getSymbolSize())
+        return backend.addScatter(xFiltered, yFiltered, valueFiltered,
+                                  self.getLegend(),
+                                  colormap=self.getColormap(),
+                                  symbol=self.getSymbol(),
+                                  xerror=xerror,
+                                  yerror=yerror,
+                                  z=self.getZValue(),
+                                  selectable=self.isSelectable(),
+                                  alpha=self.getAlpha(),
+                                  symbolsize=self.getSymbolSize())
 
     def _logFilterData(self, xPositive, yPositive):
         """Filter out values with x or y <= 0 on log axes
@@ -24,7 +24,7 @@
 # ###########################################################################*/
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "04/08/2017"
+__date__ = "18/10/2017"
 
 
 import unittest
@@ -51,6 +51,8 @@ from . import testItem
 from . import testUtilsAxis
 from . import testLimitConstraints
 from . import testComplexImageView
+from . import testOffscreenPlot
+from . import testImagePyramid
 
 
 def suite():
@@ -77,5 +79,7 @@ def suite():
          testItem.suite(),
          testUtilsAxis.suite(),
          testLimitConstraints.suite(),
-         testComplexImageView.suite()])
+         testComplexImageView.suite(),
+         testOffscreenPlot.suite(),
+         testImagePyramid.suite()])
     return test_suite
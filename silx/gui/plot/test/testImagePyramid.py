@@ -0,0 +1,126 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2016 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""Tests for ImagePyramid of the OpenGL backend"""
+
+__authors__ = ["T. Vincent"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+import unittest
+
+import numpy
+
+try:
+    from silx.gui.plot.backends.glutils.GLTexture import ImagePyramid
+except ImportError:
+    ImagePyramid = None
+
+
+@unittest.skipIf(ImagePyramid is None, "PyOpenGL is required")
+class TestImagePyramid(unittest.TestCase):
+    """Tests of ImagePyramid which do not require an OpenGL context"""
+
+    def setUp(self):
+        self.data = numpy.arange(100 * 250, dtype=numpy.float32)
+        self.data.shape = 100, 250
+        self.pyramid = ImagePyramid(None, self.data, tileSize=64)
+
+    def tearDown(self):
+        self.pyramid = None
+        self.data = None
+
+    def testGetLevelCount(self):
+        """Test getLevelCount"""
+        # 250 -> 125 -> 63
+        self.assertEqual(self.pyramid.getLevelCount(), 3)
+        self.assertEqual(ImagePyramid(None, self.data).getLevelCount(), 1)
+
+    def testGetLevel(self):
+        """Test getLevel"""
+        self.assertEqual(self.pyramid.getLevel(0.5), 0)
+        self.assertEqual(self.pyramid.getLevel(1.), 0)
+        self.assertEqual(self.pyramid.getLevel(1.9), 0)
+        self.assertEqual(self.pyramid.getLevel(2.), 1)
+        self.assertEqual(self.pyramid.getLevel(3.9), 1)
+        # Clipped to the last level
+        self.assertEqual(self.pyramid.getLevel(100.), 2)
+
+    def testGetVisibleTiles(self):
+        """Test getVisibleTiles"""
+        # 2x4 tiles at level 0
+        self.assertEqual(self.pyramid.getVisibleTiles(0, (0, 250, 0, 100)),
+                         [(0, 0), (0, 1), (0, 2), (0, 3),
+                          (1, 0), (1, 1), (1, 2), (1, 3)])
+        self.assertEqual(self.pyramid.getVisibleTiles(0, (70, 130, 10, 20)),
+                         [(0, 1), (0, 2)])
+        # Clipped to the image
+        self.assertEqual(self.pyramid.getVisibleTiles(0, (-100, 10, 90, 200)),
+                         [(1, 0)])
+        self.assertEqual(self.pyramid.getVisibleTiles(0, (300, 400, 0, 100)),
+                         [])
+        # 1x2 tiles at level 1
+        self.assertEqual(self.pyramid.getVisibleTiles(1, (0, 250, 0, 100)),
+                         [(0, 0), (0, 1)])
+        self.assertEqual(self.pyramid.getVisibleTiles(2, (0, 250, 0, 100)),
+                         [(0, 0)])
+
+    def testReadLevel(self):
+        """Test readLevel slicing"""
+        level0 = self.pyramid.readLevel(0)
+        self.assertTrue(numpy.array_equal(level0, self.data))
+
+        level1 = self.pyramid.readLevel(1)
+        self.assertEqual(level1.shape, (50, 125))
+        self.assertTrue(numpy.array_equal(level1, self.data[::2, ::2]))
+
+        level2 = self.pyramid.readLevel(2)
+        self.assertEqual(level2.shape, (25, 63))
+        self.assertTrue(numpy.array_equal(level2, self.data[::4, ::4]))
+
+        # A tile of level 1, rows and columns are in the level
+        tile = self.pyramid.readLevel(1, slice(10, 20), slice(64, 128))
+        self.assertEqual(tile.shape, (10, 61))
+        self.assertTrue(numpy.array_equal(tile, self.data[20:40:2, 128::2]))
+        self.assertTrue(tile.flags['C_CONTIGUOUS'])
+
+    def testReadLevelDtype(self):
+        """Test readLevel conversion of the data type"""
+        pyramid = ImagePyramid(None, self.data.astype(numpy.int32),
+                               dtype=numpy.float32)
+        level1 = pyramid.readLevel(1)
+        self.assertEqual(level1.dtype, numpy.float32)
+        self.assertTrue(numpy.array_equal(level1, self.data[::2, ::2]))
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestImagePyramid))
+    return test_suite
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -26,15 +26,20 @@
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "01/09/2017"
+__date__ = "18/10/2017"
 
 
 import unittest
 
 import numpy
 
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
 from silx.gui.test.utils import SignalListener
-from silx.gui.plot.items import ItemChangedType
+from silx.gui.plot.items import ItemChangedType, StreamingCurve
 from .utils import PlotWidgetTestCase
 
 
@@ -220,10 +225,294 @@ class TestSigItemChangedSignal(PlotWidgetTestCase):
                           (ItemChangedType.DATA,)])
 
 
+class TestCurveLevelOfDetail(PlotWidgetTestCase):
+    """Test decimation of large curves"""
+
+    def setUp(self):
+        super(TestCurveLevelOfDetail, self).setUp()
+        self.x = numpy.arange(2**18, dtype=numpy.float64)
+        self.y = numpy.random.random(2**18)
+        self.plot.addCurve(self.x, self.y, legend='test')
+        self.curve = self.plot.getCurve('test')
+        self.curve.setLevelOfDetailEnabled(True)
+        self.plot.replot()
+
+    def tearDown(self):
+        del self.curve
+        super(TestCurveLevelOfDetail, self).tearDown()
+
+    def testDefault(self):
+        """Test that decimation is disabled by default"""
+        self.plot.addCurve(self.x, self.y, legend='other')
+        self.plot.replot()
+        curve = self.plot.getCurve('other')
+        self.assertFalse(curve.isLevelOfDetailEnabled())
+        self.assertIsNone(curve._lodIndices)
+
+    def testDecimated(self):
+        """Test that a large curve is decimated and follows zoom"""
+        self.assertTrue(self.curve.isLevelOfDetailEnabled())
+        indices = self.curve._lodIndices
+        self.assertIsNotNone(indices)
+        self.assertLess(len(indices), len(self.x))
+
+        # Zoom in: only a slice of the data is rendered
+        self.plot.getXAxis().setLimits(1000, 1100)
+        self.plot.replot()
+        self.assertTrue(isinstance(self.curve._lodIndices, slice))
+
+        # Picked indices are in the data of the curve
+        picked = self.curve._getPickedIndices([0, 1])
+        self.assertEqual(list(picked),
+                         [self.curve._lodIndices.start,
+                          self.curve._lodIndices.start + 1])
+
+    def testDisabled(self):
+        """Test disabling decimation"""
+        self.curve.setLevelOfDetailEnabled(False)
+        self.plot.replot()
+        self.assertIsNone(self.curve._lodIndices)
+
+    def testSymbols(self):
+        """Test that curves with symbols or without line are not decimated"""
+        self.curve.setSymbol('o')
+        self.plot.replot()
+        self.assertIsNone(self.curve._lodIndices)
+
+        self.curve.setSymbol('')
+        self.curve.setLineStyle(' ')
+        self.plot.replot()
+        self.assertIsNone(self.curve._lodIndices)
+
+    def testErrorBars(self):
+        """Test that curves with error bars are not decimated"""
+        self.curve.setData(self.x, self.y, yerror=0.1)
+        self.plot.replot()
+        self.assertIsNone(self.curve._lodIndices)
+
+
+class TestImageDataUpdate(PlotWidgetTestCase):
+    """Test in place update of ImageData"""
+
+    def setUp(self):
+        super(TestImageDataUpdate, self).setUp()
+        self.plot.addImage(numpy.zeros((10, 20), dtype=numpy.float32),
+                           legend='test')
+        self.plot.replot()
+        self.image = self.plot.getImage('test')
+
+    def tearDown(self):
+        del self.image
+        super(TestImageDataUpdate, self).tearDown()
+
+    def testUpdateRegion(self):
+        """Test ImageData.updateRegion"""
+        listener = SignalListener()
+        self.image.sigItemChanged.connect(listener)
+
+        self.image.updateRegion(2, 3, numpy.ones((4, 5)))
+        self.plot.replot()
+
+        data = self.image.getData(copy=False)
+        self.assertEqual(data.sum(), 20)
+        self.assertTrue(numpy.all(data[2:6, 3:8] == 1))
+        self.assertEqual(listener.arguments(argumentIndex=0),
+                         [ItemChangedType.DATA])
+
+    def testSetDataSameShape(self):
+        """Test setData with data of the same shape and type"""
+        self.image.updateRegion(0, 0, numpy.ones((2, 2)))
+        self.image.setData(numpy.ones((10, 20), dtype=numpy.float32))
+        self.assertEqual(self.image._dataRegions, [(0, 0, 2, 2), (0, 0, 10, 20)])
+        self.plot.replot()
+        self.assertIsNone(self.image._dataRegions)
+        self.assertEqual(self.image.getData(copy=False).sum(), 200)
+
+        # Other changes require to add the image again
+        self.image.setData(numpy.zeros((10, 20), dtype=numpy.float32))
+        self.image.setOrigin((1, 1))
+        self.assertIsNone(self.image._dataRegions)
+
+    @unittest.skipIf(h5py is None, "h5py is required")
+    def testSetDataset(self):
+        """Test setData with a h5py-like dataset"""
+        from silx.io import commonh5
+        data = numpy.arange(200, dtype=numpy.float32).reshape(10, 20)
+        dataset = commonh5.Dataset('data', data)
+
+        self.image.setData(dataset, copy=False)
+        self.assertIs(self.image.getData(copy=False), dataset)
+        self.assertTrue(numpy.array_equal(self.image.getData(), data))
+        self.assertIsNone(self.image._dataRegions)
+        self.plot.replot()
+        self.assertEqual(self.plot.getDataRange().x, (0, 20))
+
+        # A copy loads the dataset
+        self.image.setData(dataset)
+        self.assertIsInstance(self.image.getData(copy=False), numpy.ndarray)
+
+
+class TestStreamingCurve(PlotWidgetTestCase):
+    """Test StreamingCurve"""
+
+    def testAppend(self):
+        """Test appending data to a curve without maximum length"""
+        curve = StreamingCurve()
+        curve._setLegend('test')
+        self.plot.addItems([curve])
+
+        curve.append(numpy.arange(10), numpy.arange(10) * 2)
+        self.plot.replot()
+        for start in range(10, 3000, 100):  # Trigger buffer growth
+            x = numpy.arange(start, start + 100)
+            curve.append(x, - x)
+        self.plot.replot()
+
+        x = numpy.arange(3010)
+        y = numpy.where(x < 10, x * 2, - x)
+        self.assertTrue(numpy.all(curve.getXData(copy=False) == x))
+        self.assertTrue(numpy.all(curve.getYData(copy=False) == y))
+        self.assertEqual(curve._getBounds(), (0, 3009, -3009, 18))
+        self.assertEqual(self.plot.getDataRange(),
+                         ((0, 3009), (-3009, 18), None))
+
+    def testScrollingWindow(self):
+        """Test appending data to a curve with a maximum length"""
+        curve = StreamingCurve(maxLength=100)
+        curve._setLegend('test')
+        self.plot.addItems([curve])
+
+        listener = SignalListener()
+        curve.sigItemChanged.connect(listener)
+
+        x = numpy.arange(1000, dtype=numpy.float64)
+        y = numpy.sin(x / 10.)
+        for start in range(0, 1000, 30):
+            curve.append(x[start:start + 30], y[start:start + 30])
+            self.assertTrue(numpy.all(
+                curve.getXData(copy=False) == x[:start + 30][-100:]))
+            window = y[:start + 30][-100:]
+            self.assertEqual(curve._getBounds()[2:],
+                             (window.min(), window.max()))
+            self.plot.replot()
+
+        self.assertEqual(len(curve.getXData(copy=False)), 100)
+        self.assertEqual(set(listener.arguments(argumentIndex=0)),
+                         set([ItemChangedType.DATA]))
+
+        # Chunk larger than the window
+        curve.append(x, y)
+        self.assertTrue(numpy.all(curve.getYData(copy=False) == y[-100:]))
+        self.assertEqual(curve._getBounds(),
+                         (900, 999, y[-100:].min(), y[-100:].max()))
+
+    def testScrollingWindowBounds(self):
+        """Test bounds of a scrolling window with chunks of random sizes"""
+        curve = StreamingCurve(maxLength=50)
+        self.plot.addItems([curve])
+        state = numpy.random.RandomState(0)
+        x = numpy.arange(2000, dtype=numpy.float64)
+        y = state.normal(size=2000)
+        y[state.randint(0, 2000, 50)] = numpy.nan
+        start = 0
+        while start < len(x):
+            end = min(start + state.randint(1, 80), len(x))
+            curve.append(x[start:end], y[start:end])
+            start = end
+            window = y[:end][-50:]
+            window = window[numpy.isfinite(window)]
+            self.assertEqual(curve._getBounds(),
+                             (max(0, end - 50), end - 1,
+                              window.min(), window.max()))
+        # Only the blocks of the window are kept
+        self.assertLessEqual(len(curve._blockBounds), 50 // 7 + 2)
+
+    def testPendingUpdate(self):
+        """Test that only appended data is sent to the backend"""
+        curve = StreamingCurve(maxLength=10)
+        curve._setLegend('test')
+        curve.setData(numpy.arange(5), numpy.arange(5))
+        self.plot.addItems([curve])
+        self.plot.replot()
+
+        curve.append((5, 6, 7), (0, 0, 0))
+        curve.append((8, 9, 10, 11), (0, 0, 0, 0))
+        self.assertEqual(curve._appended, (2, 7))
+
+        curve.setColor('red')
+        self.assertIsNone(curve._appended)
+        self.plot.replot()
+        self.assertIsNone(curve._appended)
+
+    def testAppendOtherType(self):
+        """Test appending float chunks to a curve of integers"""
+        for maxLength in (None, 10):
+            curve = StreamingCurve(maxLength=maxLength)
+            curve._setLegend('test%s' % maxLength)
+            self.plot.addItems([curve])
+
+            curve.append(numpy.arange(4), numpy.arange(4))
+            self.plot.replot()
+            curve.append((4, 5), (0.5, 1.5))
+            self.assertIsNone(curve._appended)  # Added again to the backend
+
+            y = curve.getYData(copy=False)
+            self.assertEqual(y.dtype.kind, 'f')
+            self.assertTrue(numpy.all(y == (0, 1, 2, 3, 0.5, 1.5)))
+            self.assertEqual(curve.getXData(copy=False).dtype.kind, 'i')
+            self.assertEqual(curve._getBounds(), (0, 5, 0, 3))
+            self.plot.replot()
+
+
+class TestScatterColormapUpdate(PlotWidgetTestCase):
+    """Test update of the colormap of a Scatter"""
+
+    def setUp(self):
+        super(TestScatterColormapUpdate, self).setUp()
+        self.plot.addScatter(numpy.arange(10), numpy.arange(10),
+                             numpy.arange(10), legend='test')
+        self.plot.replot()
+        self.scatter = self.plot.getScatter('test')
+
+    def tearDown(self):
+        del self.scatter
+        super(TestScatterColormapUpdate, self).tearDown()
+
+    def testColormapUpdate(self):
+        """Test that colormap changes do not require to add it again"""
+        listener = SignalListener()
+        self.scatter.sigItemChanged.connect(listener)
+
+        colormap = self.scatter.getColormap()
+        colormap.setVRange(2, 5)
+        colormap.setName('viridis')
+        self.assertTrue(self.scatter._colormapUpdated)
+        self.assertEqual(listener.arguments(argumentIndex=0),
+                         [ItemChangedType.COLORMAP] * 2)
+        self.plot.replot()
+        self.assertFalse(self.scatter._colormapUpdated)
+        self.assertFalse(self.scatter._dirty)
+
+    def testOtherUpdate(self):
+        """Test that other changes require to add the scatter again"""
+        self.scatter.setData((1, 2), (1, 2), (3, 4))
+        self.scatter.getColormap().setVRange(2, 5)
+        self.assertFalse(self.scatter._colormapUpdated)
+
+        self.plot.replot()
+        self.scatter.getColormap().setVRange(3, 4)
+        self.scatter.setSymbolSize(10)
+        self.assertFalse(self.scatter._colormapUpdated)
+
+
 def suite():
     test_suite = unittest.TestSuite()
     loadTests = unittest.defaultTestLoader.loadTestsFromTestCase
     test_suite.addTest(loadTests(TestSigItemChangedSignal))
+    test_suite.addTest(loadTests(TestCurveLevelOfDetail))
+    test_suite.addTest(loadTests(TestImageDataUpdate))
+    test_suite.addTest(loadTests(TestStreamingCurve))
+    test_suite.addTest(loadTests(TestScatterColormapUpdate))
     return test_suite
 
 
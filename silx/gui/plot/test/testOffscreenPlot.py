@@ -0,0 +1,112 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2016 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""Tests for OffscreenPlot"""
+
+__authors__ = ["T. Vincent"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from silx.gui.test.utils import TestCaseQt
+from silx.gui.plot import OffscreenPlot
+
+
+class TestOffscreenPlot(TestCaseQt):
+    """Tests of OffscreenPlot rendering"""
+
+    def setUp(self):
+        super(TestOffscreenPlot, self).setUp()
+        self.plot = OffscreenPlot(width=200, height=100)
+        self.tmpDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+        self.plot = None
+        super(TestOffscreenPlot, self).tearDown()
+
+    def testImageData(self):
+        """Test rendering to an array"""
+        self.assertIsNone(self.plot.getWidgetHandle())
+        self.assertEqual(self.plot.getSize(), (200, 100))
+
+        empty = self.plot.getImageData()
+        self.assertEqual(empty.shape, (100, 200, 4))
+        self.assertEqual(empty.dtype, numpy.uint8)
+
+        self.plot.addImage(numpy.zeros((10, 10)), legend='image')
+        data = self.plot.getImageData()
+        self.assertFalse(numpy.array_equal(empty, data))
+
+        # Update of the content only
+        self.plot.getImage('image').setData(numpy.ones((10, 10)))
+        self.assertTrue(numpy.array_equal(data, self.plot.getImageData()))
+        self.plot.getImage('image').setColormap(
+            {'name': 'gray', 'normalization': 'linear',
+             'autoscale': False, 'vmin': 0., 'vmax': 0.5})
+        self.assertFalse(numpy.array_equal(data, self.plot.getImageData()))
+
+        # Update of the axes
+        data = self.plot.getImageData()
+        self.plot.getXAxis().setLimits(-10, 20)
+        self.assertFalse(numpy.array_equal(data, self.plot.getImageData()))
+
+        self.plot.setSize(100, 50)
+        self.assertEqual(self.plot.getImageData().shape, (50, 100, 4))
+
+    def testSaveGraph(self):
+        """Test saving to files"""
+        self.plot.addCurve((1, 2, 3), (1, 3, 2), legend='curve')
+
+        filename = os.path.join(self.tmpDir, 'plot.png')
+        self.assertTrue(self.plot.saveGraph(filename))
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(4), b'\x89PNG')
+
+        buffer_ = io.BytesIO()
+        self.assertTrue(self.plot.saveGraph(buffer_, fileFormat='png'))
+        self.assertEqual(buffer_.getvalue()[:4], b'\x89PNG')
+
+        filename = os.path.join(self.tmpDir, 'plot.svg')
+        self.assertTrue(self.plot.saveGraph(filename))
+        self.assertTrue(os.path.getsize(filename) > 0)
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestOffscreenPlot))
+    return test_suite
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -26,7 +26,7 @@
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "01/09/2017"
+__date__ = "18/10/2017"
 
 
 import numpy
@@ -133,6 +133,19 @@ class TestPositionInfo(PlotWidgetTestCase):
         self._test(positionWidget, ['Exception'], error=2)
 
 
+class TestRenderProfileOverlay(PlotWidgetTestCase):
+    """Tests for RenderProfileOverlay widget."""
+
+    def test(self):
+        overlay = PlotTools.RenderProfileOverlay(plot=self.plot)
+        self.assertTrue(self.plot.isRenderProfilingEnabled())
+
+        self.plot.addCurve((1, 2, 3), (3, 2, 1), legend='curve')
+        self.plot.replot()
+        self.assertEqual(overlay.text(),
+                         str(self.plot.getLastRenderProfile()))
+
+
 class TestPixelIntensitiesHisto(TestCaseQt, ParametricTestCase):
     """Tests for ProfileToolBar widget."""
 
@@ -190,7 +203,8 @@ class TestPixelIntensitiesHisto(TestCaseQt, ParametricTestCase):
 def suite():
     test_suite = unittest.TestSuite()
     # test_suite.addTest(positionInfoTestSuite)
-    for testClass in (TestPositionInfo, TestPixelIntensitiesHisto):
+    for testClass in (TestPositionInfo, TestPixelIntensitiesHisto,
+                      TestRenderProfileOverlay):
         test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(
             testClass))
     return test_suite
@@ -26,7 +26,7 @@
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "01/09/2017"
+__date__ = "18/10/2017"
 
 
 import unittest
@@ -141,6 +141,36 @@ class TestPlotWidget(PlotWidgetTestCase, ParametricTestCase):
 
         self.assertNotEqual(listener.callCount(), 0)
 
+    def testRenderProfile(self):
+        """Test profiling of the rendering"""
+        self.assertFalse(self.plot.isRenderProfilingEnabled())
+        self.assertIsNone(self.plot.getLastRenderProfile())
+
+        listener = SignalListener()
+        self.plot.sigRenderProfiled.connect(listener)
+        self.plot.setRenderProfilingEnabled(True)
+        self.plot.addCurve((1, 2, 3), (3, 2, 1), legend='curve')
+        self.plot.replot()
+
+        self.assertEqual(listener.callCount(), 1)
+        profile = self.plot.getLastRenderProfile()
+        self.assertIs(listener.arguments()[0][0], profile)
+        self.assertEqual(tuple(profile.getStageTimes().keys()),
+                         ('sync', 'prepare', 'upload', 'draw'))
+        self.assertGreater(profile.getStageTimes()['draw'], 0.)
+        self.assertAlmostEqual(profile.getTotalTime(),
+                               sum(profile.getStageTimes().values()))
+
+        curve = self.plot.getCurve('curve')
+        itemTimes = profile.getItemTimes()
+        self.assertIn(curve, itemTimes)
+        self.assertIn('sync', itemTimes[curve])
+
+        self.plot.setRenderProfilingEnabled(False)
+        self.plot.getXAxis().setLimits(0, 10)
+        self.plot.replot()
+        self.assertEqual(listener.callCount(), 1)
+
 
 class TestPlotImage(PlotWidgetTestCase, ParametricTestCase):
     """Basic tests for addImage"""
@@ -26,7 +26,7 @@
 
 __authors__ = ["T. Vincent"]
 __license__ = "MIT"
-__date__ = "27/06/2017"
+__date__ = "18/10/2017"
 
 
 import unittest
@@ -36,6 +36,7 @@ from silx.test.utils import ParametricTestCase
 import numpy
 
 from silx.gui.plot.PlotWidget import PlotWidget
+from silx.gui.plot import items
 from silx.gui.plot.items.histogram import _getHistogramCurve, _computeEdges
 
 
@@ -67,6 +68,51 @@ class TestPlot(unittest.TestCase):
         plot.addXMarker(10.)
 
 
+class TestPlotBatchUpdate(unittest.TestCase):
+    """Tests of batch updates of Plot without backend"""
+
+    def setUp(self):
+        self.plot = PlotWidget(backend='none')
+        self.events = []
+        self.plot.sigContentChanged.connect(self._contentChanged)
+
+    def tearDown(self):
+        self.plot.sigContentChanged.disconnect(self._contentChanged)
+        del self.plot
+
+    def _contentChanged(self, action, kind, legend):
+        self.events.append((action, kind, legend))
+
+    def testBatchUpdate(self):
+        """Signals and reset zoom are deferred until exit"""
+        with self.plot.batchUpdate():
+            for index in range(5):
+                self.plot.addCurve((0, 1), (0, index), legend=str(index))
+            self.assertEqual(self.events, [])
+            self.assertNotEqual(self.plot.getYAxis().getLimits(), (0, 4))
+        self.assertEqual(len(self.events), 5)
+        self.assertEqual(self.events[-1], ('add', 'curve', '4'))
+        self.assertEqual(self.plot.getYAxis().getLimits(), (0, 4))
+
+    def testAddRemoveItems(self):
+        """Add and remove many items at once"""
+        curves = []
+        for index in range(5):
+            curve = items.Curve()
+            curve._setLegend(str(index))
+            curve.setData((0, 1), (index, index + 1))
+            curves.append(curve)
+        self.plot.addItems(curves)
+        self.assertEqual(len(self.plot.getAllCurves()), 5)
+        self.assertEqual(self.plot.getYAxis().getLimits(), (0, 5))
+
+        self.plot.removeItems(curves[2:])
+        self.assertEqual(self.plot.getAllCurves(just_legend=True),
+                         ['0', '1'])
+        self.assertEqual([event[0] for event in self.events],
+                         ['add'] * 5 + ['remove'] * 3)
+
+
 class TestPlotRanges(ParametricTestCase):
     """Basic tests of Plot data ranges without backend"""
 
@@ -379,6 +425,50 @@ class TestPlotRanges(ParametricTestCase):
         self.assertEqual(range2.x, (0, 1))
         self.assertEqual(range2.y, (0, 1))
 
+    def testDataRangeIncremental(self):
+        """data range updated while adding and removing items"""
+        plot = PlotWidget(backend='none')
+        for index in range(10):
+            plot.addCurve((index, index + 1), (0, index), legend=str(index))
+            self.assertEqual(plot.getDataRange().x, (0, index + 1))
+        plot.addImage(numpy.zeros((2, 2)), origin=(-5, -5), legend='image')
+        dataRange = plot.getDataRange()
+        self.assertEqual(dataRange.x, (-5, 10))
+        self.assertEqual(dataRange.y, (-5, 9))
+
+        plot.remove('image', kind='image')
+        plot.remove('9', kind='curve')
+        dataRange = plot.getDataRange()
+        self.assertEqual(dataRange.x, (0, 9))
+        self.assertEqual(dataRange.y, (0, 8))
+
+        curve = plot.getCurve('8')
+        curve.setYAxis('right')
+        dataRange = plot.getDataRange()
+        self.assertEqual(dataRange.y, (0, 7))
+        self.assertEqual(dataRange.yright, (0, 8))
+
+        curve.setData((0, 1), (-1, 1))
+        dataRange = plot.getDataRange()
+        self.assertEqual(dataRange.x, (0, 8))
+        self.assertEqual(dataRange.yright, (-1, 1))
+
+        # visibility changes of items without specific handling
+        plot = PlotWidget(backend='none')
+        plot.addScatter((0, 100), (0, 100), (1, 2), legend='scatter')
+        plot.addCurve((0, 1), (0, 1), legend='curve1')
+        self.assertEqual(plot.getDataRange().x, (0, 100))
+        scatter = plot.getScatter('scatter')
+        scatter.setVisible(False)
+        plot.addCurve((0, 2), (0, 2), legend='curve2')
+        self.assertEqual(plot.getDataRange().x, (0, 2))
+
+        # data updated while the item is hidden
+        scatter.setData((0, 50), (0, 50), (1, 2))
+        self.assertEqual(plot.getDataRange().x, (0, 2))
+        scatter.setVisible(True)
+        self.assertEqual(plot.getDataRange().x, (0, 50))
+
 
 class TestPlotGetCurveImage(unittest.TestCase):
     """Test of plot getCurve and getImage methods"""
@@ -622,7 +712,8 @@ class TestPlotHistogram(unittest.TestCase):
 
 def suite():
     test_suite = unittest.TestSuite()
-    for TestClass in (TestPlot, TestPlotRanges, TestPlotGetCurveImage,
+    for TestClass in (TestPlot, TestPlotBatchUpdate, TestPlotRanges,
+                      TestPlotGetCurveImage,
                       TestPlotHistogram, TestPlotAddScatter):
         test_suite.addTest(
             unittest.defaultTestLoader.loadTestsFromTestCase(TestClass))
@@ -26,12 +26,22 @@
 
 __authors__ = ["P. Knobel"]
 __license__ = "MIT"
-__date__ = "20/03/2017"
+__date__ = "18/10/2017"
 
 
+import os
+import shutil
+import tempfile
 import unittest
 import numpy
 
+try:
+    import h5py
+except ImportError:
+    h5py = None
+else:
+    from silx.io.statistics import get_statistics
+
 from silx.gui.test.utils import TestCaseQt
 
 from silx.gui import qt
@@ -113,6 +123,35 @@ class TestStackView(TestCaseQt):
                               ListOfImages)  # returnNumpyArray=False by default in getStack
         self.assertIs(my_trans_stack.images, loi)
 
+    @unittest.skipIf(h5py is None, "h5py is needed")
+    def testSetStackDatasetAutoscale(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        filename = os.path.join(tmpdir, "stack.h5")
+        with h5py.File(filename, "w") as h5f:
+            h5f["stack"] = self.mystack
+
+        with h5py.File(filename, "r") as h5f:
+            # the whole dataset is not read: range of the displayed frame
+            self.stackview.setStack(h5f["stack"])
+            self.stackview.setColormap("viridis", autoscale=True)
+            colormap = self.stackview.getColormap()
+            self.assertEqual(colormap.getVMin(), self.mystack[0].min())
+            self.assertEqual(colormap.getVMax(), self.mystack[0].max())
+            self.stackview.clear()
+
+        with h5py.File(filename, "a") as h5f:
+            get_statistics(h5f["stack"], save=True)
+
+        with h5py.File(filename, "r") as h5f:
+            # range of the whole dataset, from the saved statistics
+            self.stackview.setStack(h5f["stack"])
+            self.stackview.setColormap("viridis", autoscale=True)
+            colormap = self.stackview.getColormap()
+            self.assertEqual(colormap.getVMin(), self.mystack.min())
+            self.assertEqual(colormap.getVMax(), self.mystack.max())
+            self.stackview.clear()
+
     def testPerspective(self):
         self.stackview.setStack(numpy.arange(24).reshape((2, 3, 4)))
         self.assertEqual(self.stackview._perspective, 0,
@@ -37,7 +37,7 @@ from .utils import is_dataset
 
 __authors__ = ["V. Valls", "P. Knobel"]
 __license__ = "MIT"
-__date__ = "21/09/2017"
+__date__ = "18/10/2017"
 
 
 class _MappingProxyType(collections.MutableMapping):
@@ -156,9 +156,10 @@ class Node(object):
         """
         if self.__parent is None:
             return "/"
-        if self.__parent.name == "/":
+        parent_name = self.__parent.name
+        if parent_name == "/":
             return "/" + self.basename
-        return self.__parent.name + "/" + self.basename
+        return parent_name + "/" + self.basename
 
     @property
     def basename(self):
@@ -541,6 +542,37 @@ class Group(Node):
         """
         self._get_items()[node.basename] = node
         node._set_parent(self)
+        self._invalidate_path_index()
+
+    def _get_path_index(self):
+        """Returns the path index of the file containing this group, else
+        None if the group is not part of a file or if the index is disabled.
+
+        :rtype: Union[dict,None]
+        """
+        f = self.file
+        if f is None:
+            return None
+        return f._get_path_index()
+
+    def _invalidate_path_index(self):
+        """Drop the cached lookups of the file containing this group.
+
+        It has to be called every time the structure of the tree is
+        modified.
+        """
+        index = self._get_path_index()
+        if index is not None:
+            index.clear()
+
+    def _get_absolute_path(self, name):
+        """Returns the absolute path of a name relative to this group."""
+        if name.startswith("/"):
+            return name
+        basename = self.name
+        if basename == "/":
+            return "/" + name
+        return basename + "/" + name
 
     @property
     def h5py_class(self):
@@ -555,7 +587,30 @@ class Group(Node):
     def _get(self, name, getlink):
         """If getlink is True and name points to an existing SoftLink, this
         SoftLink is returned. In all other situations, we try to return a
-        Group or Dataset, or we raise a KeyError if we fail."""
+        Group or Dataset, or we raise a KeyError if we fail.
+
+        Successful lookups of paths are stored in the path index of the
+        file, so a path and its soft links are only resolved once. Direct
+        children which are not soft links are not indexed, they are faster
+        to access from the group.
+        """
+        if "/" not in name:
+            result = self._get_items()[name]
+            if getlink or not isinstance(result, SoftLink):
+                return result
+        index = self._get_path_index()
+        if index is None:
+            return self._resolve(name, getlink)
+        key = self._get_absolute_path(name), getlink
+        result = index.get(key, None)
+        if result is None:
+            result = self._resolve(name, getlink)
+            index[key] = result
+        return result
+
+    def _resolve(self, name, getlink):
+        """Walk the tree to find the node of a name, without using the path
+        index. See :meth:`_get`."""
         if "/" not in name:
             result = self._get_items()[name]
         elif name.startswith("/"):
@@ -793,8 +848,7 @@ class Group(Node):
         :param func: Callable (function, method or callable object)
         :type func: function
         """
-        origin_name = self.name
-        return self._visit(func, origin_name, visit_links)
+        return self._visit(func, "", visit_links)
 
     def visititems(self, func, visit_links=False):
         """Recursively visit names and objects in this group.
@@ -805,24 +859,20 @@ class Group(Node):
         :param bool visit_links: If *False*, ignore links. If *True*,
             call `func(name)` for links and recurse into target groups.
         """
-        origin_name = self.name
-        return self._visit(func, origin_name, visit_links,
-                           visititems=True)
+        return self._visit(func, "", visit_links, visititems=True)
 
-    def _visit(self, func, origin_name,
+    def _visit(self, func, prefix,
                visit_links=False, visititems=False):
         """
 
-        :param origin_name: name of first group that initiated the recursion
-            This is used to compute the relative path from each item's
-            absolute path.
+        :param str prefix: path of this group relative to the group which
+            initiated the recursion, including a trailing slash (or an
+            empty string for the first group)
         """
-        for member in self.values():
+        for basename, member in self.items():
             ret = None
+            relative_name = prefix + basename
             if not isinstance(member, SoftLink) or visit_links:
-                relative_name = member.name[len(origin_name):]
-                # remove leading slash and unnecessary trailing slash
-                relative_name = relative_name.strip("/")
                 if visititems:
                     ret = func(relative_name, member)
                 else:
@@ -830,7 +880,10 @@ class Group(Node):
             if ret is not None:
                 return ret
             if isinstance(member, Group):
-                member._visit(func, origin_name, visit_links, visititems)
+                ret = member._visit(func, relative_name + "/",
+                                    visit_links, visititems)
+                if ret is not None:
+                    return ret
 
     def create_group(self, name):
         """Create and return a new subgroup.
@@ -919,6 +972,7 @@ class LazyLoadableGroup(Group):
     def __init__(self, name, parent=None, attrs=None):
         Group.__init__(self, name, parent, attrs)
         self.__is_initialized = False
+        self.__is_loading = False
 
     def _get_items(self):
         """Returns the internal structure which contains the children.
@@ -930,9 +984,20 @@ class LazyLoadableGroup(Group):
         """
         if not self.__is_initialized:
             self.__is_initialized = True
-            self._create_child()
+            self.__is_loading = True
+            try:
+                self._create_child()
+            finally:
+                self.__is_loading = False
         return Group._get_items(self)
 
+    def _invalidate_path_index(self):
+        """Children created by the lazy loading were never reachable before,
+        so the path index do not have to be invalidated."""
+        if self.__is_loading:
+            return
+        Group._invalidate_path_index(self)
+
     def _create_child(self):
         """
         Factory to create the child contained by the group when it is needed.
@@ -946,6 +1011,10 @@ class File(Group):
     """This class is the special :class:`Group` that is the root node
     of the tree structure. It mimics `h5py.File`."""
 
+    _USE_PATH_INDEX = True
+    """If true, the nodes found by path are stored in a flat path index,
+    which is cleared when the structure of the file is modified."""
+
     def __init__(self, name=None, mode=None, attrs=None):
         """
         Constructor
@@ -964,6 +1033,10 @@ class File(Group):
             mode = "r"
         assert(mode in ["r", "w"])
         self._mode = mode
+        self.__path_index = {} if self._USE_PATH_INDEX else None
+
+    def _get_path_index(self):
+        return self.__path_index
 
     @property
     def filename(self):
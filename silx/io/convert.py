@@ -54,9 +54,12 @@ longest string. Shorter strings are right-padded with blank spaces.
 
 import numpy
 import logging
+import sys
+import threading
 
 import silx.io
 from silx.io import is_dataset, is_group, is_softlink
+from silx.third_party import six
 
 __authors__ = ["P. Knobel"]
 __license__ = "MIT"
@@ -106,13 +109,21 @@ def _create_link(h5f, link_name, target_name,
 
 class Hdf5Writer(object):
     """Converter class to write the content of a data file to a HDF5 file.
+
+    The input file is read in a separate thread, while the HDF5 file is
+    written (and data compressed) in the calling thread. Both threads
+    communicate through a bounded queue, so that the memory used is limited.
+    Datasets larger than :attr:`slab_size` bytes are read and written by
+    slabs along their first axis, instead of being loaded at once.
     """
     def __init__(self,
                  h5path='/',
                  overwrite_data=False,
                  link_type="soft",
                  create_dataset_args=None,
-                 min_size=500):
+                 min_size=500,
+                 slab_size=2**24,
+                 queue_size=4):
         """
 
         :param h5path: Target path where the scan groups will be written
@@ -125,6 +136,10 @@ class Hdf5Writer(object):
             See documentation of :func:`write_to_h5`
         :param int min_size:
             See documentation of :func:`write_to_h5`
+        :param int slab_size:
+            See documentation of :func:`write_to_h5`
+        :param int queue_size: Maximum number of members or slabs read
+            in advance of the writing.
         """
         self.h5path = h5path
         if not h5path.startswith("/"):
@@ -142,6 +157,10 @@ class Hdf5Writer(object):
 
         self.min_size = min_size
 
+        self.slab_size = slab_size
+
+        self.queue_size = queue_size
+
         self.overwrite_data = overwrite_data   # boolean
 
         self.link_type = link_type
@@ -150,6 +169,9 @@ class Hdf5Writer(object):
         self._links = []
         """List of *(link_path, target_path)* tuples."""
 
+        self._ignored = set()
+        """Names of existing datasets which are not overwritten"""
+
     def write(self, infile, h5f):
         """Do the conversion from :attr:`sfh5` (Spec file) to *h5f* (HDF5)
 
@@ -159,9 +181,43 @@ class Hdf5Writer(object):
         :param infile: :class:`SpecH5` object
         :param h5f: :class:`h5py.File` instance
         """
-        # Recurse through all groups and datasets to add them to the HDF5
         self._h5f = h5f
-        infile.visititems(self.append_member_to_h5, visit_links=True)
+
+        # Recurse through all groups and datasets in a reader thread,
+        # and add them to the HDF5 file in this thread
+        tasks = six.moves.queue.Queue(maxsize=self.queue_size)
+        abort = threading.Event()
+
+        def read_members():
+            def read_member(h5like_name, obj):
+                for task in self._read_member(h5like_name, obj):
+                    if abort.is_set():
+                        # stops the visit
+                        return True
+                    tasks.put(task)
+            try:
+                infile.visititems(read_member, visit_links=True)
+                tasks.put(None)
+            except BaseException:
+                tasks.put(("error", sys.exc_info()))
+
+        reader = threading.Thread(target=read_members,
+                                  name="Hdf5Writer reader")
+        reader.daemon = True
+        reader.start()
+        try:
+            for task in iter(tasks.get, None):
+                if task[0] == "error":
+                    six.reraise(*task[1])
+                self._write_task(task)
+        finally:
+            abort.set()
+            # unblock the reader if the writing failed
+            while reader.is_alive():
+                try:
+                    tasks.get(timeout=0.1)
+                except six.moves.queue.Empty:
+                    pass
 
         # Handle the attributes of the root group
         root_grp = h5f[self.h5path]
@@ -176,17 +232,59 @@ class Hdf5Writer(object):
                          link_type=self.link_type,
                          overwrite_data=self.overwrite_data)
         self._links = []
+        self._ignored = set()
 
     def append_member_to_h5(self, h5like_name, obj):
         """Add one group or one dataset to :attr:`h5f`"""
+        for task in self._read_member(h5like_name, obj):
+            self._write_task(task)
+
+    def _read_member(self, h5like_name, obj):
+        """Read one group or one dataset of the input file.
+
+        This does not access the output file.
+
+        :return: Generator of the tasks writing the member in the HDF5 file
+            (see :meth:`_write_task`)
+        """
         h5_name = self.h5path + h5like_name.lstrip("/")
 
         if is_softlink(obj):
-            # links to be created after all groups and datasets
             h5_target = self.h5path + obj.path.lstrip("/")
-            self._links.append((h5_name, h5_target))
+            yield "link", h5_name, h5_target, None
 
         elif is_dataset(obj):
+            attrs = dict(obj.attrs)
+            shape = obj.shape
+            nbytes = numpy.prod(shape, dtype=numpy.int64) * obj.dtype.itemsize
+            if len(shape) == 0 or shape[0] < 2 or nbytes <= self.slab_size:
+                yield "dataset", h5_name, obj[()], attrs
+                return
+
+            yield "create", h5_name, (shape, obj.dtype), attrs
+            rows = max(1, int(self.slab_size // (nbytes // shape[0])))
+            chunks = self.create_dataset_args.get("chunks")
+            if isinstance(chunks, (tuple, list)) and rows > chunks[0]:
+                # write complete chunks
+                rows -= rows % chunks[0]
+            for start in range(0, shape[0], rows):
+                yield "slab", h5_name, (start, obj[start:start + rows]), None
+
+        elif is_group(obj):
+            yield "group", h5_name, None, dict(obj.attrs)
+
+    def _write_task(self, task):
+        """Apply in the HDF5 file a task provided by :meth:`_read_member`.
+
+        :param tuple task: Kind of task, HDF5 name, data and attributes
+        """
+        kind, h5_name, data, attrs = task
+
+        if kind == "link":
+            # links to be created after all groups and datasets
+            self._links.append((h5_name, data))
+
+        elif kind in ("dataset", "create"):
             _logger.debug("Saving dataset: " + h5_name)
 
             member_initially_exists = h5_name in self._h5f
@@ -196,24 +294,36 @@ class Hdf5Writer(object):
                 del self._h5f[h5_name]
 
             if self.overwrite_data or not member_initially_exists:
+                if kind == "create":
+                    # pre-create the dataset, filled by slabs
+                    shape, dtype = data
+                    ds = self._h5f.create_dataset(h5_name, shape=shape,
+                                                  dtype=dtype,
+                                                  **self.create_dataset_args)
                 # fancy arguments don't apply to small dataset
-                if obj.size < self.min_size:
-                    ds = self._h5f.create_dataset(h5_name, data=obj.value)
+                elif numpy.size(data) < self.min_size:
+                    ds = self._h5f.create_dataset(h5_name, data=data)
                 else:
-                    ds = self._h5f.create_dataset(h5_name, data=obj.value,
+                    ds = self._h5f.create_dataset(h5_name, data=data,
                                                   **self.create_dataset_args)
             else:
                 ds = self._h5f[h5_name]
+                self._ignored.add(h5_name)
 
             # add HDF5 attributes
-            for key in obj.attrs:
+            for key in attrs:
                 if self.overwrite_data or key not in ds.attrs:
-                    ds.attrs.create(key, numpy.string_(obj.attrs[key]))
+                    ds.attrs.create(key, numpy.string_(attrs[key]))
 
             if not self.overwrite_data and member_initially_exists:
                 _logger.warn("Ignoring existing dataset: " + h5_name)
 
-        elif is_group(obj):
+        elif kind == "slab":
+            if h5_name not in self._ignored:
+                start, slab = data
+                self._h5f[h5_name][start:start + len(slab)] = slab
+
+        elif kind == "group":
             if h5_name not in self._h5f:
                 _logger.debug("Creating group: " + h5_name)
                 grp = self._h5f.create_group(h5_name)
@@ -221,14 +331,14 @@ class Hdf5Writer(object):
                 grp = self._h5f[h5_name]
 
             # add HDF5 attributes
-            for key in obj.attrs:
+            for key in attrs:
                 if self.overwrite_data or key not in grp.attrs:
-                    grp.attrs.create(key, numpy.string_(obj.attrs[key]))
+                    grp.attrs.create(key, numpy.string_(attrs[key]))
 
 
 def write_to_h5(infile, h5file, h5path='/', mode="a",
                 overwrite_data=False, link_type="soft",
-                create_dataset_args=None, min_size=500):
+                create_dataset_args=None, min_size=500, slab_size=2**24):
     """Write content of a h5py-like object into a HDF5 file.
 
     :param infile: Path of input file, or :class:`commonh5.File` object
@@ -251,6 +361,9 @@ def write_to_h5(infile, h5file, h5path='/', mode="a",
         These arguments are only applied to datasets larger than 1MB.
     :param int min_size: Minimum number of elements in a dataset to apply
         chunking and compression. Default is 500.
+    :param int slab_size: Datasets larger than this number of bytes are
+        not loaded at once, they are copied by slabs of about this size
+        along their first dimension. Default is 16MB.
 
     The structure of the spec data in an HDF5 file is described in the
     documentation of :mod:`silx.io.spech5`.
@@ -259,7 +372,8 @@ def write_to_h5(infile, h5file, h5path='/', mode="a",
                         overwrite_data=overwrite_data,
                         link_type=link_type,
                         create_dataset_args=create_dataset_args,
-                        min_size=min_size)
+                        min_size=min_size,
+                        slab_size=slab_size)
 
     # both infile and h5file can be either file handle or a file name: 4 cases
     if not isinstance(h5file, h5py.File) and not is_group(infile):
@@ -47,7 +47,7 @@ from .utils import open as h5open
 
 __authors__ = ["P. Knobel"]
 __license__ = "MIT"
-__date__ = "16/06/2017"
+__date__ = "18/10/2017"
 
 logger = logging.getLogger(__name__)
 
@@ -82,6 +82,36 @@ def _prepare_hdf5_dataset(array_like):
     return array
 
 
+_CHUNK_SIZE = 2**20
+"""Size in bytes targeted by :func:`_guess_chunks`"""
+
+
+def _guess_chunks(shape, itemsize, chunk_size=_CHUNK_SIZE):
+    """Returns a chunk shape for a dataset, as large as possible without
+    exceeding `chunk_size` bytes (unless a single item is larger).
+
+    The last dimensions are kept complete as long as possible (a full
+    image, a full spectrum). The first dimension which does not fit is cut
+    to the remaining size, and the previous ones are set to 1.
+
+    :param tuple shape: Shape of the dataset
+    :param int itemsize: Size in bytes of an item of the dataset
+    :param int chunk_size: Targeted size of a chunk in bytes
+    :rtype: tuple
+    """
+    chunks = []
+    size = max(1, chunk_size // max(1, itemsize))
+    for dim in reversed(shape):
+        dim = max(1, dim)
+        if size >= dim:
+            chunks.append(dim)
+            size //= dim
+        else:
+            chunks.append(size)
+            size = 1
+    return tuple(reversed(chunks))
+
+
 class _SafeH5FileWrite(object):
     """Context manager returning a :class:`h5py.File` object.
 
@@ -154,7 +184,7 @@ class _SafeH5FileRead(object):
 
 def dicttoh5(treedict, h5file, h5path='/',
              mode="w", overwrite_data=False,
-             create_dataset_args=None):
+             create_dataset_args=None, compression_threshold=None):
     """Write a nested dictionary to a HDF5 file, using keys as member names.
 
     If a dictionary value is a sub-dictionary, a group is created. If it is
@@ -184,6 +214,11 @@ def dicttoh5(treedict, h5file, h5path='/',
     :param create_dataset_args: Dictionary of args you want to pass to
         ``h5f.create_dataset``. This allows you to specify filters and
         compression parameters. Don't specify ``name`` and ``data``.
+        If filters are requested without ``chunks``, a chunk shape is
+        computed for each dataset, keeping its last dimensions complete.
+    :param int compression_threshold: If set, datasets bigger than this
+        size in bytes are compressed with gzip and shuffle, unless
+        filters are already provided by ``create_dataset_args``.
 
     Example::
 
@@ -221,7 +256,8 @@ def dicttoh5(treedict, h5file, h5path='/',
                 # non-empty group: recurse
                 dicttoh5(treedict[key], h5f, h5path + key,
                          overwrite_data=overwrite_data,
-                         create_dataset_args=create_dataset_args)
+                         create_dataset_args=create_dataset_args,
+                         compression_threshold=compression_threshold)
 
             elif treedict[key] is None or (isinstance(treedict[key], dict) and
                                            not len(treedict[key])):
@@ -231,13 +267,41 @@ def dicttoh5(treedict, h5file, h5path='/',
             else:
                 ds = _prepare_hdf5_dataset(treedict[key])
                 # can't apply filters on scalars (datasets with shape == () )
-                if ds.shape == () or create_dataset_args is None:
+                if ds.shape == () or ds.size == 0:
                     h5f.create_dataset(h5path + key,
                                        data=ds)
                 else:
                     h5f.create_dataset(h5path + key,
                                        data=ds,
-                                       **create_dataset_args)
+                                       **_dataset_args(ds, create_dataset_args,
+                                                       compression_threshold))
+
+
+def _dataset_args(array, create_dataset_args, compression_threshold):
+    """Returns the arguments used by :func:`dicttoh5` to create the dataset
+    of a non-scalar array.
+
+    :param numpy.ndarray array: Data of the dataset
+    :param dict create_dataset_args: Arguments provided by the user
+    :param int compression_threshold: Size in bytes above which the data is
+        compressed, or None
+    :rtype: dict
+    """
+    if create_dataset_args is None:
+        args = {}
+    else:
+        args = dict(create_dataset_args)
+    filters = ("compression", "shuffle", "fletcher32", "scaleoffset")
+    use_filters = any(args.get(name) for name in filters)
+    if (not use_filters and compression_threshold is not None and
+            array.nbytes > compression_threshold and
+            array.dtype.kind in "biuf"):
+        args["compression"] = "gzip"
+        args["shuffle"] = True
+        use_filters = True
+    if use_filters and args.get("chunks", True) is True:
+        args["chunks"] = _guess_chunks(array.shape, array.dtype.itemsize)
+    return args
 
 
 def _name_contains_string_in_list(name, strlist):
@@ -249,7 +313,140 @@ def _name_contains_string_in_list(name, strlist):
     return False
 
 
-def h5todict(h5file, path="/", exclude_names=None):
+class _LazyFile(object):
+    """File shared by the :class:`DatasetProxy` objects of a
+    :class:`LazyDict`.
+
+    It is opened at the first read, and kept opened until :meth:`close`
+    is called.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.__h5file = None
+
+    def get_file(self):
+        """Returns the opened file, opening it if needed"""
+        if self.__h5file is None:
+            self.__h5file = h5open(self.filename)
+        return self.__h5file
+
+    def close(self):
+        if self.__h5file is not None:
+            self.__h5file.close()
+            self.__h5file = None
+
+
+class LazyDict(dict):
+    """Nested dictionary returned by :func:`h5todict` in lazy mode, when it
+    reads a file from its name.
+
+    The datasets are :class:`DatasetProxy` objects sharing a single handle on
+    the file. The file is opened when data is read for the first time, and
+    stays opened until :meth:`close` is called, or until the end of a
+    ``with`` block::
+
+        with h5todict("data.h5", lazy=True) as ddict:
+            image = ddict["entry"]["image"][0]
+
+    Reading data after the file is closed opens it again.
+    """
+
+    def __init__(self, lazy_file, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.__lazy_file = lazy_file
+
+    def close(self):
+        """Close the file if it is opened"""
+        self.__lazy_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class DatasetProxy(object):
+    """Proxy on a dataset of a HDF5 file, returned by :func:`h5todict` in lazy
+    mode.
+
+    The file is only opened when the data is requested. It is shared with the
+    other datasets returned by the same call to :func:`h5todict`, and stays
+    opened until :meth:`LazyDict.close` is called.
+    """
+
+    def __init__(self, lazy_file, name, shape, dtype):
+        """
+
+        :param _LazyFile lazy_file: File containing the dataset
+        :param str name: Path of the dataset in the file
+        :param tuple shape: Shape of the dataset
+        :param numpy.dtype dtype: Type of the dataset
+        """
+        self.__lazy_file = lazy_file
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    @property
+    def filename(self):
+        """Name of the file containing the dataset"""
+        return self.__lazy_file.filename
+
+    @property
+    def file(self):
+        """File containing the dataset, opened if needed"""
+        return self.__lazy_file.get_file()
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(numpy.prod(self.shape))
+
+    def __len__(self):
+        if len(self.shape) == 0:
+            raise TypeError("Attempt to take len() of scalar dataset")
+        return self.shape[0]
+
+    def __getitem__(self, item):
+        return self.file[self.name][item]
+
+    def __array__(self, dtype=None):
+        return numpy.array(self[()], dtype=dtype)
+
+    def __repr__(self):
+        return '<DatasetProxy "%s" in "%s", shape %s, type "%s">' % (
+            self.name, self.filename, self.shape, self.dtype.str)
+
+
+def _read_group(h5f, path, exclude_names, read_dataset):
+    """Read a group of a HDF5 file as a nested dictionary.
+
+    :param h5f: h5py-like file object
+    :param str path: Path of the group
+    :param list[str] exclude_names: Names to ignore
+    :param callable read_dataset: Function returning the value stored
+        in the dictionary for a dataset
+    :rtype: dict
+    """
+    ddict = {}
+    for key in h5f[path]:
+        if _name_contains_string_in_list(key, exclude_names):
+            continue
+        name = path + "/" + key
+        node = h5f[name]
+        if is_group(node):
+            ddict[key] = _read_group(h5f, name, exclude_names, read_dataset)
+        else:
+            ddict[key] = read_dataset(node)
+    return ddict
+
+
+def h5todict(h5file, path="/", exclude_names=None, lazy=False):
     """Read a HDF5 file and return a nested dictionary with the complete file
     structure and all data.
 
@@ -285,24 +482,34 @@ def h5todict(h5file, path="/", exclude_names=None):
         to read only a sub-group in the file
     :param list[str] exclude_names: Groups and datasets whose name contains
         a string in this list will be ignored. Default is None (ignore nothing)
+    :param bool lazy: If True, datasets are not read. If ``h5file`` is a
+        file name, a :class:`LazyDict` is returned, and datasets are
+        :class:`DatasetProxy` objects which open the file again to read the
+        data. The file stays opened until :meth:`LazyDict.close` is called.
+        Else the dataset objects of the provided file are returned.
     :return: Nested dictionary
     """
     if h5py_missing:
         raise h5py_import_error
 
     with _SafeH5FileRead(h5file) as h5f:
-        ddict = {}
-        for key in h5f[path]:
-            if _name_contains_string_in_list(key, exclude_names):
-                continue
-            if is_group(h5f[path + "/" + key]):
-                ddict[key] = h5todict(h5f,
-                                      path + "/" + key,
-                                      exclude_names=exclude_names)
-            else:
-                # Convert HDF5 dataset to numpy array
-                ddict[key] = h5f[path + "/" + key][...]
+        if not lazy:
+            def read_dataset(dataset):
+                # Convert HDF5 dataset to numpy array
+                return dataset[...]
+        elif is_h5_file_like(h5file):
+            def read_dataset(dataset):
+                return dataset
+        else:
+            lazy_file = _LazyFile(h5file)
+
+            def read_dataset(dataset):
+                return DatasetProxy(lazy_file, dataset.name,
+                                    dataset.shape, dataset.dtype)
+        ddict = _read_group(h5f, path, exclude_names, read_dataset)
 
+    if lazy and not is_h5_file_like(h5file):
+        ddict = LazyDict(lazy_file, ddict)
     return ddict
 
 
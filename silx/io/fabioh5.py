@@ -36,6 +36,7 @@ import collections
 import datetime
 import logging
 import numbers
+import threading
 
 import fabio
 import numpy
@@ -47,9 +48,29 @@ from silx import version as silx_version
 _logger = logging.getLogger(__name__)
 
 
+def _fit_frame(image, shape):
+    """Returns an image padded with 0 to a shape containing it."""
+    if image.shape == shape:
+        return image
+    location = [slice(0, i) for i in image.shape]
+    while len(location) < len(shape):
+        location.append(0)
+    normalized_image = numpy.zeros(shape, dtype=image.dtype)
+    normalized_image[tuple(location)] = image
+    return normalized_image
+
+
 class FrameData(commonh5.LazyLoadableDataset):
     """Expose a cube of image from a Fabio file using `FabioReader` as
-    cache."""
+    cache.
+
+    The cube is not created to access some frames: indexing the first
+    dimension with an integer or a slice only reads the requested frames.
+
+    Until the cube is created, the shape of the frames may be the one of the
+    first frame (see :meth:`FabioReader.get_frame_shape`). It grows when a
+    larger frame is read.
+    """
 
     def __init__(self, name, fabio_reader, parent=None):
         attrs = {"interpretation": "image"}
@@ -59,6 +80,63 @@ class FrameData(commonh5.LazyLoadableDataset):
     def _create_data(self):
         return self.__fabio_reader.get_data()
 
+    def __is_lazy(self):
+        return not self._is_initialized and self.__fabio_reader.get_frame_count() > 1
+
+    @property
+    def shape(self):
+        if self.__is_lazy():
+            reader = self.__fabio_reader
+            return (reader.get_frame_count(),) + reader.get_frame_shape()
+        return super(FrameData, self).shape
+
+    @property
+    def dtype(self):
+        if self.__is_lazy():
+            return self.__fabio_reader.get_frame_dtype()
+        return super(FrameData, self).dtype
+
+    @property
+    def size(self):
+        if self.__is_lazy():
+            return int(numpy.prod(self.shape))
+        return super(FrameData, self).size
+
+    def __len__(self):
+        if self.__is_lazy():
+            return self.__fabio_reader.get_frame_count()
+        return super(FrameData, self).__len__()
+
+    def __iter__(self):
+        if self.__is_lazy():
+            reader = self.__fabio_reader
+            return (reader.get_frame_data(i) for i in range(len(self)))
+        return super(FrameData, self).__iter__()
+
+    def __getitem__(self, item):
+        if self.__is_lazy():
+            if isinstance(item, tuple) and len(item) > 0:
+                index, others = item[0], item[1:]
+            else:
+                index, others = item, ()
+            if isinstance(index, numbers.Integral) and not isinstance(index, bool):
+                if index < 0:
+                    index += len(self)
+                if not 0 <= index < len(self):
+                    raise IndexError("Index (%d) out of range" % index)
+                return self.__fabio_reader.get_frame_data(index)[others]
+            if isinstance(index, slice):
+                frame_ids = range(*index.indices(len(self)))
+                images = [self.__fabio_reader.get_frame_data(frame_id)
+                          for frame_id in frame_ids]
+                # the shape can grow while reading the frames
+                shape = self.shape[1:]
+                frames = numpy.empty((len(images),) + shape, dtype=self.dtype)
+                for i, image in enumerate(images):
+                    frames[i] = _fit_frame(image, shape)
+                return frames[(slice(None),) + others]
+        return super(FrameData, self).__getitem__(item)
+
 
 class RawHeaderData(commonh5.LazyLoadableDataset):
     """Lazy loadable raw header"""
@@ -216,11 +294,162 @@ class FabioReader(object):
         self.__measurements = {}
         self.__data = None
         self.__frame_count = self.__fabio_file.nframes
-        self._read(self.__fabio_file)
+        self.__frame_shape = None
+        self.__frame_dtype = None
+        self.__frame_cache = collections.OrderedDict()
+        self.__frame_lock = threading.RLock()
+        self.__prefetch_thread = None
+
+        self.frame_cache_size = 8
+        """Number of decoded frames kept in memory"""
+
+        self.prefetch = False
+        """If true, the frame following the last accessed one is read in
+        background"""
+
+        self.__metadata_is_read = False
 
     def fabio_file(self):
         return self.__fabio_file
 
+    def _get_frame(self, frame_id):
+        """Returns the fabio image of a frame"""
+        if self.__frame_count == 1:
+            return self.__fabio_file
+        return self.__fabio_file.getframe(frame_id)
+
+    def _get_frame_shape(self, frame_id):
+        """Returns the shape of a frame without decoding its data.
+
+        The default implementation returns None, as the shape is not known.
+        Readers which can get the shape from the header should overwrite it.
+
+        :rtype: Union[tuple,None]
+        """
+        return None
+
+    def get_frame_count(self):
+        """Returns the number of frames
+
+        :rtype: int
+        """
+        return self.__frame_count
+
+    def get_frame_shape(self):
+        """Returns the shape of the frames in the data cube.
+
+        It is the smallest shape containing all the frames when their shapes
+        are known from the headers. Else it is the shape of the first frame,
+        which grows when a larger frame is read.
+
+        Only the first frame is decoded.
+
+        :rtype: tuple
+        """
+        if self.__frame_shape is None:
+            with self.__frame_lock:
+                if self.__frame_shape is None:
+                    self.__read_first_frame()
+        return self.__frame_shape
+
+    def __read_first_frame(self):
+        """Initialize the shape and the data type of the frames from the first
+        frame, which is kept in the cache."""
+        image = self._get_frame(0).data
+        shapes = [image.shape]
+        for frame_id in range(1, self.__frame_count):
+            shape = self._get_frame_shape(frame_id)
+            if shape is None:
+                break
+            shapes.append(shape)
+        self.__frame_dtype = image.dtype
+        self.__frame_shape = self.__get_max_shape(shapes)
+        image = _fit_frame(image, self.__frame_shape)
+        image.flags.writeable = False
+        self.__frame_cache[0] = image
+
+    @staticmethod
+    def __get_max_shape(shapes):
+        """Returns the smallest shape containing all the given shapes"""
+        max_dim = max([len(shape) for shape in shapes])
+        max_shape = [0] * max_dim
+        for shape in shapes:
+            for dim in range(len(shape)):
+                if shape[dim] > max_shape[dim]:
+                    max_shape[dim] = shape[dim]
+        return tuple(max_shape)
+
+    def get_frame_dtype(self):
+        """Returns the data type of the frames, which is the one of the
+        first frame.
+
+        :rtype: numpy.dtype
+        """
+        if self.__frame_dtype is None:
+            self.get_frame_shape()
+        return self.__frame_dtype
+
+    def _read_frame_data(self, frame_id):
+        """Read the data of a frame and fit it to the shape of the cube.
+
+        If the image is smaller than expected, the empty space is set to 0.
+        If it is larger, the shape of the cube grows.
+        """
+        with self.__frame_lock:
+            shape = self.get_frame_shape()
+            image = self._get_frame(frame_id).data
+            if image.shape != shape:
+                shape = self.__get_max_shape([shape, image.shape])
+                if shape != self.__frame_shape:
+                    _logger.debug("Frame %d is larger than the previous ones",
+                                  frame_id)
+                    self.__frame_shape = shape
+        return _fit_frame(image, shape)
+
+    def get_frame_data(self, frame_id):
+        """Returns the data of a single frame, fitted to the shape of the data
+        cube.
+
+        The last decoded frames are cached (see :attr:`frame_cache_size`).
+
+        :param int frame_id: Index of the frame
+        :rtype: numpy.ndarray
+        """
+        if self.__data is not None:
+            return self.__data[frame_id]
+        image = self.__cache_frame(frame_id)
+        if self.prefetch and frame_id + 1 < self.__frame_count:
+            self.__prefetch(frame_id + 1)
+        return image
+
+    def __cache_frame(self, frame_id):
+        """Returns a frame from the cache, reading it if needed"""
+        with self.__frame_lock:
+            image = self.__frame_cache.pop(frame_id, None)
+            if image is None:
+                image = self._read_frame_data(frame_id)
+                image.flags.writeable = False
+            elif image.shape != self.__frame_shape:
+                # the shape grew since it was read
+                image = _fit_frame(image, self.__frame_shape)
+                image.flags.writeable = False
+            self.__frame_cache[frame_id] = image
+            while len(self.__frame_cache) > max(self.frame_cache_size, 1):
+                self.__frame_cache.popitem(last=False)
+        return image
+
+    def __prefetch(self, frame_id):
+        """Read a frame into the cache in a background thread"""
+        if frame_id in self.__frame_cache:
+            return
+        if self.__prefetch_thread is not None and self.__prefetch_thread.is_alive():
+            return
+        thread = threading.Thread(target=self.__cache_frame, args=(frame_id,),
+                                  name="FabioReader prefetch")
+        thread.daemon = True
+        thread.start()
+        self.__prefetch_thread = thread
+
     def _create_data(self):
         """Initialize hold data by merging all frames into a single cube.
 
@@ -229,40 +458,35 @@ class FabioReader(object):
 
         The computation is cached into the class, and only done ones.
         """
+        # returns the data without extra dim in case of single frame
+        if self.__frame_count == 1:
+            return self.__fabio_file.data
+
         images = []
-        for frame in range(self.__fabio_file.nframes):
-            if self.__fabio_file.nframes == 1:
-                image = self.__fabio_file.data
-            else:
-                image = self.__fabio_file.getframe(frame).data
+        for frame_id in range(self.__frame_count):
+            with self.__frame_lock:
+                # frames already in the cache are not decoded again
+                image = self.__frame_cache.get(frame_id)
+                if image is None:
+                    image = self._get_frame(frame_id).data
             images.append(image)
 
-        # returns the data without extra dim in case of single frame
-        if len(images) == 1:
-            return images[0]
-
-        # get the max size
-        max_dim = max([i.ndim for i in images])
-        max_shape = [0] * max_dim
-        for image in images:
-            for dim in range(image.ndim):
-                if image.shape[dim] > max_shape[dim]:
-                    max_shape[dim] = image.shape[dim]
-        max_shape = tuple(max_shape)
-
-        # fix smallest images
-        for index, image in enumerate(images):
-            if image.shape == max_shape:
-                continue
-            location = [slice(0, i) for i in image.shape]
-            while len(location) < max_dim:
-                location.append(0)
-            normalized_image = numpy.zeros(max_shape, dtype=image.dtype)
-            normalized_image[location] = image
-            images[index] = normalized_image
+        with self.__frame_lock:
+            # get the max size
+            shapes = [i.shape for i in images]
+            if self.__frame_shape is not None:
+                shapes.append(self.__frame_shape)
+            shape = self.__get_max_shape(shapes)
+            self.__frame_shape = shape
+            if self.__frame_dtype is None:
+                self.__frame_dtype = images[0].dtype
 
         # create a cube
-        return numpy.array(images)
+        data = numpy.empty((self.__frame_count,) + shape,
+                           dtype=self.__frame_dtype)
+        for frame_id, image in enumerate(images):
+            data[frame_id] = _fit_frame(image, shape)
+        return data
 
     def __get_dict(self, kind):
         """Returns a dictionary from according to an expected kind"""
@@ -282,13 +506,24 @@ class FabioReader(object):
         """
         if self.__data is None:
             self.__data = self._create_data()
+            self.__frame_cache.clear()
         return self.__data
 
+    def __read_metadata(self):
+        """Read the headers of all the frames the first time metadata are
+        requested"""
+        if not self.__metadata_is_read:
+            with self.__frame_lock:
+                if not self.__metadata_is_read:
+                    self._read(self.__fabio_file)
+                    self.__metadata_is_read = True
+
     def get_keys(self, kind):
         """Get all available keys according to a kind of metadata.
 
         :rtype: list
         """
+        self.__read_metadata()
         return self.__get_dict(kind).keys()
 
     def get_value(self, kind, name):
@@ -296,6 +531,7 @@ class FabioReader(object):
 
         :rtype: numpy.ndarray
         """
+        self.__read_metadata()
         value = self.__get_dict(kind)[name]
         if not isinstance(value, numpy.ndarray):
             value = self._convert_metadata_vector(value)
@@ -343,6 +579,10 @@ class FabioReader(object):
     def _convert_metadata_vector(self, values):
         """Convert a list of numpy data into a numpy array with the better
         fitting type."""
+        result = self._convert_scalar_vector(values)
+        if result is not None:
+            return result
+
         converted = []
         types = set([])
         has_none = False
@@ -392,6 +632,63 @@ class FabioReader(object):
 
         return numpy.array(result, dtype=result_type)
 
+    def _convert_scalar_vector(self, values):
+        """Convert at once a list of strings containing a number per frame.
+
+        The whole column is converted with numpy, with the same resulting
+        type as converting each value with :meth:`_convert_scalar_value`.
+
+        :param list values: Value of a key for each frame, None if the key
+            is missing in the frame
+        :return: The converted values, or None if the values are not all
+            numbers, they have to be converted one by one.
+        :rtype: Union[numpy.ndarray,None]
+        """
+        missing = numpy.array([v is None for v in values], dtype=bool)
+        strings = [v for v in values if v is not None]
+        if len(strings) == 0:
+            return None
+        if not all(isinstance(v, six.string_types) for v in strings):
+            return None
+        strings = numpy.array(strings)
+        if strings.dtype.kind not in "SU":
+            return None
+        if numpy.any(numpy.char.find(strings, " ") >= 0):
+            # lists of values
+            return None
+
+        try:
+            # check that all values are numbers
+            strings.astype(numpy.float64)
+            is_int = numpy.char.isdigit(numpy.char.lstrip(strings, "+-"))
+            types = []
+            if numpy.any(is_int):
+                ints = strings[is_int].astype(numpy.int64)
+                types.append(numpy.min_scalar_type(ints.min()))
+                types.append(numpy.min_scalar_type(ints.max()))
+            if not numpy.all(is_int):
+                # same precision rule as _convert_scalar_value
+                digits = numpy.char.str_len(strings[~is_int]).max() - 1
+                if digits <= 7:
+                    types.append(numpy.dtype(numpy.float32))
+                elif digits <= 16 or not hasattr(numpy, "float128"):
+                    types.append(numpy.dtype(numpy.float64))
+                else:
+                    types.append(numpy.dtype(numpy.float128))
+            result_type = numpy.result_type(*types)
+            converted = strings.astype(result_type)
+        except (ValueError, OverflowError):
+            return None
+
+        if not numpy.any(missing):
+            return converted
+
+        result = numpy.empty(len(values), dtype=result_type)
+        result[~missing] = converted
+        # Fix missing data according to the array type
+        result[missing] = numpy.nan if result_type.kind == "f" else 0
+        return result
+
     def _convert_value(self, value):
         """Convert a string into a numpy object (scalar or array).
 
@@ -532,6 +829,20 @@ class EdfFabioReader(FabioReader):
             return
         FabioReader._read_key(self, frame_id, name, value)
 
+    def _get_frame_shape(self, frame_id):
+        """Overwrite the method to read the shape from the ``Dim_i`` keys
+        of the frame header."""
+        header = self._get_frame(frame_id).header
+        shape = []
+        while "Dim_%d" % (len(shape) + 1) in header:
+            try:
+                shape.insert(0, int(header["Dim_%d" % (len(shape) + 1)]))
+            except ValueError:
+                return None
+        if not shape:
+            return None
+        return tuple(shape)
+
     def _get_mnemonic_key(self, base_key, header):
         mnemonic_values_key = base_key + "_mne"
         mnemonic_values = header.get(mnemonic_values_key, "")
@@ -639,7 +950,13 @@ class File(commonh5.File):
     """Class which handle a fabio image as a mimick of a h5py.File.
     """
 
-    def __init__(self, file_name=None, fabio_image=None):
+    def __init__(self, file_name=None, fabio_image=None, prefetch=False):
+        """
+        :param str file_name: Name of the file to open
+        :param FabioImage fabio_image: Already opened fabio image
+        :param bool prefetch: If true, browsing frames one after the other
+            reads the next frame in background
+        """
         self.__must_be_closed = False
         if file_name is not None and fabio_image is not None:
             raise TypeError("Parameters file_name and fabio_image are mutually exclusive.")
@@ -655,6 +972,7 @@ class File(commonh5.File):
                  "creator": "silx %s" % silx_version}
         commonh5.File.__init__(self, name=file_name, attrs=attrs)
         self.__fabio_reader = self.create_fabio_reader(self.__fabio_image)
+        self.__fabio_reader.prefetch = prefetch
         scan = self.create_scan_group(self.__fabio_image, self.__fabio_reader)
         self.add_node(scan)
 
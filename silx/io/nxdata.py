@@ -29,7 +29,12 @@ See http://download.nexusformat.org/sphinx/classes/base_classes/NXdata.html
 
 """
 import logging
+import weakref
 import numpy
+try:
+    import h5py
+except ImportError:
+    h5py = None
 from .utils import is_dataset, is_group
 from silx.third_party import six
 
@@ -45,6 +50,19 @@ _INTERPDIM = {"scalar": 0,
 attribute.
 """
 
+_validity_cache = weakref.WeakKeyDictionary()
+"""Result of :func:`is_valid_nxdata` for the groups of read-only commonh5
+files"""
+
+_h5py_validity_cache = {}
+"""Result of :func:`is_valid_nxdata` for the groups of read-only h5py files.
+
+h5py creates new objects for each access to a group, so the results are
+stored by group name, for the last opened file with a given name:
+``{filename: (fileno, {group_name: result})}``. Opening the file again gives
+it a new number, which invalidates the results.
+"""
+
 
 def _nxdata_warning(msg):
     """Log a warning message prefixed with
@@ -81,6 +99,51 @@ def get_attr_as_string(item, attr_name, default=None):
             return attr
 
 
+def _get_axis_size(axis):
+    """Returns the number of elements of an axis dataset, restricted to the
+    range defined by its @first_good and @last_good attributes.
+
+    Only the metadata of the dataset is read.
+
+    :param axis: h5py-like dataset
+    :rtype: int
+    """
+    shape = axis.shape
+    size = 1
+    for dim in shape[1:]:
+        size *= dim
+    if len(shape) == 0:
+        return size
+    length = shape[0]
+    if "first_good" in axis.attrs or "last_good" in axis.attrs:
+        fg_idx = axis.attrs.get("first_good", 0)
+        lg_idx = axis.attrs.get("last_good", length - 1)
+        length = len(range(length)[fg_idx:lg_idx + 1])
+    return size * length
+
+
+def _get_validity_cache(group):
+    """Returns the cache containing the result of :func:`is_valid_nxdata` for
+    a group, and the key of the group in this cache.
+
+    :param group: h5py-like group
+    :return: The cache and the key, or None if the file containing the group
+        can be modified.
+    :rtype: Union[tuple,None]
+    """
+    f = group.file
+    if f is None or getattr(f, "mode", None) != "r":
+        return None
+    if h5py is None or not isinstance(f, h5py.File):
+        return _validity_cache, group
+    fileno = f.id.fileno
+    entry = _h5py_validity_cache.get(f.filename)
+    if entry is None or entry[0] != fileno:
+        entry = fileno, {}
+        _h5py_validity_cache[f.filename] = entry
+    return entry[1], group.name
+
+
 def is_valid_nxdata(group):   # noqa
     """Check if a h5py group is a **valid** NX_data group.
 
@@ -90,6 +153,9 @@ def is_valid_nxdata(group):   # noqa
     Else, warning messages are logged to troubleshoot malformed NXdata groups
     prior to returning *False*.
 
+    Only attributes, shapes and types are read. The result is cached for the
+    groups of files opened in read-only mode.
+
     :param group: h5py-like group
     :return: True if this NXdata group is valid.
     :raise: TypeError if group is not a h5py group, a spech5 group,
@@ -99,6 +165,29 @@ def is_valid_nxdata(group):   # noqa
         raise TypeError("group must be a h5py-like group")
     if get_attr_as_string(group, "NX_class") != "NXdata":
         return False
+
+    cache = _get_validity_cache(group)
+    if cache is not None:
+        cache, key = cache
+        try:
+            return cache[key]
+        except (KeyError, TypeError):
+            pass
+    result = _is_valid_nxdata(group)
+    if cache is not None:
+        try:
+            cache[key] = result
+        except TypeError:
+            # the group can't be used as a key of a weak dictionary
+            pass
+    return result
+
+
+def _is_valid_nxdata(group):   # noqa
+    """Check the content of a group providing *@NX_class=NXdata*.
+
+    See :func:`is_valid_nxdata`.
+    """
     if "signal" not in group.attrs:
         _logger.warning("NXdata group does not define a signal attr.")
         return False
@@ -109,7 +198,8 @@ def is_valid_nxdata(group):   # noqa
             "Cannot find signal dataset '%s' in NXdata group" % signal_name)
         return False
 
-    ndim = len(group[signal_name].shape)
+    signal = group[signal_name]
+    ndim = len(signal.shape)
 
     if "axes" in group.attrs:
         axes_names = get_attr_as_string(group, "axes")
@@ -127,7 +217,7 @@ def is_valid_nxdata(group):   # noqa
         # case of less axes than dimensions: number of axes must match
         # dimensionality defined by @interpretation
         if ndim > len(axes_names):
-            interpretation = get_attr_as_string(group[signal_name], "interpretation")
+            interpretation = get_attr_as_string(signal, "interpretation")
             if interpretation is None:
                 interpretation = get_attr_as_string(group, "interpretation")
             if interpretation is None:
@@ -149,7 +239,7 @@ def is_valid_nxdata(group):   # noqa
         # Test consistency of @uncertainties
         uncertainties_names = get_attr_as_string(group, "uncertainties")
         if uncertainties_names is None:
-            uncertainties_names = get_attr_as_string(group[signal_name], "uncertainties")
+            uncertainties_names = get_attr_as_string(signal, "uncertainties")
         if isinstance(uncertainties_names, str):
             uncertainties_names = [uncertainties_names]
         if uncertainties_names is not None:
@@ -161,7 +251,7 @@ def is_valid_nxdata(group):   # noqa
         # Test individual axes
         is_scatter = True   # true if all axes have the same size as the signal
         signal_size = 1
-        for dim in group[signal_name].shape:
+        for dim in signal.shape:
             signal_size *= dim
         polynomial_axes_names = []
         for i, axis_name in enumerate(axes_names):
@@ -170,12 +260,13 @@ def is_valid_nxdata(group):   # noqa
             if axis_name not in group or not is_dataset(group[axis_name]):
                 _nxdata_warning("Could not find axis dataset '%s'" % axis_name)
                 return False
+            axis = group[axis_name]
 
             axis_size = 1
-            for dim in group[axis_name].shape:
+            for dim in axis.shape:
                 axis_size *= dim
 
-            if len(group[axis_name].shape) != 1:
+            if len(axis.shape) != 1:
                 # too me, it makes only sense to have a n-D axis if it's total
                 # size is exactly the signal's size (weird n-d scatter)
                 if axis_size != signal_size:
@@ -185,12 +276,12 @@ def is_valid_nxdata(group):   # noqa
                 axis_len = axis_size
             else:
                 # for a  1-d axis,
-                fg_idx = group[axis_name].attrs.get("first_good", 0)
-                lg_idx = group[axis_name].attrs.get("last_good", len(group[axis_name]) - 1)
+                fg_idx = axis.attrs.get("first_good", 0)
+                lg_idx = axis.attrs.get("last_good", axis.shape[0] - 1)
                 axis_len = lg_idx + 1 - fg_idx
 
             if axis_len != signal_size:
-                if axis_len not in group[signal_name].shape + (1, 2):
+                if axis_len not in signal.shape + (1, 2):
                     _nxdata_warning(
                         "Axis %s number of elements does not " % axis_name +
                         "correspond to the length of any signal dimension,"
@@ -213,7 +304,7 @@ def is_valid_nxdata(group):   # noqa
             if errors_name not in group and uncertainties_names is not None:
                 errors_name = uncertainties_names[i]
                 if errors_name in group and axis_name not in polynomial_axes_names:
-                    if group[errors_name].shape != group[axis_name].shape:
+                    if group[errors_name].shape != axis.shape:
                         _nxdata_warning(
                             "Errors '%s' does not have the same " % errors_name +
                             "dimensions as axis '%s'." % axis_name)
@@ -221,7 +312,7 @@ def is_valid_nxdata(group):   # noqa
 
     # test dimensions of errors associated with signal
     if "errors" in group and is_dataset(group["errors"]):
-        if group["errors"].shape != group[signal_name].shape:
+        if group["errors"].shape != signal.shape:
             _nxdata_warning("Dataset containing standard deviations must " +
                             "have the same dimensions as the signal.")
             return False
@@ -240,6 +331,7 @@ class NXdata(object):
 
         self._is_scatter = None
         self._axes = None
+        self._axes_datasets = None
 
         self.group = group
         """h5py-like group object compliant with NeXus NXdata specification.
@@ -273,7 +365,7 @@ class NXdata(object):
                 self.axes_names.append(dsname)
 
         # excludes scatters
-        self.signal_is_1d = self.signal_is_1d and len(self.axes) <= 1  # excludes n-D scatters
+        self.signal_is_1d = self.signal_is_1d and len(self._get_axes_datasets()) <= 1  # excludes n-D scatters
 
     @property
     def interpretation(self):
@@ -346,13 +438,36 @@ class NXdata(object):
         if self._axes is not None:
             # use cache
             return self._axes
+        axes = list(self._get_axes_datasets())
+        # keep only good range of axis data
+        for i, axis in enumerate(axes):
+            if axis is None:
+                continue
+            if "first_good" not in axis.attrs and "last_good" not in axis.attrs:
+                continue
+            fg_idx = axis.attrs.get("first_good", 0)
+            lg_idx = axis.attrs.get("last_good", len(axis) - 1)
+            axes[i] = axis[fg_idx:lg_idx + 1]
+
+        self._axes = axes
+        return self._axes
+
+    def _get_axes_datasets(self):
+        """Returns the list of axes datasets, like :attr:`axes` but without
+        reading the good range of the axes.
+
+        :rtype: list[Dataset or None]
+        """
+        if self._axes_datasets is not None:
+            # use cache
+            return self._axes_datasets
         ndims = len(self.signal.shape)
         axes_names = get_attr_as_string(self.group, "axes")
         interpretation = self.interpretation
 
         if axes_names is None:
-            self._axes = [None for _i in range(ndims)]
-            return self._axes
+            self._axes_datasets = [None for _i in range(ndims)]
+            return self._axes_datasets
 
         if isinstance(axes_names, str):
             axes_names = [axes_names]
@@ -380,18 +495,9 @@ class NXdata(object):
                     axes.append(self.group[axis_n])
                 else:
                     axes.append(None)
-        # keep only good range of axis data
-        for i, axis in enumerate(axes):
-            if axis is None:
-                continue
-            if "first_good" not in axis.attrs and "last_good" not in axis.attrs:
-                continue
-            fg_idx = axis.attrs.get("first_good", 0)
-            lg_idx = axis.attrs.get("last_good", len(axis) - 1)
-            axes[i] = axis[fg_idx:lg_idx + 1]
 
-        self._axes = axes
-        return self._axes
+        self._axes_datasets = axes
+        return self._axes_datasets
 
     @property
     def axes_dataset_names(self):
@@ -522,22 +628,20 @@ class NXdata(object):
             sigsize = 1
             for dim in self.signal.shape:
                 sigsize *= dim
-            for axis in self.axes:
+            for axis in self._get_axes_datasets():
                 if axis is None:
                     continue
-                axis_size = 1
-                for dim in axis.shape:
-                    axis_size *= dim
+                axis_size = _get_axis_size(axis)
                 self._is_scatter = self._is_scatter and (axis_size == sigsize)
         return self._is_scatter
 
     @property
     def is_x_y_value_scatter(self):
         """True if this is a scatter with a signal and two axes."""
-        return self.is_scatter and len(self.axes) == 2
+        return self.is_scatter and len(self._get_axes_datasets()) == 2
 
     # we currently have no widget capable of plotting 4D data
     @property
     def is_unsupported_scatter(self):
         """True if this is a scatter with a signal and more than 2 axes."""
-        return self.is_scatter and len(self.axes) > 2
+        return self.is_scatter and len(self._get_axes_datasets()) > 2
@@ -26,12 +26,14 @@ This module contains wrapper from file format to h5py. The exposed layout is
 as close as possible to the original file format.
 """
 import numpy
+import struct
+import zipfile
 from . import commonh5
 import logging
 
 __authors__ = ["V. Valls"]
 __license__ = "MIT"
-__date__ = "21/09/2017"
+__date__ = "18/10/2017"
 
 
 _logger = logging.getLogger(__name__)
@@ -50,22 +52,108 @@ class _FreeDataset(commonh5.Dataset):
             _logger.warning(msg)
 
 
+class _MappedNpzMember(commonh5.LazyLoadableDataset, _FreeDataset):
+    """Dataset memory-mapping an uncompressed array stored in a `npz` file.
+
+    The array is only mapped when the data is accessed, then slicing the
+    dataset only reads the requested part of the file.
+
+    :param str filename: Name of the `npz` file
+    :param zipfile.ZipInfo info: Description of the array in the archive
+    """
+
+    _LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+    """Zip local file header, followed by the file name and extra field"""
+
+    def __init__(self, filename, info):
+        commonh5.LazyLoadableDataset.__init__(self, None)
+        self.__filename = filename
+        self.__info = info
+
+    def _create_data(self):
+        with open(self.__filename, "rb") as f:
+            f.seek(self.__info.header_offset)
+            header = self._LOCAL_HEADER.unpack(
+                f.read(self._LOCAL_HEADER.size))
+            name_length, extra_length = header[-2:]
+            f.seek(name_length + extra_length, 1)
+            return _memmap_npy(f, self.__filename)
+
+
+def _memmap_npy(f, filename):
+    """Memory-map the array stored as `npy` at the current position of the
+    file object.
+
+    Arrays which can't be mapped (Python objects, empty arrays) and arrays
+    stored with an unknown version of the format are read, with the numpy
+    defaults for pickled objects.
+
+    :param file f: File object of `filename`, opened in binary mode
+    :param str filename: Name of the file
+    :rtype: numpy.ndarray
+    """
+    start = f.tell()
+    version = numpy.lib.format.read_magic(f)
+    try:
+        if version == (1, 0):
+            header = numpy.lib.format.read_array_header_1_0(f)
+        elif version in ((2, 0), (3, 0)):
+            # Version 3.0 only differs from 2.0 by the header encoding
+            # (utf8 instead of latin1)
+            header = numpy.lib.format.read_array_header_2_0(f)
+        else:
+            header = None
+    except ValueError:
+        header = None
+    if header is None:
+        f.seek(start)
+        return numpy.lib.format.read_array(f)
+
+    shape, fortran_order, dtype = header
+    if dtype.hasobject or numpy.prod(shape, dtype=numpy.int64) == 0:
+        f.seek(start)
+        return numpy.lib.format.read_array(f)
+    return numpy.memmap(filename, dtype=dtype, mode="r", shape=shape,
+                        order="F" if fortran_order else "C",
+                        offset=f.tell())
+
+
 class NumpyFile(commonh5.File):
     """
     Expose a numpy file `npy`, or `npz` as an h5py.File-like.
 
+    Arrays of `npy` files and uncompressed arrays of `npz` files are
+    memory-mapped, they are not read into memory until they are sliced.
+
     :param str name: Filename to load
     """
     def __init__(self, name=None):
         commonh5.File.__init__(self, name=name, mode="w")
-        np_file = numpy.load(name)
+        try:
+            np_file = numpy.load(name, mmap_mode="r")
+        except ValueError:
+            # Arrays of Python objects can't be memory-mapped
+            np_file = numpy.load(name)
         if hasattr(np_file, "close"):
             # For npz (created using  by numpy.savez, numpy.savez_compressed)
-            for key, value in np_file.items():
-                self[key] = _FreeDataset(None, data=value)
+            for key in np_file.files:
+                info = self._get_zip_info(np_file, key)
+                if info is not None and info.compress_type == zipfile.ZIP_STORED:
+                    self[key] = _MappedNpzMember(name, info)
+                else:
+                    self[key] = _FreeDataset(None, data=np_file[key])
             np_file.close()
         else:
             # For npy (created using numpy.save)
             value = np_file
             dataset = _FreeDataset("data", data=value)
             self.add_node(dataset)
+
+    @staticmethod
+    def _get_zip_info(np_file, key):
+        """Returns the description of an array stored in a `npz` file, else
+        None if the member is not an array in the `npy` format."""
+        try:
+            return np_file.zip.getinfo(key + ".npy")
+        except (AttributeError, KeyError):
+            return None
@@ -112,6 +112,7 @@ import logging
 import numpy
 import re
 import sys
+import time
 
 _logger = logging.getLogger(__name__)
 
@@ -232,6 +233,7 @@ class MCA(object):
     """
     def __init__(self, scan):
         self._scan = scan
+        self._array = None
 
         # Header dict
         self._header = scan.mca_header_dict
@@ -320,6 +322,36 @@ class MCA(object):
         for mca_index in range(len(self)):
             yield self._scan._specfile.get_mca(self._scan.index, mca_index)
 
+    def as_array(self, number_of_analysers=1, dtype=numpy.float64):
+        """Return all MCA spectra of the scan as a single 3D array.
+
+        The spectra are multiplexed in the file: with 3 analysers, the
+        spectra of the first one are ``mca[0], mca[3], mca[6]…``.
+        The array has the shape ``(number of points, number of analysers,
+        number of channels)``, so that the spectra of one analyser are
+        the strided view ``array[:, analyser_index, :]``.
+
+        The array is cached and read-only, it is only parsed again if it
+        is requested with a different shape or dtype.
+
+        :param int number_of_analysers: Number of MCA analysers
+        :param dtype: Data type of the array
+        :return: MCA spectra
+        :rtype: 3D numpy array
+        :raise ValueError: if the number of spectra is not a multiple of
+            the number of analysers
+        """
+        dtype = numpy.dtype(dtype)
+        array = self._array
+        if (array is None or array.shape[1] != number_of_analysers or
+                array.dtype != dtype):
+            array = self._scan._specfile.get_mca_array(self._scan.index,
+                                                       number_of_analysers,
+                                                       dtype)
+            array.flags.writeable = False
+            self._array = array
+        return array
+
 
 def _add_or_concatenate(dictionary, key, value):
     """If key doesn't exist in dictionary, create a new ``key: value`` pair.
@@ -590,6 +622,17 @@ class Scan(object):
         :return: Line data as a 1D array of doubles
         :rtype: numpy.ndarray
         """
+        # Use the cached data array rather than parsing the data block
+        # again for each column
+        if label in self._labels:
+            column = self._labels.index(label)
+            if column < self.data.shape[0]:
+                # Copy to not expose the cached data array
+                return self.data[column].copy()
+            if self.data.size == 0:
+                _logger.warning("Cannot get data column %s in scan %d.%d",
+                                label, self.number, self.order)
+                return numpy.empty((0, ), numpy.double)
         try:
             ret = self._specfile.data_column_by_name(self._index, label)
         except SfErrLineNotFound:
@@ -645,6 +688,12 @@ cdef class SpecFile(object):
     """
 
     :param filename: Path of the SpecFile to read
+    :param index_filename: Optional path of a file used as a persistent
+        cache of the scan index. If this file exists and matches the size
+        and modification time of the SpecFile, the scan index is read from
+        it instead of being rebuilt by reading the whole SpecFile. If the
+        SpecFile has been appended to since the cache was written, only the
+        new bytes are read and the cache is updated.
 
     This class wraps the main data and header access functions of the C
     SpecFile library.
@@ -654,13 +703,19 @@ cdef class SpecFile(object):
         specfile_wrapper.SpecFileHandle *handle
         str filename
 
-    def __cinit__(self, filename):
+    def __cinit__(self, filename, index_filename=None):
         cdef int error = SF_ERR_NO_ERRORS
         self.handle = NULL
 
         if is_specfile(filename):
             filename = _string_to_char_star(filename)
-            self.handle = specfile_wrapper.SfOpen(filename, &error)
+            if index_filename is None:
+                self.handle = specfile_wrapper.SfOpen(filename, &error)
+            else:
+                index_filename = _string_to_char_star(index_filename)
+                self.handle = specfile_wrapper.SfOpenWithIndex(filename,
+                                                               index_filename,
+                                                               &error)
             if error:
                 self._handle_error(error)
         else:
@@ -668,7 +723,7 @@ cdef class SpecFile(object):
             # this causes the destructor to be called
             self._handle_error(SF_ERR_FILE_OPEN)
 
-    def __init__(self, filename):
+    def __init__(self, filename, index_filename=None):
         if not isinstance(filename, str):
             # encode unicode to str in python 2
             if sys.version_info[0] < 3:
@@ -743,6 +798,107 @@ cdef class SpecFile(object):
 
         return Scan(self, scan_index)
 
+    def refresh(self):
+        """Update the scan index with the data appended to the file since it
+        was opened or last refreshed.
+
+        SPEC files are only appended to during an acquisition. Only the
+        appended bytes and the last scan, which may have been extended,
+        are read again. New scans are then available through
+        :meth:`__getitem__` and :meth:`keys`, and :class:`Scan` objects
+        created after this call expose the new data lines.
+
+        :return: ``True`` if the file was modified, else ``False``
+        :rtype: bool
+        :raise SfErrFileRead: if the file was truncated
+        """
+        cdef:
+            int error = SF_ERR_NO_ERRORS
+
+        modified = specfile_wrapper.SfUpdate(self.handle, &error)
+        self._handle_error(error)
+        return bool(modified)
+
+    def follow(self, poll_interval=1., timeout=None):
+        """Generator yielding the data lines appended to the file while it
+        is being written (*tail-follow* mode).
+
+        The file is polled every *poll_interval* seconds. When complete
+        data lines have been appended, the scan index is refreshed (see
+        :meth:`refresh`) and a ``(scan_index, lines)`` tuple is yielded
+        for each scan which received new lines, ``lines`` being a 2D
+        numpy array with one row per data line.
+        Only the bytes appended since the last poll are read and parsed.
+
+        Only lines appended after the generator is started are yielded::
+
+            for scan_index, lines in sf.follow(poll_interval=0.1):
+                print(sf[scan_index].labels, lines[-1])
+
+        :param float poll_interval: Time in seconds between two polls
+        :param timeout: Stop iterating if nothing is appended to the file
+            during this time (in seconds). Default is to never stop.
+        :type timeout: float or None
+        """
+        scan_index = len(self) - 1
+
+        # start after the last complete line of the file
+        offset = os.path.getsize(self.filename)
+        with open(self.filename, "rb") as f:
+            f.seek(max(0, offset - 65536))
+            tail = f.read()
+        last_line = tail[tail.rfind(b"\n") + 1:]
+        offset -= len(last_line)
+        if last_line.startswith(b"#S"):
+            # incomplete scan header line already indexed
+            scan_index -= 1
+
+        pending = b""
+        in_mca = False
+        last_update = time.time()
+        while True:
+            with open(self.filename, "rb") as f:
+                f.seek(offset)
+                chunk = f.read()
+            offset += len(chunk)
+            complete, _sep, pending = (pending + chunk).rpartition(b"\n")
+
+            # group new data lines by scan
+            new_lines = []
+            if _sep:
+                for line in complete.split(b"\n"):
+                    if in_mca:
+                        # continuation of a multi-line MCA spectrum
+                        in_mca = line.rstrip().endswith(b"\\")
+                    elif line.startswith(b"#S"):
+                        scan_index += 1
+                    elif line.startswith(b"@"):
+                        in_mca = line.rstrip().endswith(b"\\")
+                    elif line.strip() and not line.startswith(b"#"):
+                        if scan_index < 0:
+                            continue
+                        try:
+                            values = [float(value) for value in line.split()]
+                        except ValueError:
+                            _logger.warning("Cannot parse data line %s",
+                                            line.decode("ascii", "replace"))
+                            continue
+                        if (new_lines and new_lines[-1][0] == scan_index and
+                                len(new_lines[-1][1][0]) == len(values)):
+                            new_lines[-1][1].append(values)
+                        else:
+                            new_lines.append((scan_index, [values]))
+
+            if _sep:
+                last_update = time.time()
+                self.refresh()
+                for index, lines in new_lines:
+                    yield index, numpy.array(lines, dtype=numpy.double)
+            elif timeout is not None and time.time() - last_update >= timeout:
+                return
+
+            time.sleep(poll_interval)
+
     def keys(self):
         """Returns list of scan keys (eg ``['1.1', '2.1',...]``).
 
@@ -881,36 +1037,29 @@ cdef class SpecFile(object):
         :rtype: numpy.ndarray
         """
         cdef:
-            double** mydata
-            long* data_info
-            int i, j
+            long nlines, ncolumns = 0
             int error = SF_ERR_NO_ERRORS
-            long nlines, ncolumns, regular
 
-        sfdata_error = specfile_wrapper.SfData(self.handle,
-                                               scan_index + 1,
-                                               &mydata,
-                                               &data_info,
-                                               &error)
+        # First pass counts lines and columns, second pass parses the
+        # numbers directly into the array buffer
+        nlines = specfile_wrapper.SfDataShape(self.handle,
+                                              scan_index + 1,
+                                              &ncolumns,
+                                              &error)
         self._handle_error(error)
 
-        if <long>data_info != 0:
-            nlines = data_info[0]
-            ncolumns = data_info[1]
-            regular = data_info[2]
-        else:
-            nlines = 0
-            ncolumns = 0
-            regular = 0
+        if nlines <= 0 or ncolumns <= 0:
+            return numpy.empty((0, 0), dtype=numpy.double)
 
         cdef numpy.ndarray ret_array = numpy.empty((nlines, ncolumns),
                                                    dtype=numpy.double)
-        for i in range(nlines):
-            for j in range(ncolumns):
-                ret_array[i, j] = mydata[i][j]
-
-        specfile_wrapper.freeArrNZ(<void ***>&mydata, nlines)
-        free(data_info)
+        nlines = specfile_wrapper.SfDataFill(self.handle,
+                                             scan_index + 1,
+                                             <double*>ret_array.data,
+                                             nlines,
+                                             ncolumns,
+                                             &error)
+        self._handle_error(error)
         return ret_array
 
     def data_column_by_name(self, scan_index, label):
@@ -1204,6 +1353,71 @@ cdef class SpecFile(object):
                                "(SfNoMca returned -1)")
         return num_mca
 
+    def get_mca_array(self, scan_index, number_of_analysers=1,
+                      dtype=numpy.float64):
+        """Return all MCA spectra of a scan as a 3D array.
+
+        All spectra are parsed in a single pass directly into the array
+        buffer, for ``float32`` and ``float64`` dtypes. Other dtypes are
+        converted from a ``float64`` array.
+        Spectra shorter than the longest one are padded with zeros.
+
+        :param scan_index: Unique scan index between ``0`` and
+            ``len(self)-1``.
+        :type scan_index: int
+        :param int number_of_analysers: Number of MCA analysers. The
+            spectra of the analyser ``i`` for point ``j`` is the spectrum
+            ``j * number_of_analysers + i`` in the scan.
+        :param dtype: Data type of the array
+        :return: MCA spectra, with the shape ``(number of points, number of
+            analysers, number of channels)``
+        :rtype: 3D numpy array
+        :raise ValueError: if the number of spectra is not a multiple of
+            the number of analysers
+        """
+        cdef:
+            int error = SF_ERR_NO_ERRORS
+            long nspectra, nchannels = 0
+            numpy.ndarray ret_array
+
+        dtype = numpy.dtype(dtype)
+        if number_of_analysers < 1:
+            raise ValueError("Number of analysers must be at least 1")
+
+        nspectra = specfile_wrapper.SfMcaShape(self.handle,
+                                               scan_index + 1,
+                                               &nchannels,
+                                               &error)
+        self._handle_error(error)
+        nspectra = max(nspectra, 0)
+
+        if nspectra % number_of_analysers != 0:
+            raise ValueError(
+                "Number of MCA spectra (%d) is not a multiple of the number "
+                "of analysers (%d)" % (nspectra, number_of_analysers))
+
+        if dtype in (numpy.dtype(numpy.float32), numpy.dtype(numpy.float64)):
+            fill_dtype = dtype
+        else:
+            fill_dtype = numpy.dtype(numpy.float64)
+        ret_array = numpy.empty((nspectra, nchannels), dtype=fill_dtype)
+
+        if ret_array.size:
+            specfile_wrapper.SfMcaFill(self.handle,
+                                       scan_index + 1,
+                                       ret_array.data,
+                                       fill_dtype.itemsize,
+                                       nspectra,
+                                       nchannels,
+                                       &error)
+            self._handle_error(error)
+
+        if fill_dtype != dtype:
+            ret_array = ret_array.astype(dtype)
+        return ret_array.reshape((nspectra // number_of_analysers,
+                                  number_of_analysers,
+                                  nchannels))
+
     def mca_calibration(self, scan_index):
         """Return MCA calibration in the form :math:`a + b x + c x²`
 
@@ -113,6 +113,8 @@ typedef struct _SfCursor {
     long  int data;        /* data flag */
     long  int file_header; /* address of file header for this scan */
     long  int fileh_size;  /* size of it */
+    long  int lastline;    /* beginning of the last line indexed */
+    long  int lineno;      /* nb of lines indexed */
 } SfCursor;
 
 
@@ -120,6 +122,8 @@ typedef struct _SpecFile{
   int             fd;
   long            m_time;
   char           *sfname;
+  char           *idxname;
+  long            filesize;
   struct _ListHeader    list;
   long int        no_scans;
   ObjectList     *current;
@@ -171,6 +175,8 @@ typedef struct _SpecScan {
  * init
  */
 DllExport extern    SpecFile  *SfOpen        ( char *name, int *error );
+DllExport extern    SpecFile  *SfOpenWithIndex ( char *name, char *idxname,
+                                                int *error );
 DllExport extern    short      SfUpdate      ( SpecFile *sf,int *error );
 DllExport extern    int        SfClose       ( SpecFile *sf );
 
@@ -245,6 +251,11 @@ DllExport extern  long  SfDataCol       ( SpecFile *sf, long index, long col,
                                              double **data_col, int *error );
 DllExport extern  long  SfDataColByName ( SpecFile *sf, long index,
                                   char *label, double **data_col, int *error );
+DllExport extern  long  SfDataShape     ( SpecFile *sf, long index,
+                                          long *cols, int *error );
+DllExport extern  long  SfDataFill      ( SpecFile *sf, long index,
+                                          double *data, long rows, long cols,
+                                          int *error );
 
   /*
    * MCA functions
@@ -252,6 +263,11 @@ DllExport extern  long  SfDataColByName ( SpecFile *sf, long index,
 DllExport extern long SfNoMca   ( SpecFile *sf, long index, int *error );
 DllExport extern int  SfGetMca  ( SpecFile *sf, long index, long mcano,
                                           double **retdata, int *error );
+DllExport extern long SfMcaShape( SpecFile *sf, long index, long *nchannels,
+                                          int *error );
+DllExport extern long SfMcaFill ( SpecFile *sf, long index, void *data,
+                                  int itemsize, long nspectra, long nchannels,
+                                          int *error );
 DllExport extern long SfMcaCalib ( SpecFile *sf, long index, double **calib,
                                           int *error );
 
@@ -71,11 +71,9 @@
 #include <SpecFileP.h>
 #include <locale_management.h>
 
-#ifndef _GNU_SOURCE
-#ifdef PYMCA_POSIX
+#if defined(_GNU_SOURCE) || defined(PYMCA_POSIX) || defined(SPECFILE_POSIX)
 #include <locale.h>
 #endif
-#endif
 
 #include <ctype.h>
 /*
@@ -103,6 +101,15 @@ DllExport long SfDataCol      ( SpecFile *sf, long index, long col,
                                           double **data_col, int *error );
 DllExport long SfDataColByName( SpecFile *sf, long index,
                                   char *label, double **data_col, int *error );
+DllExport long SfDataShape    ( SpecFile *sf, long index, long *cols,
+                                          int *error );
+DllExport long SfDataFill     ( SpecFile *sf, long index, double *data,
+                                          long rows, long cols, int *error );
+
+static char *sfNextDataLine   ( char *ptr, char *to, char **eol );
+static long  sfDataLineCols   ( char *ptr, char *eol );
+static int   sfDataBlock      ( SpecFile *sf, long index, char **from,
+                                          char **to, int *error );
 
 
 /*********************************************************************
@@ -157,6 +164,262 @@ SfNoDataLines( SpecFile *sf, long index, int *error )
 
 
 
+/*********************************************************************
+ *   Function:        long SfDataShape( sf, index, cols, error )
+ *
+ *   Description:    Gets the shape of the data array of a scan, as
+ *                   returned by SfData.
+ *                   Only counts lines and values: no number is parsed.
+ *                   Used with SfDataFill to read the data in a single
+ *                   pass into a preallocated array.
+ *
+ *   Parameters:
+ *        Input :    (1) File pointer
+ *                   (2) Index
+ *        Output:
+ *                   (3) Number of columns
+ *                   (4) error number
+ *   Returns:
+ *            Number of data lines ,
+ *            ( -1 ) => errors.
+ *   Possible errors:
+ *            SF_ERR_SCAN_NOT_FOUND
+ *            SF_ERR_MEMORY_ALLOC
+ *            SF_ERR_FILE_READ
+ *
+ *********************************************************************/
+DllExport long
+SfDataShape( SpecFile *sf, long index, long *cols, int *error )
+{
+     char *ptr, *eol, *to;
+     long  rows = 0, ncols;
+
+     *cols = 0;
+     if (sfDataBlock(sf, index, &ptr, &to, error) == -1)
+         return(-1);
+
+     for ( ; (ptr = sfNextDataLine(ptr, to, &eol)) != NULL; ptr = eol + 1) {
+         ncols = sfDataLineCols(ptr, eol);
+         if (ncols == 0)
+             continue;
+         if (*cols == 0)
+             *cols = ncols;
+        /*
+         * Lines with a different number of values are ignored
+         */
+         if (ncols == *cols)
+             rows++;
+     }
+     return(rows);
+}
+
+
+/*********************************************************************
+ *   Function:        long SfDataFill( sf, index, data, rows, cols, error )
+ *
+ *   Description:    Reads the data of a scan into a preallocated
+ *                   C-contiguous array of rows x cols doubles,
+ *                   as returned by SfDataShape.
+ *                   The numeric locale is set once for the whole block.
+ *
+ *   Parameters:
+ *        Input :    (1) File pointer
+ *                   (2) Index
+ *                   (3) Data array
+ *                   (4) Number of rows of the array
+ *                   (5) Number of columns of the array
+ *        Output:
+ *                   (6) error number
+ *   Returns:
+ *            Number of data lines read,
+ *            ( -1 ) => errors.
+ *   Possible errors:
+ *            SF_ERR_SCAN_NOT_FOUND
+ *            SF_ERR_MEMORY_ALLOC
+ *            SF_ERR_FILE_READ
+ *
+ *********************************************************************/
+DllExport long
+SfDataFill( SpecFile *sf, long index, double *data, long rows, long cols,
+            int *error )
+{
+     char    *ptr, *eol, *to;
+     char     strval[100];
+     double  *dataline;
+     long     row = 0, col, i;
+#ifdef _GNU_SOURCE
+     locale_t c_locale;
+#else
+#if defined(PYMCA_POSIX) || defined(SPECFILE_POSIX)
+     char    *currentLocaleBuffer;
+     char     localeBuffer[21];
+#endif
+#endif
+
+     if (sfDataBlock(sf, index, &ptr, &to, error) == -1)
+         return(-1);
+
+#ifdef _GNU_SOURCE
+     c_locale = newlocale(LC_NUMERIC_MASK, "C", NULL);
+#define SF_ATOF(str) strtod_l(str, NULL, c_locale)
+#else
+#if defined(PYMCA_POSIX) || defined(SPECFILE_POSIX)
+     currentLocaleBuffer = setlocale(LC_NUMERIC, NULL);
+     strcpy(localeBuffer, currentLocaleBuffer);
+     setlocale(LC_NUMERIC, "C\0");
+#endif
+#define SF_ATOF(str) atof(str)
+#endif
+
+     for ( ; row < rows && (ptr = sfNextDataLine(ptr, to, &eol)) != NULL;
+             ptr = eol + 1) {
+        /*
+         * Same tokenization as SfData: values are separated by spaces
+         * or tabs, only characters found in numbers are kept
+         */
+         dataline = data + row * cols;
+         col = 0;
+         i = 0;
+         while (ptr < eol && *ptr == ' ') ptr++;
+         for ( ; ptr < eol; ptr++) {
+             if (*ptr == ' ' || *ptr == '\t') {
+                 strval[i] = '\0';
+                 if (col < cols) dataline[col] = SF_ATOF(strval);
+                 col++;
+                 i = 0;
+                 while (ptr + 1 < eol && (*(ptr+1) == ' ' || *(ptr+1) == '\t'))
+                     ptr++;
+             } else if (isnumber(*ptr) && i < 99) {
+                 strval[i] = *ptr;
+                 i++;
+             }
+         }
+         if (i != 0) {
+             strval[i] = '\0';
+             if (col < cols) dataline[col] = SF_ATOF(strval);
+             col++;
+         }
+        /*
+         * Lines with a different number of values are ignored,
+         * they are overwritten by the next line
+         */
+         if (col > 0 && col == cols)
+             row++;
+     }
+#undef SF_ATOF
+
+#ifdef _GNU_SOURCE
+     freelocale(c_locale);
+#else
+#if defined(PYMCA_POSIX) || defined(SPECFILE_POSIX)
+     setlocale(LC_NUMERIC, localeBuffer);
+#endif
+#endif
+     return(row);
+}
+
+
+/*********************************************************************
+ *   Function:        int sfDataBlock( sf, index, from, to, error )
+ *
+ *   Description:    Gets the data block of a scan in the scan buffer.
+ *
+ *   Returns:
+ *            ( 0 ) => OK (from == to if the scan has no data)
+ *            ( -1 ) => errors.
+ *
+ *********************************************************************/
+static int
+sfDataBlock( SpecFile *sf, long index, char **from, char **to, int *error )
+{
+     SpecScan *scan;
+
+     if (index <= 0 ) {
+         *error = SF_ERR_SCAN_NOT_FOUND;
+         return(-1);
+     }
+
+     if (sfSetCurrent(sf,index,error) == -1 )
+         return(-1);
+
+     scan = (SpecScan *)sf->current->contents;
+     if (scan->data_offset == -1) {
+         *from = *to = sf->scanbuffer;
+         return(0);
+     }
+     *from = sf->scanbuffer + (scan->data_offset - scan->offset);
+     *to   = sf->scanbuffer + sf->scansize;
+     return(0);
+}
+
+
+/*********************************************************************
+ *   Function:        char *sfNextDataLine( ptr, to, eol )
+ *
+ *   Description:    Finds the next data line in the buffer, skipping
+ *                   comment lines and MCA spectra (which can be
+ *                   continued on several lines).
+ *                   A last line without end of line character is
+ *                   incomplete (file being written) and is ignored.
+ *
+ *   Returns:
+ *            Pointer to the beginning of the line, eol is set to its
+ *            end of line character.
+ *            NULL if there is no more data line.
+ *
+ *********************************************************************/
+static char *
+sfNextDataLine( char *ptr, char *to, char **eol )
+{
+     while (ptr < to) {
+         if (*ptr == '#') {
+             for ( ; ptr < to && *ptr != '\n'; ptr++);
+             ptr++;
+         } else if (*ptr == '@') {
+             for (ptr++; ptr < to && (*ptr != '\n' || *(ptr-1) == MCA_CONT);
+                     ptr++);
+             ptr++;
+         } else {
+             for (*eol = ptr; *eol < to && **eol != '\n'; (*eol)++);
+             if (*eol >= to)
+                 return(NULL);
+             return(ptr);
+         }
+     }
+     return(NULL);
+}
+
+
+/*********************************************************************
+ *   Function:        long sfDataLineCols( ptr, eol )
+ *
+ *   Description:    Counts the values in a data line, with the same
+ *                   tokenization as SfData and SfDataFill.
+ *
+ *********************************************************************/
+static long
+sfDataLineCols( char *ptr, char *eol )
+{
+     long cols = 0;
+     int  intoken = 0;
+
+     while (ptr < eol && *ptr == ' ') ptr++;
+     for ( ; ptr < eol; ptr++) {
+         if (*ptr == ' ' || *ptr == '\t') {
+             cols++;
+             intoken = 0;
+             while (ptr + 1 < eol && (*(ptr+1) == ' ' || *(ptr+1) == '\t'))
+                 ptr++;
+         } else if (isnumber(*ptr)) {
+             intoken = 1;
+         }
+     }
+     if (intoken)
+         cols++;
+     return(cols);
+}
+
+
 /*********************************************************************
  *   Function:        int SfData(sf, index, data, data_info, error)
  *
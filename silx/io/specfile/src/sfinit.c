@@ -125,6 +125,12 @@
 
 #define SF_ISFX      ".sfI"
 
+#ifdef O_BINARY
+#define SF_IDXWRITEFLAG  O_CREAT | O_WRONLY | O_TRUNC | O_BINARY
+#else
+#define SF_IDXWRITEFLAG  O_CREAT | O_WRONLY | O_TRUNC
+#endif
+
 #define SF_INIT      0
 #define SF_READY     1
 #define SF_MODIFIED  2
@@ -135,15 +141,16 @@
 
 DllExport SpecFile * SfOpen   ( char *name,int *error);
 DllExport SpecFile * SfOpen2  ( int fd, char *name,int *error);
+DllExport SpecFile * SfOpenWithIndex ( char *name, char *idxname, int *error);
 DllExport int        SfClose  ( SpecFile *sf);
 DllExport short      SfUpdate ( SpecFile *sf, int *error);
 DllExport char     * SfError  ( int error);
 
 
 #ifdef linux
-char SF_SIGNATURE[] =  "Linux 2ruru Sf2.0";
+char SF_SIGNATURE[] =  "Linux 2ruru Sf2.1";
 #else
-char SF_SIGNATURE[] =  "2ruru Sf2.0";
+char SF_SIGNATURE[] =  "2ruru Sf2.1";
 #endif
 
 /*
@@ -158,11 +165,10 @@ static void  sfSaveScan    ( SpecFile *sf, SfCursor *cursor, int *error);
 static void  sfAssignScanNumbers (SpecFile *sf);
 static void  sfReadFile    ( SpecFile *sf, SfCursor *cursor, int *error);
 static void  sfResumeRead  ( SpecFile *sf, SfCursor *cursor, int *error);
-#ifdef SPECFILE_USE_INDEX_FILE
+static SpecFile * sfOpenFd ( int fd, char *name, char *idxname, int *error);
 static short sfOpenIndex   ( SpecFile *sf, SfCursor *cursor, int *error);
 static short sfReadIndex   ( int sfi, SpecFile *sf, SfCursor *cursor, int *error);
 static void  sfWriteIndex  ( SpecFile *sf, SfCursor *cursor, int *error);
-#endif
 
 /*
  * errors
@@ -252,6 +258,62 @@ SfOpen(char *name, int *error) {
 
 DllExport SpecFile *
 SfOpen2(int fd, char *name,int *error) {
+#ifdef SPECFILE_USE_INDEX_FILE
+   SpecFile   *sf;
+   char       *idxname;
+
+   idxname = (char *)malloc(sizeof(char) * (strlen(name) + strlen(SF_ISFX) + 1));
+   if (idxname == (char *)NULL) {
+      *error = SF_ERR_MEMORY_ALLOC;
+      return ( (SpecFile *) NULL );
+   }
+   sprintf(idxname,"%s%s",name,SF_ISFX);
+   sf = sfOpenFd(fd, name, idxname, error);
+   free(idxname);
+   return(sf);
+#else
+   return(sfOpenFd(fd, name, (char *)NULL, error));
+#endif
+}
+
+
+/*********************************************************************
+ *   Function:          SpecFile *SfOpenWithIndex( name, idxname, error)
+ *
+ *   Description:       Opens connection to Spec data file.
+ *                      The index list is read from the index file
+ *                      idxname if it matches the size and modification
+ *                      time of the data file. If the data file has
+ *                      grown since the index file was written, only the
+ *                      appended part of the data file is read.
+ *                      The index file is (re)written when needed.
+ *
+ *   Parameters:
+ *              Input :
+ *                      (1) Filename
+ *                      (2) Index filename
+ *              Output:
+ *                      (3) error number
+ *   Returns:
+ *                      SpecFile pointer.
+ *                      NULL if not successful.
+ *
+ *   Possible errors:
+ *                      SF_ERR_FILE_OPEN
+ *                      SF_ERR_MEMORY_ALLOC
+ *
+ *********************************************************************/
+DllExport SpecFile *
+SfOpenWithIndex(char *name, char *idxname, int *error) {
+
+   int         fd;
+   fd   = open(name,SF_OPENFLAG);
+   return (sfOpenFd(fd, name, idxname, error));
+}
+
+
+static SpecFile *
+sfOpenFd(int fd, char *name, char *idxname, int *error) {
    SpecFile   *sf;
    short       idxret;
    SfCursor      cursor;
@@ -277,6 +339,8 @@ SfOpen2(int fd, char *name,int *error) {
    sf->fd     = fd;
    sf->m_time = mystat.st_mtime;
    sf->sfname = (char *)strdup(name);
+   sf->filesize = 0;
+   sf->idxname = (idxname == (char *)NULL) ? (char *)NULL : (char *)strdup(idxname);
 
    sf->list.first      = (ObjectList *)NULL;
    sf->list.last       = (ObjectList *)NULL;
@@ -309,17 +373,19 @@ SfOpen2(int fd, char *name,int *error) {
    cursor.what         = 0;
    cursor.data         = 0;
    cursor.file_header  = 0;
+   cursor.lastline     = 0;
+   cursor.lineno       = 0;
 
 
-#ifdef SPECFILE_USE_INDEX_FILE
   /*
    * Check if index file
    *   open it and continue from there
    */
-   idxret = sfOpenIndex(sf,&cursor,error);
-#else
-   idxret = SF_INIT;
-#endif
+   if (sf->idxname != (char *)NULL) {
+      idxret = sfOpenIndex(sf,&cursor,error);
+   } else {
+      idxret = SF_INIT;
+   }
 
    switch(idxret) {
       case SF_MODIFIED:
@@ -345,9 +411,8 @@ SfOpen2(int fd, char *name,int *error) {
    */
    sfAssignScanNumbers(sf);
 
-#ifdef SPECFILE_USE_INDEX_FILE
-   if (idxret != SF_READY) sfWriteIndex(sf,&cursor,error);
-#endif
+   if (sf->idxname != (char *)NULL && idxret != SF_READY)
+      sfWriteIndex(sf,&cursor,error);
    return(sf);
 }
 
@@ -383,6 +448,8 @@ SfClose( SpecFile *sf )
      }
 
      free ((char *)sf->sfname);
+     if (sf->idxname != NULL)
+        free ((char *)sf->idxname);
      if (sf->scanbuffer != NULL)
         free ((char *)sf->scanbuffer);
 
@@ -406,6 +473,10 @@ SfClose( SpecFile *sf )
  *
  *   Description:       Updates connection to Spec data file .
  *                      Appends to index list in memory.
+ *                      Only the bytes appended to the file since
+ *                      the last update are read (from the beginning
+ *                      of the last line indexed, which may have been
+ *                      incomplete).
  *
  *   Parameters:
  *              Input :
@@ -418,6 +489,7 @@ SfClose( SpecFile *sf )
  *
  *   Possible errors:
  *                      SF_ERR_FILE_OPEN
+ *                      SF_ERR_FILE_READ (file was truncated)
  *                      SF_ERR_MEMORY_ALLOC
  *
  *********************************************************************/
@@ -428,19 +500,35 @@ SfUpdate ( SpecFile *sf, int *error )
     long   mtime;
    /*printf("In SfUpdate\n");
    __asm("int3");*/
-    stat(sf->sfname,&mystat);
+    if (fstat(sf->fd,&mystat)) {
+       *error = SF_ERR_FILE_READ;
+       return(0);
+    }
 
     mtime = mystat.st_mtime;
 
-    if (sf->m_time != mtime)  {
+    if ((long)mystat.st_size < sf->filesize) {
+       /*
+        * Spec files are only appended to
+        */
+       *error = SF_ERR_FILE_READ;
+       return(0);
+    }
+
+    if (sf->m_time != mtime || (long)mystat.st_size != sf->filesize)  {
        sfResumeRead (sf,&(sf->cursor),error);
        sfReadFile   (sf,&(sf->cursor),error);
 
        sf->m_time = mtime;
        sfAssignScanNumbers(sf);
-#ifdef SPECFILE_USE_INDEX_FILE
-       sfWriteIndex (sf,&(sf->cursor),error);
-#endif
+
+      /*
+       * The current scan may have been extended, it must be read again
+       */
+       freeAllData(sf);
+       sf->current = (ObjectList *)NULL;
+       if (sf->idxname != (char *)NULL)
+          sfWriteIndex (sf,&(sf->cursor),error);
        return(1);
     }else{
        return(0);
@@ -521,10 +609,12 @@ sfReadFile(SpecFile *sf,SfCursor *cursor,int *error) {
   free(buffer);
 
   sf->no_scans = cursor->scanno;
+  sf->filesize = lseek(fd,0,SEEK_CUR);
  /*
   * Save last
   */
-  sfSaveScan(sf,cursor,error);
+  if (cursor->what == SCAN)
+     sfSaveScan(sf,cursor,error);
 
   return;
 
@@ -533,72 +623,118 @@ sfReadFile(SpecFile *sf,SfCursor *cursor,int *error) {
 
 static void
 sfResumeRead  ( SpecFile *sf, SfCursor *cursor, int *error) {
-    cursor->bytecnt      = cursor->cursor;
-    cursor->what         = 0;
-    cursor->hdafoffset   = -1;
-    cursor->dataoffset   = -1;
-    cursor->mcaspectra   = 0;
-    cursor->data         = 0;
-    cursor->scanno--;
-    sf->updating = 1;
+    char c;
+
+   /*
+    * Reading resumes at the beginning of the last line indexed, which
+    * may have been incomplete, so only the appended bytes are read.
+    * What was counted for this line is removed from the cursor.
+    * If the last block is a scan, it is replaced in the list.
+    */
+    if (cursor->lineno > 0) cursor->lineno--;
+
+    if (cursor->what != 0 && cursor->lastline > cursor->cursor) {
+        lseek(sf->fd,cursor->lastline,SEEK_SET);
+        if (read(sf->fd,&c,1) == 1 && c == '@' && cursor->mcaspectra > 0)
+            cursor->mcaspectra--;
+        if (cursor->dataoffset == cursor->lastline) {
+            cursor->dataoffset = -1;
+            cursor->data       = 0;
+        }
+        if (cursor->hdafoffset == cursor->lastline)
+            cursor->hdafoffset = -1;
+        if (cursor->what == SCAN)
+            sf->updating = 1;
+    } else {
+       /*
+        * The last line opens the last block: the block is read again.
+        * The scan number is read again as the #S line may have changed.
+        */
+        if (cursor->what == SCAN) {
+            cursor->scanno--;
+            sf->updating = 2;
+        }
+        cursor->lastline     = cursor->cursor;
+        cursor->what         = 0;
+        cursor->hdafoffset   = -1;
+        cursor->dataoffset   = -1;
+        cursor->mcaspectra   = 0;
+        cursor->data         = 0;
+    }
+    cursor->bytecnt = cursor->lastline;
     lseek(sf->fd,cursor->bytecnt,SEEK_SET);
     return;
 }
 
 
-#ifdef SPECFILE_USE_INDEX_FILE
 static short
 sfOpenIndex ( SpecFile *sf, SfCursor *cursor, int *error) {
-    char *idxname;
-    short namelength;
     int   sfi;
+    short ret;
 
-    namelength = strlen(sf->sfname) + strlen(SF_ISFX) + 1;
-
-    idxname = (char *)malloc(sizeof(char) * namelength);
-
-    sprintf(idxname,"%s%s",sf->sfname,SF_ISFX);
-
-    if ((sfi = open(idxname,SF_OPENFLAG)) == -1) {
-        free(idxname);
+    if ((sfi = open(sf->idxname,SF_OPENFLAG)) == -1) {
         return(SF_INIT);
     } else {
-        free(idxname);
-        return(sfReadIndex(sfi,sf,cursor,error));
+        ret = sfReadIndex(sfi,sf,cursor,error);
+        close(sfi);
+        return(ret);
     }
 }
 
-
+
 static short
 sfReadIndex   ( int sfi, SpecFile *sf, SfCursor *cursor, int *error) {
     SfCursor   filecurs;
     char       buffer[200];
+    char       header[2];
     long       bytesread,i=0;
     SpecScan   scan;
     short      modif = 0;
     long       mtime;
+    long       fsize;
+    struct stat mystat;
 
    /*
     * read signature
     */
     bytesread = read(sfi,buffer,sizeof(SF_SIGNATURE));
-    if (strcmp(buffer,SF_SIGNATURE) || bytesread == 0 ) {
+    if (bytesread != sizeof(SF_SIGNATURE) || strcmp(buffer,SF_SIGNATURE)) {
         return(SF_INIT);
     }
 
    /*
-    * read cursor and specfile structure
+    * read file size, modification time and cursor
     */
-    if ( read(sfi,&mtime,   sizeof(long)) == 0)   return(SF_INIT);
-    if ( read(sfi,&filecurs, sizeof(SfCursor)) == 0) return(SF_INIT);
+    if ( read(sfi,&mtime,   sizeof(long)) != sizeof(long))   return(SF_INIT);
+    if ( read(sfi,&fsize,   sizeof(long)) != sizeof(long))   return(SF_INIT);
+    if ( read(sfi,&filecurs, sizeof(SfCursor)) != sizeof(SfCursor)) return(SF_INIT);
 
-    if (sf->m_time != mtime)  modif = 1;
+    if (fstat(sf->fd,&mystat)) return(SF_INIT);
 
-    while(read(sfi,&scan, sizeof(SpecScan))) {
+   /*
+    * Spec files are only appended to. A smaller file is a different file.
+    */
+    if ((long)mystat.st_size < fsize) return(SF_INIT);
+
+    if (sf->m_time != mtime || (long)mystat.st_size != fsize)  modif = 1;
+
+    if (modif && (filecurs.what == SCAN || filecurs.cursor > 0)) {
+       /*
+        * Reading resumes at the beginning of the last scan or
+        * file header: it must still be there.
+        */
+        lseek(sf->fd,filecurs.cursor,SEEK_SET);
+        if (read(sf->fd,header,2) != 2 || header[0] != '#' ||
+            header[1] != ((filecurs.what == SCAN) ? 'S' : 'F'))
+            return(SF_INIT);
+    }
+
+    while(read(sfi,&scan, sizeof(SpecScan)) == sizeof(SpecScan)) {
         addToList(&(sf->list), (void *)&scan, (long)sizeof(SpecScan));
         i++;
     }
     sf->no_scans = i;
+    sf->filesize = fsize;
 
     memcpy(cursor,&filecurs,sizeof(SfCursor));
 
@@ -607,43 +743,45 @@ sfReadIndex   ( int sfi, SpecFile *sf, SfCursor *cursor, int *error) {
     return(SF_READY);
 }
 
-
+
 static void
 sfWriteIndex  ( SpecFile *sf, SfCursor *cursor, int *error) {
 
     int         fdi;
-    char       *idxname;
-    short       namelength;
+    char       *tmpname;
     ObjectList *obj;
     long        mtime;
+    long        fsize;
 
-    namelength = strlen(sf->sfname) + strlen(SF_ISFX) + 1;
-
-    idxname = (char *)malloc(sizeof(char) * namelength);
-
-    sprintf(idxname,"%s%s",sf->sfname,SF_ISFX);
+   /*
+    * The index is written to a temporary file renamed at the end,
+    * so that a concurrent reader never sees a partial index.
+    */
+    tmpname = (char *)malloc(sizeof(char) * (strlen(sf->idxname) + 5));
+    if (tmpname == (char *)NULL) return;
+    sprintf(tmpname,"%s.tmp",sf->idxname);
 
-    /* if ((fdi = open(idxname,SF_WRITEFLAG,SF_UMASK)) == -1) { */
-    if ((fdi = open(idxname,O_CREAT | O_WRONLY,SF_UMASK)) == -1) {
-        printf("    - cannot open. Error: (%d)\n",errno);
-        free(idxname);
+    if ((fdi = open(tmpname,SF_IDXWRITEFLAG,SF_UMASK)) == -1) {
+        free(tmpname);
         return;
     } else {
         mtime = sf->m_time;
+        fsize = sf->filesize;
         write(fdi,SF_SIGNATURE,sizeof(SF_SIGNATURE));
- /*
-  * Swap bytes for linux
-  */
         write(fdi, (void *) &mtime, sizeof(long));
+        write(fdi, (void *) &fsize, sizeof(long));
         write(fdi, (void *) cursor, sizeof(SfCursor));
         for( obj = sf->list.first; obj ; obj = obj->next)
            write(fdi,(void *) obj->contents, sizeof(SpecScan));
         close(fdi);
-        free(idxname);
+#ifdef WIN32
+        remove(sf->idxname);
+#endif
+        if (rename(tmpname,sf->idxname)) remove(tmpname);
+        free(tmpname);
         return;
     }
 }
-#endif
 
 
 /*****************************************************************************
@@ -663,6 +801,8 @@ sfStartBuffer(SpecFile *sf,SfCursor *cursor,short status,char c0,char c1,int *er
         sfNewLine(sf,cursor,c0,c1,error);
     } else if ( status == COMMENT ) {
         cursor->bytecnt--;
+        cursor->lastline = cursor->bytecnt;
+        cursor->lineno++;
         sfHeaderLine(sf,cursor,c0,error);
         cursor->bytecnt++;
     }
@@ -693,6 +833,8 @@ statusEnd(char c2,char c1) {
 
 static void
 sfNewLine(SpecFile *sf,SfCursor *cursor,char c0,char c1,int *error) {
+     cursor->lastline = cursor->bytecnt;
+     cursor->lineno++;
      if (c0 == '#') {
           sfHeaderLine(sf,cursor,c1,error);
      } else if (c0 == '@') {
@@ -768,8 +910,10 @@ sfSaveScan(SpecFile *sf, SfCursor *cursor,int *error) {
     scan.hdafter_offset        = cursor->hdafoffset;
     scan.mcaspectra            = cursor->mcaspectra;
     scan.file_header           = cursor->file_header;
+    scan.scan_no               = 0;
+    scan.order                 = 0;
 
-    if(sf->updating == 1){
+    if(sf->updating){
         ptr = sf->list.last;
         oldscan=(SpecScan *)(ptr->contents);
         oldscan->index=scan.index;
@@ -780,6 +924,13 @@ sfSaveScan(SpecFile *sf, SfCursor *cursor,int *error) {
         oldscan->hdafter_offset=scan.hdafter_offset;
         oldscan->mcaspectra=scan.mcaspectra;
         oldscan->file_header=scan.file_header;
+        if (sf->updating == 2) {
+           /*
+            * The #S line was read again, the scan number is assigned again
+            */
+            oldscan->scan_no = 0;
+            oldscan->order   = 0;
+        }
         sf->updating=0;
     }else{
         addToList( &(sf->list), (void *)&scan, (long) sizeof(SpecScan));
@@ -791,6 +942,7 @@ static void
 sfAssignScanNumbers(SpecFile *sf) {
 
   int                    size,i;
+  long                   nbytes;
   char                  *buffer,*ptr;
 
   char   buffer2[50];
@@ -806,11 +958,22 @@ sfAssignScanNumbers(SpecFile *sf) {
   for ( object = (sf->list).first; object; object=object->next) {
         scan = (SpecScan *) object->contents;
 
+       /*
+        * Scans read from an index file or before an update
+        * already have their number and order
+        */
+        if (scan->order > 0) continue;
+
         lseek(sf->fd,scan->offset,SEEK_SET);
-        read(sf->fd,buffer,size);
-        buffer[49] = '\0';
+        nbytes = read(sf->fd,buffer,size);
+        if (nbytes < 0) nbytes = 0;
+        buffer[(nbytes < size) ? nbytes : size - 1] = '\0';
 
-        for ( ptr = buffer+3,i=0; *ptr != ' ';ptr++,i++) buffer2[i] = *ptr;
+       /*
+        * The #S line may not be complete if the file is being written
+        */
+        for ( ptr = buffer+3,i=0; ptr < buffer+nbytes && *ptr != ' ' && *ptr != '\0';
+              ptr++,i++) buffer2[i] = *ptr;
 
         buffer2[i] = '\0';
 
@@ -821,6 +984,7 @@ sfAssignScanNumbers(SpecFile *sf) {
             if (scan2->scan_no == scan->scan_no) scan->order++;
         }
   }
+  free(buffer);
 }
 
 void
@@ -57,11 +57,9 @@
 #include <SpecFile.h>
 #include <SpecFileP.h>
 #include <locale_management.h>
-#ifndef _GNU_SOURCE
-#ifdef PYMCA_POSIX
+#if defined(_GNU_SOURCE) || defined(PYMCA_POSIX) || defined(SPECFILE_POSIX)
 #include <locale.h>
 #endif
-#endif
 
 #include <ctype.h>
 #include <stdlib.h>
@@ -84,6 +82,13 @@ DllExport int  SfGetMca   ( SpecFile *sf, long index, long mcano,
                                           double **retdata, int *error );
 DllExport long SfMcaCalib ( SpecFile *sf, long index, double **calib,
                                           int *error );
+DllExport long SfMcaShape ( SpecFile *sf, long index, long *nchannels,
+                                          int *error );
+DllExport long SfMcaFill  ( SpecFile *sf, long index, void *data,
+                                          int itemsize, long nspectra,
+                                          long nchannels, int *error );
+
+static char *sfNextMca    ( char *ptr, char *to, char **end );
 
 
 /*********************************************************************
@@ -311,6 +316,224 @@ SfGetMca( SpecFile *sf, long index, long number, double **retdata, int *error )
 }
 
 
+/*********************************************************************
+ *   Function:        long SfMcaShape( sf, index, nchannels, error )
+ *
+ *   Description:    Gets the number of MCA spectra of a scan and the
+ *                   number of channels of the longest one.
+ *                   Only counts values: no number is parsed.
+ *                   Used with SfMcaFill to read all the spectra of a scan
+ *                   in a single pass into a preallocated array.
+ *
+ *   Parameters:
+ *        Input :    (1) File pointer
+ *                   (2) Index
+ *        Output:
+ *                   (3) Number of channels
+ *                   (4) error number
+ *   Returns:
+ *            Number of MCA spectra,
+ *            ( -1 ) => errors.
+ *   Possible errors:
+ *            SF_ERR_SCAN_NOT_FOUND
+ *            SF_ERR_MEMORY_ALLOC
+ *            SF_ERR_FILE_READ
+ *
+ *********************************************************************/
+DllExport long
+SfMcaShape( SpecFile *sf, long index, long *nchannels, int *error )
+{
+     SpecScan *scan;
+     char     *ptr, *end, *to;
+     long      nspectra = 0, vals;
+     int       intoken;
+
+     *nchannels = 0;
+     if (sfSetCurrent(sf,index,error) == -1 )
+         return(-1);
+
+     scan = (SpecScan *)sf->current->contents;
+     if (scan->data_offset == -1 || scan->mcaspectra == 0)
+         return(0);
+
+     ptr = sf->scanbuffer + (scan->data_offset - scan->offset);
+     to  = sf->scanbuffer + sf->scansize;
+
+     for ( ; (ptr = sfNextMca(ptr, to, &end)) != NULL; ptr = end + 1) {
+         vals = 0;
+         intoken = 0;
+         for ( ; ptr < end; ptr++) {
+             if (isnumber(*ptr)) {
+                 intoken = 1;
+             } else if (intoken) {
+                 vals++;
+                 intoken = 0;
+             }
+         }
+         if (intoken) vals++;
+         if (vals > *nchannels) *nchannels = vals;
+         nspectra++;
+     }
+     return(nspectra);
+}
+
+
+/*********************************************************************
+ *   Function:        long SfMcaFill( sf, index, data, itemsize,
+ *                                    nspectra, nchannels, error )
+ *
+ *   Description:    Reads all the MCA spectra of a scan into a
+ *                   preallocated C-contiguous array of
+ *                   nspectra x nchannels values, as returned by
+ *                   SfMcaShape. The array holds doubles if itemsize is
+ *                   sizeof(double), floats if it is sizeof(float).
+ *                   Spectra shorter than nchannels are padded with zeros.
+ *                   The numeric locale is set once for the whole scan.
+ *
+ *   Parameters:
+ *        Input :    (1) File pointer
+ *                   (2) Index
+ *                   (3) Data array
+ *                   (4) Size in bytes of an array item
+ *                   (5) Number of spectra of the array
+ *                   (6) Number of channels of the array
+ *        Output:
+ *                   (7) error number
+ *   Returns:
+ *            Number of spectra read,
+ *            ( -1 ) => errors.
+ *   Possible errors:
+ *            SF_ERR_SCAN_NOT_FOUND
+ *            SF_ERR_MEMORY_ALLOC
+ *            SF_ERR_FILE_READ
+ *
+ *********************************************************************/
+DllExport long
+SfMcaFill( SpecFile *sf, long index, void *data, int itemsize,
+           long nspectra, long nchannels, int *error )
+{
+     SpecScan *scan;
+     char     *ptr, *end, *to;
+     char      strval[100];
+     double   *drow = NULL;
+     float    *frow = NULL;
+     double    val;
+     long      spectrum = 0, vals;
+     int       i;
+#ifdef _GNU_SOURCE
+     locale_t  c_locale;
+#else
+#if defined(PYMCA_POSIX) || defined(SPECFILE_POSIX)
+     char     *currentLocaleBuffer;
+     char      localeBuffer[21];
+#endif
+#endif
+
+     if (itemsize != sizeof(double) && itemsize != sizeof(float)) {
+         *error = SF_ERR_MEMORY_ALLOC;
+         return(-1);
+     }
+
+     if (sfSetCurrent(sf,index,error) == -1 )
+         return(-1);
+
+     scan = (SpecScan *)sf->current->contents;
+     if (scan->data_offset == -1 || scan->mcaspectra == 0)
+         return(0);
+
+     ptr = sf->scanbuffer + (scan->data_offset - scan->offset);
+     to  = sf->scanbuffer + sf->scansize;
+
+#ifdef _GNU_SOURCE
+     c_locale = newlocale(LC_NUMERIC_MASK, "C", NULL);
+#define SF_ATOF(str) strtod_l(str, NULL, c_locale)
+#else
+#if defined(PYMCA_POSIX) || defined(SPECFILE_POSIX)
+     currentLocaleBuffer = setlocale(LC_NUMERIC, NULL);
+     strcpy(localeBuffer, currentLocaleBuffer);
+     setlocale(LC_NUMERIC, "C\0");
+#endif
+#define SF_ATOF(str) atof(str)
+#endif
+
+     for ( ; spectrum < nspectra && (ptr = sfNextMca(ptr, to, &end)) != NULL;
+             ptr = end + 1, spectrum++) {
+         if (itemsize == sizeof(double))
+             drow = (double *)data + spectrum * nchannels;
+         else
+             frow = (float *)data + spectrum * nchannels;
+         vals = 0;
+         i    = 0;
+         for ( ; ptr <= end; ptr++) {
+             if (ptr < end && isnumber(*ptr)) {
+                 if (i < 99) strval[i++] = *ptr;
+             } else if (i) {
+                 strval[i] = '\0';
+                 i = 0;
+                 if (vals < nchannels) {
+                     val = SF_ATOF(strval);
+                     if (drow != NULL) drow[vals] = val;
+                     else              frow[vals] = (float)val;
+                 }
+                 vals++;
+             }
+         }
+         for ( ; vals < nchannels; vals++) {
+             if (drow != NULL) drow[vals] = 0.;
+             else              frow[vals] = 0.f;
+         }
+     }
+#undef SF_ATOF
+
+#ifdef _GNU_SOURCE
+     freelocale(c_locale);
+#else
+#if defined(PYMCA_POSIX) || defined(SPECFILE_POSIX)
+     setlocale(LC_NUMERIC, localeBuffer);
+#endif
+#endif
+     return(spectrum);
+}
+
+
+/*********************************************************************
+ *   Function:        char *sfNextMca( ptr, to, end )
+ *
+ *   Description:    Finds the next MCA spectrum in the buffer, starting
+ *                   at the beginning of a line.
+ *                   A spectrum starts with a line beginning with '@'
+ *                   followed by the device letter, and can be continued
+ *                   on several lines ending with a '\'.
+ *                   A last spectrum without end of line character is
+ *                   incomplete (file being written) and is ignored.
+ *
+ *   Returns:
+ *            Pointer to the first value of the spectrum, end is set to
+ *            the end of line character terminating the spectrum.
+ *            NULL if there is no more spectrum.
+ *
+ *********************************************************************/
+static char *
+sfNextMca( char *ptr, char *to, char **end )
+{
+     char *start;
+
+     while (ptr < to) {
+         if (*ptr == '@') {
+             start = (ptr + 2 < to) ? ptr + 2 : to;
+             for (*end = start; *end < to &&
+                     (**end != '\n' || *(*end - 1) == MCA_CONT); (*end)++);
+             if (*end >= to)
+                 return(NULL);
+             return(start);
+         }
+         for ( ; ptr < to && *ptr != '\n'; ptr++);
+         ptr++;
+     }
+     return(NULL);
+}
+
+
 DllExport long
 SfMcaCalib ( SpecFile *sf, long index, double **calib, int *error )
 {
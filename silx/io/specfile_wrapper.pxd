@@ -37,7 +37,9 @@ ctypedef _SpecFile SpecFileHandle
 cdef extern from "SpecFileCython.h":
     # sfinit
     SpecFileHandle* SfOpen(char*, int*)
+    SpecFileHandle* SfOpenWithIndex(char*, char*, int*)
     int SfClose(SpecFileHandle*)
+    short SfUpdate(SpecFileHandle*, int*)
     char* SfError(int)
     
     # sfindex
@@ -51,6 +53,8 @@ cdef extern from "SpecFileCython.h":
     int SfData(SpecFileHandle*, long, double***, long**, int*)
     long SfDataLine(SpecFileHandle*, long, long, double**, int*)
     long SfDataColByName(SpecFileHandle*, long, char*, double**, int*)
+    long SfDataShape(SpecFileHandle*, long, long*, int*)
+    long SfDataFill(SpecFileHandle*, long, double*, long, long, int*)
     
     # sfheader
     #char* SfTitle(SpecFileHandle*, long, int*)
@@ -73,5 +77,7 @@ cdef extern from "SpecFileCython.h":
     # sfmca
     long SfNoMca(SpecFileHandle*, long, int*)
     int  SfGetMca(SpecFileHandle*, long, long , double**, int*)
+    long SfMcaShape(SpecFileHandle*, long, long*, int*)
+    long SfMcaFill(SpecFileHandle*, long, void*, int, long, long, int*)
     long SfMcaCalib(SpecFileHandle*, long, double**, int*)
 
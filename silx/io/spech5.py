@@ -187,7 +187,7 @@ from . import commonh5
 
 __authors__ = ["P. Knobel", "D. Naudet"]
 __license__ = "MIT"
-__date__ = "23/08/2017"
+__date__ = "18/10/2017"
 
 logger1 = logging.getLogger(__name__)
 
@@ -415,6 +415,12 @@ def _demultiplex_mca(scan, analyser_index):
     there are 3 analysers, the consecutive spectra for the first analyser must
     be accessed as ``mca[0], mca[3], mca[6]…``.
 
+    All the spectra of the scan are parsed at once in an array shared by
+    all analysers (see :meth:`silx.io.specfile.MCA.as_array`), the returned
+    array is a writable copy of the spectra of one analyser.
+    If the number of spectra is not a multiple of the number of analysers,
+    the extra spectra are ignored.
+
     :param scan: :class:`Scan` instance containing the MCA data
     :param analyser_index: 0-based index referencing the analyser
     :type analyser_index: int
@@ -422,14 +428,18 @@ def _demultiplex_mca(scan, analyser_index):
     """
     number_of_analysers = _get_number_of_mca_analysers(scan)
     number_of_spectra = len(scan.mca)
-    number_of_spectra_per_analyser = number_of_spectra // number_of_analysers
     len_spectrum = len(scan.mca[analyser_index])
 
-    mca_array = numpy.empty((number_of_spectra_per_analyser, len_spectrum))
+    if number_of_spectra % number_of_analysers == 0:
+        mca_array = scan.mca.as_array(number_of_analysers)
+        # Copy to not expose the cached read-only array
+        return mca_array[:, analyser_index, :len_spectrum].copy()
 
+    # Number of analysers from #@CHANN lines: read spectra one by one
+    number_of_spectra_per_analyser = number_of_spectra // number_of_analysers
+    mca_array = numpy.empty((number_of_spectra_per_analyser, len_spectrum))
     for i in range(number_of_spectra_per_analyser):
         mca_array[i, :] = scan.mca[analyser_index + i * number_of_analysers]
-
     return mca_array
 
 
@@ -554,26 +564,67 @@ class SpecH5(commonh5.File, SpecH5Group):
         commonh5.File.__init__(self, filename, attrs=attrs)
         assert self.attrs["NX_class"] == "NXroot"
 
-        for scan_key in self._sf.keys():
-            scan = self._sf[scan_key]
-            scan_group = ScanGroup(scan_key, parent=self, scan=scan)
+        # Scan groups are only built when accessed: the tree structure is
+        # defined by the SpecFile index, no scan header is parsed here
+        for scan_index, scan_key in enumerate(self._sf.keys()):
+            scan_group = ScanGroup(scan_key, parent=self,
+                                   specfile=self._sf, scan_index=scan_index)
             self.add_node(scan_group)
 
+    def refresh(self):
+        """Update the tree with the scans and data lines appended to the
+        SPEC file since it was opened or last refreshed.
+
+        Only the new part of the file is indexed (see
+        :meth:`SpecFile.refresh`). Groups of new scans are added, and the
+        group of the previous last scan, which may have been extended or
+        renamed, is replaced.
+
+        :return: ``True`` if the file was modified, else ``False``
+        :rtype: bool
+        """
+        scan_keys = self._sf.keys()
+        if not self._sf.refresh():
+            return False
+        if scan_keys:
+            # The key of the last scan may have changed, e.g., if its #S
+            # line was not completely written
+            self._get_items().pop(scan_keys[-1], None)
+        number_of_scans = len(scan_keys)
+        scan_keys = self._sf.keys()
+        for scan_index in range(max(number_of_scans - 1, 0), len(scan_keys)):
+            scan_group = ScanGroup(scan_keys[scan_index], parent=self,
+                                   specfile=self._sf, scan_index=scan_index)
+            self.add_node(scan_group)
+        return True
+
     def close(self):
         # or del self._sf?
         self._sf = None
 
 
-class ScanGroup(commonh5.Group, SpecH5Group):
-    def __init__(self, scan_key, parent, scan):
+class ScanGroup(commonh5.LazyLoadableGroup, SpecH5Group):
+    """Lazy loadable group for a scan.
+
+    The :class:`specfile.Scan` object is only created, and its header
+    parsed, when the children of the group are first needed.
+    """
+    def __init__(self, scan_key, parent, specfile, scan_index):
         """
 
         :param parent: parent Group
         :param str scan_key: Scan key (e.g. "1.1")
-        :param scan: specfile.Scan object
+        :param specfile: :class:`SpecFile` instance containing the scan
+        :param int scan_index: Unique 0-based index of the scan in specfile
         """
-        commonh5.Group.__init__(self, scan_key, parent=parent,
-                                attrs={"NX_class": "NXentry"})
+        commonh5.LazyLoadableGroup.__init__(self, scan_key, parent=parent,
+                                            attrs={"NX_class": "NXentry"})
+        self._specfile = specfile
+        self._scan_index = scan_index
+
+    def _create_child(self):
+        scan = self._specfile[self._scan_index]
+        scan_key = self.basename
 
         self.add_node(SpecH5NodeDataset(name="title",
                                         data=scan.scan_header_dict["S"],
@@ -731,9 +782,8 @@ class McaDataDataset(SpecH5LazyNodeDataset):
 
     @property
     def dtype(self):
-        # we initialize the data with numpy.empty() without specifying a dtype
-        # in _demultiplex_mca()
-        return numpy.empty((1, )).dtype
+        # default dtype of MCA.as_array() used by _demultiplex_mca()
+        return numpy.dtype(numpy.float64)
 
     def __len__(self):
         return self.shape[0]
@@ -0,0 +1,402 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2017 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""This module computes statistics of datasets (min, max, strictly positive
+min, mean, standard deviation and a coarse histogram) by reading them slab
+by slab, and caches them.
+
+The statistics can be stored as attributes of the dataset, to be reused
+the next time the file is opened.
+
+Example::
+
+    from silx.io import statistics
+
+    with h5py.File("data.h5", "a") as h5f:
+        stats = statistics.get_statistics(h5f["images"], save=True)
+        print(stats.minimum, stats.maximum, stats.mean)
+"""
+
+__authors__ = ["V. Valls"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+import logging
+import weakref
+import numpy
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+from silx.math.combo import min_max
+
+_logger = logging.getLogger(__name__)
+
+
+_ATTR_PREFIX = "silx_statistics_"
+"""Prefix of the attributes storing the statistics of a dataset"""
+
+_SCALAR_FIELDS = ("minimum", "maximum", "min_positive", "mean", "std", "count")
+
+_cache = weakref.WeakKeyDictionary()
+"""Statistics of datasets of read-only commonh5 files"""
+
+_h5py_cache = {}
+"""Statistics of datasets of read-only h5py files.
+
+h5py creates new objects for each access to a dataset, so the statistics are
+stored by dataset name, for the last opened file with a given name:
+``{filename: (fileno, {dataset_name: statistics})}``. Opening the file again
+gives it a new number, which invalidates the statistics.
+"""
+
+
+class Statistics(object):
+    """Statistics of a dataset, computed from its finite values.
+
+    The fields are None if the dataset do not contain finite values
+    (and for :attr:`min_positive`, strictly positive values).
+    """
+
+    def __init__(self, shape, count=0, minimum=None, maximum=None,
+                 min_positive=None, mean=None, std=None,
+                 histogram=None, bin_edges=None):
+        self.shape = tuple(shape)
+        """Shape of the dataset"""
+        self.count = count
+        """Number of finite values"""
+        self.minimum = minimum
+        """Minimum value"""
+        self.maximum = maximum
+        """Maximum value"""
+        self.min_positive = min_positive
+        """Strictly positive minimum value"""
+        self.mean = mean
+        """Mean of the values"""
+        self.std = std
+        """Standard deviation of the values"""
+        self.histogram = histogram
+        """Number of values in each bin, as a numpy array"""
+        self.bin_edges = bin_edges
+        """Edges of the bins of the histogram, as a numpy array"""
+
+    def to_attrs(self):
+        """Returns the statistics as a dictionary of HDF5 attributes.
+
+        :rtype: dict
+        """
+        attrs = {}
+        attrs[_ATTR_PREFIX + "shape"] = numpy.array(self.shape, dtype=numpy.int64)
+        for name in _SCALAR_FIELDS:
+            value = getattr(self, name)
+            attrs[_ATTR_PREFIX + name] = numpy.nan if value is None else value
+        if self.histogram is not None:
+            attrs[_ATTR_PREFIX + "histogram"] = self.histogram
+            attrs[_ATTR_PREFIX + "bin_edges"] = self.bin_edges
+        return attrs
+
+    @classmethod
+    def from_attrs(cls, attrs):
+        """Create statistics from HDF5 attributes written with
+        :meth:`to_attrs`.
+
+        :param dict attrs: Attributes of a dataset
+        :return: The statistics, else None if the attributes do not
+            contain statistics
+        :rtype: Union[Statistics,None]
+        """
+        if _ATTR_PREFIX + "shape" not in attrs:
+            return None
+        fields = {}
+        for name in _SCALAR_FIELDS:
+            if _ATTR_PREFIX + name not in attrs:
+                return None
+            value = attrs[_ATTR_PREFIX + name]
+            if name == "count":
+                value = int(value)
+            elif numpy.isnan(value):
+                value = None
+            fields[name] = value
+        fields["histogram"] = attrs.get(_ATTR_PREFIX + "histogram", None)
+        fields["bin_edges"] = attrs.get(_ATTR_PREFIX + "bin_edges", None)
+        shape = tuple(int(dim) for dim in attrs[_ATTR_PREFIX + "shape"])
+        return cls(shape, **fields)
+
+
+class _GrowingHistogram(object):
+    """Histogram with a fixed number of bins, covering a range extended
+    while values are added.
+
+    To cover a larger range, adjacent bins are merged by pairs, so the counts
+    stay exact, only the resolution decreases (values falling on the edge of
+    a bin may be counted in the neighbour bin due to rounding).
+
+    :param int nbins: Number of bins, it must be even
+    """
+
+    def __init__(self, nbins):
+        assert nbins > 0 and nbins % 2 == 0
+        self.__nbins = nbins
+        self.__origin = None
+        self.__width = None
+        self.__counts = numpy.zeros(nbins, dtype=numpy.int64)
+
+    def __grow(self, low):
+        """Double the range of the histogram.
+
+        :param bool low: True to extend the range to lower values, else to
+            higher values
+        """
+        merged = self.__counts.reshape(-1, 2).sum(axis=1)
+        empty = numpy.zeros(len(merged), dtype=numpy.int64)
+        if low:
+            self.__origin -= self.__nbins * self.__width
+            self.__counts = numpy.concatenate((empty, merged))
+        else:
+            self.__counts = numpy.concatenate((merged, empty))
+        self.__width *= 2
+
+    def add(self, values, vmin, vmax):
+        """Add values to the histogram.
+
+        :param numpy.ndarray values: Finite values
+        :param float vmin: Minimum of the values
+        :param float vmax: Maximum of the values
+        """
+        if self.__origin is None:
+            self.__origin = float(vmin)
+            width = (float(vmax) - float(vmin)) / self.__nbins
+            if width <= 0:
+                width = max(abs(float(vmin)), 1.) / self.__nbins
+            self.__width = width
+        while vmin < self.__origin:
+            self.__grow(low=True)
+        while vmax > self.__origin + self.__nbins * self.__width:
+            self.__grow(low=False)
+
+        indices = (values - self.__origin) / self.__width
+        indices = numpy.clip(indices.astype(numpy.int64), 0, self.__nbins - 1)
+        self.__counts += numpy.bincount(indices, minlength=self.__nbins)
+
+    def __edges(self):
+        return self.__origin + self.__width * numpy.arange(self.__nbins + 1)
+
+    def get(self):
+        """Returns the counts and the edges of the bins, or None, None if no
+        values were added.
+
+        :rtype: tuple
+        """
+        if self.__origin is None:
+            return None, None
+        return self.__counts.copy(), self.__edges()
+
+
+def _iter_slabs(dataset, slab_size):
+    """Iterate over the dataset by slabs along its first dimension.
+
+    :param dataset: h5py-like dataset or numpy array
+    :param int slab_size: Size in bytes of the slabs
+    """
+    shape = dataset.shape
+    if len(shape) == 0:
+        yield numpy.array(dataset[()])
+        return
+    frame_size = dataset.dtype.itemsize
+    for dim in shape[1:]:
+        frame_size *= dim
+    step = max(1, slab_size // max(1, frame_size))
+    chunks = getattr(dataset, "chunks", None)
+    if chunks is not None and step > chunks[0]:
+        # read complete chunks
+        step -= step % chunks[0]
+    for start in range(0, shape[0], step):
+        yield numpy.array(dataset[start:start + step], copy=False)
+
+
+def compute_statistics(dataset, nbins=256, slab_size=2**24):
+    """Compute the statistics of a dataset in a single pass.
+
+    Only finite values are taken into account.
+
+    :param dataset: h5py-like dataset or numpy array of numbers
+    :param int nbins: Number of bins of the histogram (rounded to an even
+        number), or 0 to skip the histogram
+    :param int slab_size: Size in bytes of the data read at once
+    :rtype: Statistics
+    :raises TypeError: If the dataset do not contain real numbers
+    """
+    if dataset.dtype.kind not in "biuf":
+        raise TypeError("Statistics are only available for real numbers, "
+                        "found '%s'" % dataset.dtype)
+    histogram = None
+    if nbins > 0:
+        histogram = _GrowingHistogram(nbins + nbins % 2)
+
+    count = 0
+    mean = 0.
+    m2 = 0.
+    minimum, maximum, min_positive = None, None, None
+    for slab in _iter_slabs(dataset, slab_size):
+        if slab.size == 0:
+            continue
+        result = min_max(slab, min_positive=True, finite=True)
+        if result.minimum is None:
+            # no finite values
+            continue
+        if minimum is None or result.minimum < minimum:
+            minimum = result.minimum
+        if maximum is None or result.maximum > maximum:
+            maximum = result.maximum
+        if result.min_positive is not None:
+            if min_positive is None or result.min_positive < min_positive:
+                min_positive = result.min_positive
+
+        values = slab.ravel()
+        if values.dtype.kind == "f":
+            values = values[numpy.isfinite(values)]
+        values = values.astype(numpy.float64)
+
+        # merge the mean and the sum of squared deviations of the slab
+        slab_count = len(values)
+        slab_mean = values.mean()
+        slab_m2 = numpy.sum((values - slab_mean) ** 2)
+        delta = slab_mean - mean
+        total = count + slab_count
+        mean += delta * slab_count / total
+        m2 += slab_m2 + delta ** 2 * count * slab_count / total
+        count = total
+
+        if histogram is not None:
+            histogram.add(values, float(result.minimum), float(result.maximum))
+
+    stats = Statistics(dataset.shape, count=count)
+    if count > 0:
+        stats.minimum = minimum
+        stats.maximum = maximum
+        stats.min_positive = min_positive
+        stats.mean = mean
+        stats.std = numpy.sqrt(m2 / count)
+    if histogram is not None:
+        stats.histogram, stats.bin_edges = histogram.get()
+    return stats
+
+
+def _get_cache(dataset):
+    """Returns the cache containing the statistics of a dataset, and the key
+    of the dataset in this cache.
+
+    :param dataset: h5py-like dataset or numpy array
+    :return: The cache and the key, or None if the dataset is not in a
+        read-only file.
+    :rtype: Union[tuple,None]
+    """
+    f = getattr(dataset, "file", None)
+    if f is None or getattr(f, "mode", None) != "r":
+        return None
+    if h5py is None or not isinstance(f, h5py.File):
+        return _cache, dataset
+    fileno = f.id.fileno
+    entry = _h5py_cache.get(f.filename)
+    if entry is None or entry[0] != fileno:
+        entry = fileno, {}
+        _h5py_cache[f.filename] = entry
+    return entry[1], dataset.name
+
+
+def _has_histogram(stats, nbins):
+    """Returns True if the statistics contain a histogram with the requested
+    number of bins (rounded like in :func:`compute_statistics`), or if no
+    histogram is requested."""
+    if nbins <= 0 or stats.count == 0:
+        return True
+    return stats.histogram is not None and len(stats.histogram) == nbins + nbins % 2
+
+
+def get_statistics(dataset, nbins=256, save=False, slab_size=2**24,
+                   compute=True):
+    """Returns the statistics of a dataset.
+
+    The statistics are read from the attributes of the dataset if they were
+    saved before, else they are computed with :func:`compute_statistics`.
+    The statistics of the datasets of read-only files are also cached in
+    memory. Saved or cached statistics with a histogram of another number
+    of bins are computed again.
+
+    :param dataset: h5py-like dataset or numpy array of numbers
+    :param int nbins: Number of bins of the histogram, or 0 if the histogram
+        is not needed
+    :param bool save: If True, the statistics are stored as attributes of
+        the dataset once computed. A warning is logged if the file can't
+        be modified.
+    :param int slab_size: Size in bytes of the data read at once
+    :param bool compute: If False, only saved or cached statistics are
+        returned, the data is not read.
+    :return: The statistics, or None if they are not available and
+        ``compute`` is False
+    :rtype: Union[Statistics,None]
+    """
+    cache = _get_cache(dataset)
+    if cache is not None:
+        cache, key = cache
+        try:
+            stats = cache[key]
+        except (KeyError, TypeError):
+            pass
+        else:
+            if _has_histogram(stats, nbins):
+                return stats
+
+    attrs = getattr(dataset, "attrs", None)
+    stats = None
+    if attrs is not None:
+        stats = Statistics.from_attrs(attrs)
+        if stats is not None and stats.shape != tuple(dataset.shape):
+            # the dataset was resized since
+            stats = None
+        elif stats is not None and not _has_histogram(stats, nbins):
+            stats = None
+
+    if stats is None:
+        if not compute:
+            return None
+        stats = compute_statistics(dataset, nbins=nbins, slab_size=slab_size)
+        if save and attrs is not None:
+            try:
+                for key, value in stats.to_attrs().items():
+                    attrs[key] = value
+            except Exception as e:
+                _logger.warning("Statistics of '%s' not saved: %s",
+                                getattr(dataset, "name", ""), e)
+                _logger.debug("Backtrace", exc_info=True)
+
+    if cache is not None:
+        try:
+            cache[key] = stats
+        except TypeError:
+            # the dataset can't be used as a key of a weak dictionary
+            pass
+    return stats
@@ -39,6 +39,7 @@ from .test_utils import suite as test_utils_suite
 from .test_nxdata import suite as test_nxdata_suite
 from .test_commonh5 import suite as test_commonh5_suite
 from .test_rawh5 import suite as test_rawh5_suite
+from .test_statistics import suite as test_statistics_suite
 
 
 def suite():
@@ -54,4 +55,5 @@ def suite():
     test_suite.addTest(test_nxdata_suite())
     test_suite.addTest(test_commonh5_suite())
     test_suite.addTest(test_rawh5_suite())
+    test_suite.addTest(test_statistics_suite())
     return test_suite
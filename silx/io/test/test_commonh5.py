@@ -292,6 +292,43 @@ class TestSpecificCommonH5(unittest.TestCase):
         group["b"] = commonh5.SoftLink(None, path="/" + self.id() + "/a")
         self.assertEqual(group["b"].dtype.kind, "i")
 
+    def test_path_index(self):
+        f = commonh5.File(name="Foo", mode="w")
+        f["a/b/c"] = 10
+        f["link"] = commonh5.SoftLink(None, path="/a/b")
+        link = f["link"]
+        self.assertIs(f["link"], link)
+        self.assertIs(f["a"]["b/c"], f["/a/b/c"])
+        self.assertIs(f["link/c"], f["a/b/c"])
+        self.assertIn("link/c", f)
+        self.assertNotEqual(len(f._get_path_index()), 0)
+
+        # modifying the tree drops the index
+        f["a/b/d"] = 20
+        self.assertEqual(len(f._get_path_index()), 0)
+        self.assertEqual(f["link/d"][()], 20)
+
+    def test_path_index_lazy_group(self):
+        class Group(commonh5.LazyLoadableGroup):
+            def _create_child(self):
+                self.add_node(commonh5.Dataset("data", data=numpy.array(10)))
+
+        f = commonh5.File(name="Foo", mode="w")
+        f.add_node(Group("lazy"))
+        self.assertIs(f["lazy"], f["/lazy"])
+        self.assertEqual(f["lazy/data"][()], 10)
+        self.assertIn(("/lazy", False), f._get_path_index())
+
+    def test_visititems(self):
+        f = commonh5.File(name="Foo", mode="w")
+        f["a/b/c"] = 10
+        f["a/b/d"] = 20
+        names = []
+        f["a"].visititems(lambda name, obj: names.append(name))
+        self.assertEqual(names, ["b", "b/c", "b/d"])
+        result = f.visit(lambda name: name if name.endswith("c") else None)
+        self.assertEqual(result, "a/b/c")
+
 
 def suite():
     loadTests = unittest.defaultTestLoader.loadTestsFromTestCase
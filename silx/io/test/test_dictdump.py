@@ -25,7 +25,7 @@
 
 __authors__ = ["P. Knobel"]
 __license__ = "MIT"
-__date__ = "10/02/2017"
+__date__ = "18/10/2017"
 
 from collections import OrderedDict
 import numpy
@@ -44,6 +44,7 @@ from collections import defaultdict
 from ..configdict import ConfigDict
 from ..dictdump import dicttoh5, dicttojson, dicttoini, dump
 from ..dictdump import h5todict, load
+from ..dictdump import DatasetProxy, _guess_chunks
 
 
 def tree():
@@ -93,6 +94,28 @@ class TestDictToH5(unittest.TestCase):
                 min(ddict["city attributes"]["Europe"]["France"]["Grenoble"]["coordinates"]),
                 5.7196)
 
+    def testCompressionThreshold(self):
+        ddict = {"small": numpy.arange(10),
+                 "big": numpy.zeros((40, 100, 100), dtype=numpy.float32)}
+        dicttoh5(ddict, self.h5_fname, compression_threshold=1000)
+
+        with h5py.File(self.h5_fname, "r") as h5f:
+            self.assertIsNone(h5f["small"].compression)
+            self.assertEqual(h5f["big"].compression, "gzip")
+            self.assertTrue(h5f["big"].shuffle)
+            # images are kept complete in the chunks
+            self.assertEqual(h5f["big"].chunks, (26, 100, 100))
+
+
+class TestGuessChunks(unittest.TestCase):
+    def testGuessChunks(self):
+        self.assertEqual(_guess_chunks((100, 20), 4, 1000), (12, 20))
+        self.assertEqual(_guess_chunks((10, 20), 4, 1000), (10, 20))
+        self.assertEqual(_guess_chunks((1000,), 8, 1000), (125,))
+        self.assertEqual(_guess_chunks((5, 300), 1, 100), (1, 100))
+        self.assertEqual(_guess_chunks((10, 20, 30), 2, 2000), (1, 20, 30))
+        self.assertEqual(_guess_chunks((10,), 16, 8), (1,))
+
 
 @unittest.skipIf(h5py_missing, "Could not import h5py")
 class TestH5ToDict(unittest.TestCase):
@@ -115,6 +138,34 @@ class TestH5ToDict(unittest.TestCase):
         self.assertIn("coordinates", ddict["Grenoble"])
         self.assertIn("area", ddict["Grenoble"])
 
+    def testLazy(self):
+        ddict = h5todict(self.h5_fname, path="/Europe/France", lazy=True)
+        coordinates = ddict["Grenoble"]["coordinates"]
+        self.assertIsInstance(coordinates, DatasetProxy)
+        self.assertEqual(coordinates.shape, (2,))
+        self.assertEqual(coordinates[1], 5.7196)
+        numpy.testing.assert_array_equal(numpy.array(coordinates),
+                                         [45.1830, 5.7196])
+        ddict.close()
+
+        with h5todict(self.h5_fname, lazy=True) as ddict:
+            grenoble = ddict["Europe"]["France"]["Grenoble"]
+            self.assertEqual(grenoble["inhabitants"][()], 160215)
+            # the datasets share the same opened file
+            h5f = grenoble["inhabitants"].file
+            self.assertIs(grenoble["area"].file, h5f)
+            self.assertTrue(bool(h5f.id.valid))
+        self.assertFalse(bool(h5f.id.valid))
+        # the file is opened again
+        self.assertIn(grenoble["area"][()], [b"18.44 km2", u"18.44 km2"])
+        ddict.close()
+
+        with h5py.File(self.h5_fname, "r") as h5f:
+            ddict = h5todict(h5f, lazy=True)
+            inhabitants = ddict["Europe"]["France"]["Grenoble"]["inhabitants"]
+            self.assertIsInstance(inhabitants, h5py.Dataset)
+            self.assertEqual(inhabitants[()], 160215)
+
 
 class TestDictToJson(unittest.TestCase):
     def setUp(self):
@@ -238,6 +289,8 @@ def suite():
         unittest.defaultTestLoader.loadTestsFromTestCase(TestDictToIni))
     test_suite.addTest(
         unittest.defaultTestLoader.loadTestsFromTestCase(TestDictToH5))
+    test_suite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestGuessChunks))
     test_suite.addTest(
         unittest.defaultTestLoader.loadTestsFromTestCase(TestDictToJson))
     test_suite.addTest(
@@ -25,10 +25,13 @@
 
 __authors__ = ["V. Valls"]
 __license__ = "MIT"
-__date__ = "29/08/2017"
+__date__ = "18/10/2017"
 
 import logging
 import numpy
+import os
+import shutil
+import tempfile
 import unittest
 
 _logger = logging.getLogger(__name__)
@@ -49,6 +52,45 @@ if fabio is not None and h5py is not None:
     from .. import commonh5
 
 
+class _CounterImage(object):
+    """Multi-frame image recording the frames which are decoded and the
+    headers which are read"""
+
+    def __init__(self, data):
+        self.__data = data
+        self.filename = None
+        self.nframes = len(data)
+        self.header = {}
+        self.decoded = []
+        self.read_headers = []
+
+    def getframe(self, frame_id):
+        return _CounterFrame(self, frame_id)
+
+    def decode(self, frame_id):
+        self.decoded.append(frame_id)
+        return self.__data[frame_id]
+
+    def read_header(self, frame_id):
+        self.read_headers.append(frame_id)
+        return {"frame": str(frame_id)}
+
+
+class _CounterFrame(object):
+
+    def __init__(self, image, frame_id):
+        self.__image = image
+        self.__frame_id = frame_id
+
+    @property
+    def data(self):
+        return self.__image.decode(self.__frame_id)
+
+    @property
+    def header(self):
+        return self.__image.read_header(self.__frame_id)
+
+
 class TestFabioH5(unittest.TestCase):
 
     def setUp(self):
@@ -146,6 +188,132 @@ class TestFabioH5(unittest.TestCase):
         self.assertEquals(dataset[...][0, 0, 0], 0)
         self.assertEquals(dataset.attrs["interpretation"], "image")
 
+    def test_lazy_frames(self):
+        data = numpy.arange(4 * 2 * 3)
+        data.shape = 4, 2, 3
+        fabio_image = fabio.edfimage.edfimage(data=data[0])
+        for frame in data[1:]:
+            fabio_image.appendFrame(data=frame)
+        h5_image = fabioh5.File(fabio_image=fabio_image, prefetch=True)
+
+        dataset = h5_image["/scan_0/instrument/detector_0/data"]
+        self.assertEqual(dataset.shape, (4, 2, 3))
+        self.assertEqual(len(dataset), 4)
+        self.assertTrue(numpy.array_equal(dataset[1], data[1]))
+        self.assertTrue(numpy.array_equal(dataset[-1, 1], data[-1, 1]))
+        self.assertTrue(numpy.array_equal(dataset[1:3, :, 2], data[1:3, :, 2]))
+        self.assertTrue(numpy.array_equal(dataset[::-2], data[::-2]))
+        self.assertRaises(IndexError, lambda: dataset[4])
+        # the cube is not created to read frames
+        self.assertFalse(dataset._is_initialized)
+        self.assertTrue(numpy.array_equal(dataset[()], data))
+        self.assertTrue(dataset._is_initialized)
+
+    def test_lazy_heterogeneous_frames(self):
+        data1 = numpy.arange(2 * 3)
+        data1.shape = 2, 3
+        data2 = numpy.arange(2 * 5)
+        data2.shape = 2, 5
+        fabio_image = fabio.edfimage.edfimage(data=data1)
+        fabio_image.appendFrame(data=data2)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "frames.edf")
+            fabio_image.write(filename)
+            h5_image = fabioh5.File(filename)
+
+            # the shapes are read from the EDF headers
+            dataset = h5_image["/scan_0/instrument/detector_0/data"]
+            self.assertEqual(dataset.shape, (2, 2, 5))
+            self.assertEqual(dataset[0].tolist(), [[0, 1, 2, 0, 0], [3, 4, 5, 0, 0]])
+            self.assertTrue(numpy.array_equal(dataset[1], data2))
+            h5_image.close()
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_reader_growing_frames(self):
+        """Later frames larger than the first one are not cropped"""
+        data1 = numpy.arange(2 * 3)
+        data1.shape = 2, 3
+        data2 = numpy.arange(3 * 4)
+        data2.shape = 3, 4
+        fabio_image = fabio.edfimage.edfimage(data=data1)
+        fabio_image.appendFrame(data=data2)
+
+        # generic reader, the shapes are not read from the headers
+        reader = fabioh5.FabioReader(fabio_image)
+        self.assertEqual(reader.get_frame_shape(), (2, 3))
+        self.assertEqual(reader.get_frame_data(0).shape, (2, 3))
+        self.assertTrue(numpy.array_equal(reader.get_frame_data(1), data2))
+        self.assertEqual(reader.get_frame_shape(), (3, 4))
+        self.assertEqual(reader.get_frame_data(0).tolist(),
+                         [[0, 1, 2, 0], [3, 4, 5, 0], [0, 0, 0, 0]])
+        reader = fabioh5.FabioReader(fabio_image)
+        data = reader.get_data()
+        self.assertEqual(data.shape, (2, 3, 4))
+        self.assertEqual(data[0].tolist(), [[0, 1, 2, 0], [3, 4, 5, 0], [0, 0, 0, 0]])
+        self.assertTrue(numpy.array_equal(data[1], data2))
+
+    def test_frame_decoding(self):
+        """Reading a frame only decodes this frame"""
+        data = numpy.arange(20 * 2 * 3)
+        data.shape = 20, 2, 3
+        fabio_image = _CounterImage(data)
+        reader = fabioh5.FabioReader(fabio_image)
+        dataset = fabioh5.FrameData("data", reader)
+        self.assertEqual(dataset.shape, (20, 2, 3))
+        self.assertTrue(numpy.array_equal(dataset[0], data[0]))
+        self.assertEqual(fabio_image.decoded, [0])
+        self.assertTrue(numpy.array_equal(dataset[5:7], data[5:7]))
+        self.assertEqual(fabio_image.decoded, [0, 5, 6])
+
+    def test_metadata_columns(self):
+        data = numpy.arange(2 * 3)
+        data.shape = 2, 3
+        fabio_image = fabio.edfimage.edfimage(data=data, header={"a": "1", "b": "1.5"})
+        fabio_image.appendFrame(data=data, header={"a": "-300", "c": "x"})
+        fabio_image.appendFrame(data=data, header={"a": "2", "b": "2.5"})
+        h5_image = fabioh5.File(fabio_image=fabio_image)
+
+        others = h5_image["/scan_0/instrument/detector_0/others"]
+        self.assertEqual(others["a"].dtype, numpy.int16)
+        self.assertEqual(others["a"][()].tolist(), [1, -300, 2])
+        self.assertEqual(others["b"].dtype, numpy.float32)
+        self.assertTrue(numpy.isnan(others["b"][1]))
+        self.assertEqual(others["b"][2], 2.5)
+        self.assertEqual(others["c"][1], b"x")
+
+    def test_metadata_mixed_numbers(self):
+        """Columns mixing integers and floats get the type fitting all the
+        values, like when converting values one by one"""
+        data = numpy.arange(2 * 3)
+        data.shape = 2, 3
+        fabio_image = fabio.edfimage.edfimage(data=data, header={"a": "1", "b": "1"})
+        fabio_image.appendFrame(data=data, header={"a": "-300", "b": "100000"})
+        fabio_image.appendFrame(data=data, header={"a": "2.5", "b": "2.5"})
+        h5_image = fabioh5.File(fabio_image=fabio_image)
+
+        others = h5_image["/scan_0/instrument/detector_0/others"]
+        self.assertEqual(others["a"].dtype, numpy.float32)
+        self.assertEqual(others["a"][()].tolist(), [1, -300, 2.5])
+        self.assertEqual(others["b"].dtype, numpy.float64)
+        self.assertEqual(others["b"][()].tolist(), [1, 100000, 2.5])
+
+    def test_metadata_lazy(self):
+        data = numpy.arange(3 * 2 * 3)
+        data.shape = 3, 2, 3
+        fabio_image = _CounterImage(data)
+        h5_image = fabioh5.File(fabio_image=fabio_image)
+        self.assertTrue(numpy.array_equal(
+            h5_image["/scan_0/instrument/detector_0/data"][1], data[1]))
+        self.assertEqual(fabio_image.read_headers, [])
+
+        others = h5_image["/scan_0/instrument/detector_0/others"]
+        self.assertEqual(others["frame"][()].tolist(), [0, 1, 2])
+        self.assertEqual(fabio_image.read_headers, [0, 1, 2])
+        others["frame"][()]
+        self.assertEqual(fabio_image.read_headers, [0, 1, 2])
+
     def test_single_3d_frame(self):
         """Image source contains a cube"""
         data = numpy.arange(2 * 3 * 4)
@@ -25,15 +25,17 @@
 
 __authors__ = ["P. Knobel"]
 __license__ = "MIT"
-__date__ = "27/09/2016"
+__date__ = "18/10/2017"
 
 try:
     import h5py
 except ImportError:
     h5py = None
 import numpy
+import os
 import tempfile
 import unittest
+from .. import commonh5
 from .. import nxdata
 
 
@@ -301,10 +303,112 @@ class TestNXdata(unittest.TestCase):
         self.assertIsNone(nxd.interpretation)
 
 
+class _AxisDataset(commonh5.LazyLoadableDataset):
+    """Axis dataset recording when its data is read"""
+
+    def __init__(self, name, attrs=None):
+        commonh5.LazyLoadableDataset.__init__(self, name, attrs=attrs)
+        self.read = False
+
+    def _create_data(self):
+        self.read = True
+        return numpy.arange(10)
+
+    @property
+    def shape(self):
+        return (10,)
+
+
+class TestNXdataMetadata(unittest.TestCase):
+    """Test that NXdata only reads the data of axes when they are requested"""
+
+    def setUp(self):
+        self.h5f = commonh5.File("foo.h5", mode="r")
+        self.group = commonh5.Group("scatter", attrs={"NX_class": "NXdata",
+                                                      "signal": "values",
+                                                      "axes": ["x", "y"]})
+        self.h5f.add_node(self.group)
+        self.group.add_node(commonh5.Dataset("values", data=numpy.arange(8)))
+        self.x = _AxisDataset("x", attrs={"first_good": 1, "last_good": 8})
+        self.y = _AxisDataset("y", attrs={"first_good": 2})
+        self.group.add_node(self.x)
+        self.group.add_node(self.y)
+
+    def testAxesNotRead(self):
+        self.assertTrue(nxdata.is_valid_nxdata(self.group))
+        nxd = nxdata.NXdata(self.group)
+        self.assertTrue(nxd.is_scatter)
+        self.assertTrue(nxd.is_x_y_value_scatter)
+        self.assertFalse(self.x.read)
+        self.assertFalse(self.y.read)
+
+        numpy.testing.assert_array_equal(nxd.axes[0], numpy.arange(1, 9))
+        self.assertTrue(self.x.read)
+
+    def testValidityCache(self):
+        self.assertTrue(nxdata.is_valid_nxdata(self.group))
+        self.assertIn(self.group, nxdata._validity_cache)
+
+        writable = commonh5.File("bar.h5", mode="w")
+        group = writable.create_group("data")
+        group.attrs.update(self.group.attrs)
+        group["values"] = numpy.arange(8)
+        self.assertFalse(nxdata.is_valid_nxdata(group))
+        self.assertNotIn(group, nxdata._validity_cache)
+
+
+@unittest.skipIf(h5py is None, "silx.io.nxdata tests depend on h5py")
+class TestNXdataValidityCache(unittest.TestCase):
+    """Test that the validity of groups of read-only h5py files is cached"""
+
+    def setUp(self):
+        fd, self.h5fname = tempfile.mkstemp(prefix="nxdata_cache_", suffix=".h5")
+        os.close(fd)
+        with h5py.File(self.h5fname, "w") as h5f:
+            group = h5f.create_group("data")
+            group.attrs["NX_class"] = "NXdata"
+            group.attrs["signal"] = "values"
+            group["values"] = numpy.arange(8)
+
+        self.checks = []
+        self.__is_valid_nxdata = nxdata._is_valid_nxdata
+
+        def is_valid_nxdata(group):
+            self.checks.append(group.name)
+            return self.__is_valid_nxdata(group)
+        nxdata._is_valid_nxdata = is_valid_nxdata
+
+    def tearDown(self):
+        nxdata._is_valid_nxdata = self.__is_valid_nxdata
+        os.unlink(self.h5fname)
+
+    def testSeparateLookups(self):
+        with h5py.File(self.h5fname, "r") as h5f:
+            self.assertTrue(nxdata.is_valid_nxdata(h5f["data"]))
+            self.assertTrue(nxdata.is_valid_nxdata(h5f["/data"]))
+        self.assertEqual(self.checks, ["/data"])
+
+        # the results are invalidated when the file is opened again
+        with h5py.File(self.h5fname, "r") as h5f:
+            self.assertTrue(nxdata.is_valid_nxdata(h5f["data"]))
+        self.assertEqual(self.checks, ["/data", "/data"])
+
+    def testWritableFile(self):
+        with h5py.File(self.h5fname, "a") as h5f:
+            self.assertTrue(nxdata.is_valid_nxdata(h5f["data"]))
+            del h5f["data/values"]
+            self.assertFalse(nxdata.is_valid_nxdata(h5f["data"]))
+        self.assertEqual(self.checks, ["/data", "/data"])
+
+
 def suite():
     test_suite = unittest.TestSuite()
     test_suite.addTest(
         unittest.defaultTestLoader.loadTestsFromTestCase(TestNXdata))
+    test_suite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestNXdataMetadata))
+    test_suite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestNXdataValidityCache))
     return test_suite
 
 
@@ -26,11 +26,13 @@
 
 __authors__ = ["V. Valls"]
 __license__ = "MIT"
-__date__ = "21/09/2017"
+__date__ = "18/10/2017"
 
 
+import io
 import unittest
 import tempfile
+import zipfile
 import numpy
 import shutil
 from ..import rawh5
@@ -74,6 +76,48 @@ class TestNumpyFile(unittest.TestCase):
         self.assertEqual(h5["d"].dtype.kind, "S")
         self.assertEqual(h5["e"].dtype.kind, "U")
 
+    def testNumpyFileMemoryMapped(self):
+        filename = "%s/%s.npy" % (self.tmpDirectory, self.id())
+        c = numpy.arange(20).reshape(4, 5)
+        numpy.save(filename, c)
+        h5 = rawh5.NumpyFile(filename)
+        self.assertIsInstance(h5["data"][()], numpy.memmap)
+        self.assertEqual(h5["data"][1:3, 2].tolist(), [7, 12])
+
+    def testNumpyZFileMemoryMapped(self):
+        filename = "%s/%s.npz" % (self.tmpDirectory, self.id())
+        a = numpy.arange(20).reshape(4, 5)
+        b = numpy.asfortranarray(a)
+        c = numpy.array([], dtype=numpy.float32)
+        numpy.savez(filename, a=a, b=b, c=c)
+        h5 = rawh5.NumpyFile(filename)
+        self.assertIsInstance(h5["a"][()], numpy.memmap)
+        self.assertEqual(h5["a"][1:3, 2].tolist(), [7, 12])
+        self.assertTrue(numpy.array_equal(h5["b"][()], a))
+        self.assertEqual(h5["c"].shape, (0,))
+        self.assertEqual(h5["c"].dtype, numpy.float32)
+
+    def testNumpyZFileFormatVersions(self):
+        filename = "%s/%s.npz" % (self.tmpDirectory, self.id())
+        a = numpy.arange(20).reshape(4, 5)
+        with zipfile.ZipFile(filename, "w", zipfile.ZIP_STORED) as z:
+            for version in [(1, 0), (2, 0), (3, 0)]:
+                name = "v%d.npy" % version[0]
+                f = io.BytesIO()
+                numpy.lib.format.write_array(f, a, version=version)
+                z.writestr(name, f.getvalue())
+        h5 = rawh5.NumpyFile(filename)
+        for name in ["v1", "v2", "v3"]:
+            self.assertIsInstance(h5[name][()], numpy.memmap)
+            self.assertEqual(h5[name][1:3, 2].tolist(), [7, 12])
+
+    def testNumpyZFileCompressed(self):
+        filename = "%s/%s.npz" % (self.tmpDirectory, self.id())
+        a = numpy.arange(20).reshape(4, 5)
+        numpy.savez_compressed(filename, a=a)
+        h5 = rawh5.NumpyFile(filename)
+        self.assertTrue(numpy.array_equal(h5["a"][()], a))
+
     def testNumpyZFileContainingDirectories(self):
         filename = "%s/%s.npz" % (self.tmpDirectory, self.id())
         data = {}
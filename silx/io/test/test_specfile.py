@@ -25,7 +25,7 @@
 
 __authors__ = ["P. Knobel", "V.A. Sole"]
 __license__ = "MIT"
-__date__ = "03/08/2017"
+__date__ = "18/10/2017"
 
 import gc
 import locale
@@ -34,6 +34,7 @@ import numpy
 import os
 import sys
 import tempfile
+import threading
 import unittest
 
 from silx.test import utils
@@ -361,6 +362,31 @@ class TestSpecFile(unittest.TestCase):
         self.assertEqual(line_count, 3)
         self.assertAlmostEqual(total_sum, 36.8)
 
+    def test_mca_as_array(self):
+        mca_array = self.scan1_2.mca.as_array()
+        self.assertEqual(mca_array.shape, (3, 1, 3))
+        self.assertEqual(mca_array.dtype, numpy.float64)
+        for i, spectrum in enumerate(self.scan1_2.mca):
+            self.assertTrue(numpy.array_equal(mca_array[i, 0], spectrum))
+        # the array is cached
+        self.assertIs(self.scan1_2.mca.as_array(), mca_array)
+        self.assertFalse(mca_array.flags.writeable)
+
+        mca_array = self.scan1_2.mca.as_array(dtype=numpy.float32)
+        self.assertEqual(mca_array.dtype, numpy.float32)
+        self.assertAlmostEqual(mca_array[2, 0, 1], 7.7, places=5)
+
+        mca_array = self.sf.get_mca_array(self.scan1_2.index,
+                                          number_of_analysers=3,
+                                          dtype=numpy.int32)
+        self.assertEqual(mca_array.shape, (1, 3, 3))
+        self.assertEqual(mca_array[0, 1].tolist(), [3, 4, 5])
+
+        with self.assertRaises(ValueError):
+            self.scan1_2.mca.as_array(number_of_analysers=2)
+
+        self.assertEqual(self.scan1.mca.as_array().shape, (0, 1, 0))
+
     def test_mca_header(self):
         self.assertEqual(self.scan1.mca_header_dict, {})
         self.assertEqual(len(self.scan1_2.mca_header_dict), 4)
@@ -385,6 +411,241 @@ class TestSpecFile(unittest.TestCase):
         self.assertEqual(col1.shape, (0, ))
 
 
+class TestSFIndexFile(unittest.TestCase):
+    """Test the persistent scan index cache"""
+
+    appended_scan = """
+#S 25  ascan  c3th 1.33245 1.52245  40 0.15
+#N 2
+#L a  b
+1 2
+3 4
+"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.tmpdir, "test.dat")
+        self.index_fname = os.path.join(self.tmpdir, "test.dat.sfI")
+        with open(self.fname, "w") as f:
+            f.write(sftext)
+
+    def tearDown(self):
+        gc.collect()
+        for name in os.listdir(self.tmpdir):
+            os.unlink(os.path.join(self.tmpdir, name))
+        os.rmdir(self.tmpdir)
+
+    def test_index_reused(self):
+        sf = SpecFile(self.fname, index_filename=self.index_fname)
+        self.assertTrue(os.path.isfile(self.index_fname))
+        keys = sf.keys()
+        del sf
+
+        sf = SpecFile(self.fname, index_filename=self.index_fname)
+        self.assertEqual(sf.keys(), keys)
+        self.assertEqual(sf.keys(), SpecFile(self.fname).keys())
+        self.assertEqual(sf["1.2"].labels, ["uno", "duo"])
+        self.assertAlmostEqual(sf[0].data_line(1)[2], 1.56)
+        self.assertEqual(sf[0].motor_names[0], "Pslit HGap")
+
+    def test_index_extended(self):
+        sf = SpecFile(self.fname, index_filename=self.index_fname)
+        self.assertEqual(len(sf), 4)
+        del sf
+
+        with open(self.fname, "a") as f:
+            f.write(self.appended_scan)
+
+        sf = SpecFile(self.fname, index_filename=self.index_fname)
+        self.assertEqual(sf.keys(), ["1.1", "25.1", "26.1", "1.2", "25.2"])
+        self.assertEqual(sf["25.2"].labels, ["a", "b"])
+        self.assertEqual(sf["25.2"].data.shape, (2, 2))
+        # previous last scan is unchanged
+        self.assertEqual(sf["1.2"].data.shape, (2, 3))
+        del sf
+
+        # updated index file is consistent with the file
+        sf = SpecFile(self.fname, index_filename=self.index_fname)
+        self.assertEqual(sf.keys(), ["1.1", "25.1", "26.1", "1.2", "25.2"])
+
+    def test_index_invalidated(self):
+        sf = SpecFile(self.fname, index_filename=self.index_fname)
+        del sf
+
+        # a smaller file is a different file
+        with open(self.fname, "w") as f:
+            f.write(self.appended_scan.lstrip())
+
+        sf = SpecFile(self.fname, index_filename=self.index_fname)
+        self.assertEqual(sf.keys(), ["25.1"])
+        self.assertEqual(sf[0].data.shape, (2, 2))
+
+    def test_corrupted_index(self):
+        with open(self.index_fname, "wb") as f:
+            f.write(b"not an index")
+        sf = SpecFile(self.fname, index_filename=self.index_fname)
+        self.assertEqual(sf.keys(), ["1.1", "25.1", "26.1", "1.2"])
+
+
+class TestSFRefresh(unittest.TestCase):
+    """Test reading a file while it is being written"""
+
+    def setUp(self):
+        fd, self.fname = tempfile.mkstemp(text=False)
+        os.close(fd)
+        with open(self.fname, "w") as f:
+            f.write(sftext)
+
+    def tearDown(self):
+        gc.collect()
+        os.unlink(self.fname)
+
+    def append(self, text):
+        with open(self.fname, "a") as f:
+            f.write(text)
+
+    def test_refresh(self):
+        sf = SpecFile(self.fname)
+        self.assertEqual(sf["1.2"].data.shape, (2, 3))
+        self.assertFalse(sf.refresh())
+
+        # new lines in last scan, partially written new scan
+        self.append("7 8\n@A 9 10 11\n#S 2 bbbbbb\n#N 2\n#L a  b\n1 2\n3")
+        self.assertTrue(sf.refresh())
+        self.assertEqual(sf.keys(), ["1.1", "25.1", "26.1", "1.2", "2.1"])
+        self.assertEqual(sf["1.2"].data.shape, (2, 4))
+        self.assertEqual(list(sf["1.2"].data[:, 3]), [7, 8])
+        self.assertEqual(len(sf["1.2"].mca), 4)
+
+        self.append(" 4\n5 6\n")
+        self.assertTrue(sf.refresh())
+        self.assertEqual(len(sf), 5)
+        self.assertEqual(sf["2.1"].labels, ["a", "b"])
+        self.assertEqual(sf["2.1"].data.shape, (2, 3))
+        self.assertEqual(list(sf["2.1"].data[1]), [2, 4, 6])
+
+    def test_refresh_any_split(self):
+        """Appended text split anywhere is indexed as the complete text"""
+        appended = ("7 8\n@A 9 10 11\n#C comment\n#S 12 bb\n#N 2\n#L a  b\n"
+                    "1 2\n@A 1 2\n3 4\n#S 13 cc\n#N 1\n#L c\n5\n")
+        with open(self.fname, "a") as f:
+            f.write(appended)
+        expected = SpecFile(self.fname)
+        expected_keys = expected.keys()
+        expected_data = [expected[i].data.tolist() for i in range(len(expected))]
+        expected_mca = [len(expected[i].mca) for i in range(len(expected))]
+        del expected
+
+        for split in range(1, len(appended)):
+            with open(self.fname, "w") as f:
+                f.write(sftext + appended[:split])
+            sf = SpecFile(self.fname)
+            self.append(appended[split:])
+            self.assertTrue(sf.refresh())
+            self.assertEqual(sf.keys(), expected_keys)
+            self.assertEqual([sf[i].data.tolist() for i in range(len(sf))],
+                             expected_data)
+            self.assertEqual([len(sf[i].mca) for i in range(len(sf))],
+                             expected_mca)
+
+    def test_refresh_incomplete_scan_line(self):
+        """The number of a scan is read again if its #S line was incomplete"""
+        sf = SpecFile(self.fname)
+        self.append("#S 1")
+        self.assertTrue(sf.refresh())
+        self.assertEqual(sf.keys()[-1], "1.3")
+        self.append("2 bb\n#N 1\n#L a\n1\n")
+        self.assertTrue(sf.refresh())
+        self.assertEqual(sf.keys(), ["1.1", "25.1", "26.1", "1.2", "12.1"])
+        self.assertEqual(sf["12.1"].data.tolist(), [[1]])
+
+    def test_refresh_truncated(self):
+        sf = SpecFile(self.fname)
+        with open(self.fname, "w") as f:
+            f.write(sftext[:100])
+        with self.assertRaises(specfile.SfErrFileRead):
+            sf.refresh()
+
+    def test_follow(self):
+        sf = SpecFile(self.fname)
+        # incomplete line is not yielded
+        self.append("7 ")
+        timer = threading.Timer(
+                0.1, self.append,
+                args=("8\n@A 1 2 \\\n 3\n9 10\n#S 2 bb\n#N 1\n#L a\n1\n2\n",))
+        timer.start()
+        new_lines = list(sf.follow(poll_interval=0.01, timeout=0.5))
+        timer.join()
+
+        self.assertEqual(len(new_lines), 2)
+        scan_index, lines = new_lines[0]
+        self.assertEqual(scan_index, 3)
+        self.assertEqual(lines.tolist(), [[7, 8], [9, 10]])
+        scan_index, lines = new_lines[1]
+        self.assertEqual(scan_index, 4)
+        self.assertEqual(lines.tolist(), [[1], [2]])
+        # index is up to date
+        self.assertEqual(sf[4].data.shape, (1, 2))
+
+
+class TestSFData(unittest.TestCase):
+    """Test parsing of scan data blocks"""
+
+    sftext = """#S 1 irregular
+#N 3
+#L a  b  c
+1 2 3
+4\t5\t\t6
+#C comment in the data block
+ 7   8 9
+10 11
+@A 1 2 3 \\
+4 5 6
+12 13 14
+"""
+
+    def setUp(self):
+        fd, self.fname = tempfile.mkstemp(text=False)
+        os.close(fd)
+        with open(self.fname, "w") as f:
+            f.write(self.sftext)
+        self.sf = SpecFile(self.fname)
+
+    def tearDown(self):
+        del self.sf
+        gc.collect()
+        os.unlink(self.fname)
+
+    def test_data(self):
+        data = self.sf.data(0)
+        self.assertEqual(data.dtype, numpy.float64)
+        # irregular line and MCA spectrum are skipped
+        self.assertTrue(numpy.array_equal(
+            data,
+            [[1, 2, 3], [4, 5, 6], [7, 8, 9], [12, 13, 14]]))
+
+    def test_column_cache(self):
+        scan = self.sf[0]
+        column = scan.data_column_by_name("b")
+        self.assertTrue(numpy.array_equal(column, [2, 5, 8, 13]))
+        # modifying the column does not modify the cached data array
+        column[0] = -1
+        self.assertEqual(scan.data[1, 0], 2)
+        self.assertEqual(scan.data_column_by_name("b")[0], 2)
+
+    def test_mca_as_array(self):
+        mca_array = self.sf[0].mca.as_array()
+        # continued spectrum
+        self.assertEqual(mca_array.shape, (1, 1, 6))
+        self.assertEqual(mca_array[0, 0].tolist(), [1, 2, 3, 4, 5, 6])
+
+    def test_incomplete_last_line(self):
+        with open(self.fname, "a") as f:
+            f.write("15 16 17")
+        sf = SpecFile(self.fname)
+        self.assertEqual(sf.data(0).shape, (4, 3))
+
+
 class TestSFLocale(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -427,6 +688,12 @@ def suite():
         unittest.defaultTestLoader.loadTestsFromTestCase(TestSpecFile))
     test_suite.addTest(
         unittest.defaultTestLoader.loadTestsFromTestCase(TestSFLocale))
+    test_suite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestSFIndexFile))
+    test_suite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestSFRefresh))
+    test_suite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestSFData))
     return test_suite
 
 
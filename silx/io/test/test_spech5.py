@@ -38,6 +38,7 @@ from .. import spech5
 from ..spech5 import (SpecH5, SpecH5Group,
                       SpecH5Dataset, spec_date_to_iso8601)
 from .. import specfile
+from .. import commonh5
 
 try:
     import h5py
@@ -46,7 +47,7 @@ except ImportError:
 
 __authors__ = ["P. Knobel"]
 __license__ = "MIT"
-__date__ = "26/07/2017"
+__date__ = "18/10/2017"
 
 sftext = """#F /tmp/sf.dat
 #E 1455180875
@@ -383,6 +384,25 @@ class TestSpecH5(unittest.TestCase):
                 scan_header.split("\n")[3],
                 "#P1 4.74255 6.197579 2.238283")
 
+    def testMcaDataViews(self):
+        mca0 = self.sfh5["/1.2/instrument/mca_0/data"]
+        mca1 = self.sfh5["/1.2/instrument/mca_1/data"]
+        self.assertEqual(mca1.shape, (3, 3))
+        self.assertEqual(mca1[1].tolist(), [7, 6, 5])
+        self.assertEqual(mca0[()].tolist(),
+                         [[0, 1, 2], [3.1, 4, 5], [6, 7.7, 8]])
+
+    def testMcaDataWritable(self):
+        """MCA data can be modified in place, as h5py data"""
+        mca1 = self.sfh5["/1.2/instrument/mca_1/data"][()].tolist()
+        data = self.sfh5["/1.2/instrument/mca_0/data"][()]
+        self.assertTrue(data.flags.writeable)
+        data[...] = -1
+        self.assertEqual(data.max(), -1)
+        # The spectra of the other analysers are not modified
+        self.assertEqual(
+            self.sfh5["/1.2/instrument/mca_1/data"][()].tolist(), mca1)
+
     def testLinks(self):
         self.assertTrue(
             array_equal(self.sfh5["/1.2/measurement/mca_0/data"],
@@ -406,6 +426,77 @@ class TestSpecH5(unittest.TestCase):
         self.assertEqual(self.sfh5["/1.2/measurement/mca_0/info/elapsed_time"],
                          self.sfh5["/1.2/instrument/mca_0/elapsed_time"])
 
+    def testLazyScanGroups(self):
+        """Scan groups are indexed at opening, built on access"""
+        sf = specfile.SpecFile(self.fname)
+        self.assertEqual(list(self.sfh5.keys()), sf.keys())
+        self.assertEqual(len(self.sfh5), len(sf))
+        scan_group = self.sfh5["1.2"]
+        self.assertIsInstance(scan_group, commonh5.LazyLoadableGroup)
+        self.assertEqual(scan_group.attrs["NX_class"], "NXentry")
+        self.assertIn("measurement", scan_group)
+
+    def testLazyScanCreation(self):
+        """No Scan is created before the children of a group are accessed"""
+        created_scans = []
+
+        class CountingSpecFile(specfile.SpecFile):
+            def __getitem__(self, key):
+                scan = specfile.SpecFile.__getitem__(self, key)
+                created_scans.append(scan.number)
+                return scan
+
+        spec_file_class = spech5.SpecFile
+        spech5.SpecFile = CountingSpecFile
+        try:
+            sfh5 = SpecH5(self.fname)
+        finally:
+            spech5.SpecFile = spec_file_class
+
+        self.assertEqual(len(sfh5.keys()), 5)
+        scan_group = sfh5["1.2"]
+        self.assertEqual(scan_group.attrs["NX_class"], "NXentry")
+        self.assertEqual(created_scans, [])
+
+        self.assertIn("measurement", scan_group)
+        self.assertEqual(created_scans, [1])
+        sfh5["1.2/title"]
+        sfh5["25.1/title"]
+        self.assertEqual(created_scans, [1, 25])
+        sfh5.close()
+
+    def testRefresh(self):
+        self.assertFalse(self.sfh5.refresh())
+        with open(self.fname, "a") as f:
+            f.write("#S 2000 bbbbbb\n#N 2\n#L a  b\n1 2\n")
+        try:
+            self.assertTrue(self.sfh5.refresh())
+            self.assertIn("2000.1", self.sfh5)
+            self.assertEqual(list(self.sfh5["2000.1/measurement/b"]), [2])
+        finally:
+            with open(self.fname, "w") as f:
+                f.write(sftext)
+
+    def testRefreshIncompleteScanLine(self):
+        """The group of a scan is renamed when its #S line is completed"""
+        with open(self.fname, "a") as f:
+            f.write("#S 2")
+        try:
+            sfh5 = SpecH5(self.fname)
+            self.assertIn("2.1", sfh5)
+            with open(self.fname, "a") as f:
+                f.write("000 bbbbbb\n#N 2\n#L a  b\n1 2\n")
+            self.assertTrue(sfh5.refresh())
+            self.assertNotIn("2.1", sfh5)
+            self.assertEqual(list(sfh5.keys()),
+                             ["1.1", "25.1", "1.2", "1000.1", "1001.1",
+                              "2000.1"])
+            self.assertEqual(list(sfh5["2000.1/measurement/b"]), [2])
+            sfh5.close()
+        finally:
+            with open(self.fname, "w") as f:
+                f.write(sftext)
+
     def testListScanIndices(self):
         self.assertEqual(list(self.sfh5.keys()),
                          ["1.1", "25.1", "1.2", "1000.1", "1001.1"])
@@ -748,6 +839,25 @@ sftext_no_cols = r"""#F C:/DATA\test.mca
 @A 6 7.7 8
 @A 4 3 2
 @A 1 1 1
+
+#S 4 31oct98.dat 22.1 If4
+#D Thu Jul  7 08:40:19 2016
+#C no data cols, 2 mca analysers, incomplete last point
+#@MCADEV 1
+#@MCA %16C
+#@CHANN 3 0 2 1
+#@CALIB 1 2 3
+#@CTIME 123.4 234.5 345.6
+#@MCADEV 2
+#@MCA %16C
+#@CHANN 3 0 2 1
+#@CALIB 1 2 3
+#@CTIME 123.4 234.5 345.6
+@A 0 1 2
+@A 10 9 8
+@A 1 1 1.1
+@A 3.1 4 5
+@A 7 6 5
 """
 
 
@@ -804,6 +914,12 @@ class TestSpecH5NoDataCols(unittest.TestCase):
         self.assertNotIn("mca_3",
                          self.sfh5["3.1/instrument/"])
 
+    def testScan4(self):
+        # 4.1: 2 analysers, 5 spectra: last spectrum is ignored
+        data = self.sfh5["4.1/instrument/mca_1/data"]
+        self.assertEqual(data.shape, (2, 3))
+        self.assertEqual(data[()].tolist(), [[10, 9, 8], [3.1, 4, 5]])
+
 
 sf_text_slash = r"""#F /data/id09/archive/logspecfiles/laue/2016/scan_231_laue_16-11-29.dat
 #D Sat Dec 10 22:20:59 2016
@@ -24,6 +24,7 @@
 """Tests for SpecFile to HDF5 converter"""
 
 import gc
+import numpy
 from numpy import array_equal, string_
 import os
 import sys
@@ -38,6 +39,7 @@ else:
     h5py_missing = False
     from ..spech5 import SpecH5, SpecH5Group
     from ..convert import convert, write_to_h5
+    from .. import commonh5
 
 __authors__ = ["P. Knobel"]
 __license__ = "MIT"
@@ -195,10 +197,54 @@ class TestConvertSpecHDF5(unittest.TestCase):
         )
 
 
+@unittest.skipIf(h5py_missing, "Could not import h5py")
+class TestConvertBySlabs(unittest.TestCase):
+    """Test copying large datasets by slabs"""
+
+    def setUp(self):
+        fd, self.h5_fname = tempfile.mkstemp(suffix=".h5")
+        os.close(fd)
+        self.data = numpy.arange(1000 * 16, dtype=numpy.float32)
+        self.data.shape = 1000, 16
+        self.h5like = commonh5.File("test.h5", mode="w")
+        self.h5like["group/data"] = self.data
+        self.h5like["group/data"].attrs["interpretation"] = "spectrum"
+        self.h5like["scalar"] = 10
+
+    def tearDown(self):
+        os.unlink(self.h5_fname)
+
+    def testSlabs(self):
+        with h5py.File(self.h5_fname, "w") as h5f:
+            write_to_h5(self.h5like, h5f, slab_size=1000,
+                        create_dataset_args={"chunks": (10, 16),
+                                             "compression": "gzip"})
+            dataset = h5f["/group/data"]
+            self.assertTrue(array_equal(dataset[()], self.data))
+            self.assertEqual(dataset.chunks, (10, 16))
+            self.assertEqual(dataset.compression, "gzip")
+            self.assertEqual(dataset.attrs["interpretation"], b"spectrum")
+            self.assertEqual(h5f["/scalar"][()], 10)
+
+    def testReadError(self):
+        class BrokenDataset(commonh5.Dataset):
+            def __getitem__(self, item):
+                if isinstance(item, slice) and item.start:
+                    raise IOError("Read error")
+                return commonh5.Dataset.__getitem__(self, item)
+
+        self.h5like.add_node(BrokenDataset("broken", self.data))
+        with h5py.File(self.h5_fname, "w") as h5f:
+            with self.assertRaises(IOError):
+                write_to_h5(self.h5like, h5f, slab_size=1000)
+
+
 def suite():
     test_suite = unittest.TestSuite()
     test_suite.addTest(
         unittest.defaultTestLoader.loadTestsFromTestCase(TestConvertSpecHDF5))
+    test_suite.addTest(
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestConvertBySlabs))
     return test_suite
 
 
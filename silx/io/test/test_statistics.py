@@ -0,0 +1,180 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (c) 2017 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+"""Test for silx.io.statistics module"""
+
+__authors__ = ["V. Valls"]
+__license__ = "MIT"
+__date__ = "18/10/2017"
+
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+from .. import statistics
+
+
+class TestComputeStatistics(unittest.TestCase):
+
+    def test_values(self):
+        data = numpy.random.normal(size=(50, 30, 20)) * 10
+        data[3, 4, 5] = numpy.nan
+        data[7, 1, 2] = numpy.inf
+        stats = statistics.compute_statistics(data, nbins=64, slab_size=1000)
+        finite = data[numpy.isfinite(data)]
+        self.assertEqual(stats.shape, data.shape)
+        self.assertEqual(stats.count, finite.size)
+        self.assertEqual(stats.minimum, finite.min())
+        self.assertEqual(stats.maximum, finite.max())
+        self.assertEqual(stats.min_positive, finite[finite > 0].min())
+        self.assertAlmostEqual(stats.mean, finite.mean())
+        self.assertAlmostEqual(stats.std, finite.std())
+
+        self.assertEqual(len(stats.histogram), 64)
+        self.assertEqual(len(stats.bin_edges), 65)
+        self.assertEqual(stats.histogram.sum(), finite.size)
+        self.assertLessEqual(stats.bin_edges[0], finite.min())
+        self.assertGreaterEqual(stats.bin_edges[-1], finite.max())
+
+    def test_histogram_growth(self):
+        # the range of the first slab is much smaller than the final range
+        data = numpy.zeros((10, 100), dtype=numpy.int32)
+        data[0] = numpy.arange(100)
+        data[5] = -1000
+        data[9] = 5000
+        stats = statistics.compute_statistics(data, nbins=16, slab_size=400)
+        expected, _ = numpy.histogram(data, bins=stats.bin_edges)
+        self.assertEqual(stats.histogram.sum(), data.size)
+        # values on the edges can be rounded to the neighbour bin
+        self.assertLessEqual(numpy.abs(stats.histogram - expected).max(), 1)
+
+    def test_no_finite_values(self):
+        data = numpy.array([numpy.nan, numpy.inf])
+        stats = statistics.compute_statistics(data)
+        self.assertEqual(stats.count, 0)
+        self.assertIsNone(stats.minimum)
+        self.assertIsNone(stats.std)
+        self.assertIsNone(stats.histogram)
+
+    def test_attrs(self):
+        data = numpy.arange(-5, 10)
+        stats = statistics.compute_statistics(data)
+        attrs = stats.to_attrs()
+        result = statistics.Statistics.from_attrs(attrs)
+        self.assertEqual(result.shape, (15,))
+        self.assertEqual(result.minimum, -5)
+        self.assertEqual(result.min_positive, 1)
+        numpy.testing.assert_array_equal(result.histogram, stats.histogram)
+        self.assertIsNone(statistics.Statistics.from_attrs({}))
+
+
+@unittest.skipIf(h5py is None, "h5py is needed")
+class TestGetStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_directory, "data.h5")
+        with h5py.File(self.filename, "w") as h5f:
+            h5f.create_dataset("data", data=numpy.arange(1000.).reshape(10, 100),
+                               chunks=(2, 100))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_directory)
+
+    def test_save(self):
+        with h5py.File(self.filename, "a") as h5f:
+            stats = statistics.get_statistics(h5f["data"], save=True)
+            self.assertEqual(stats.maximum, 999)
+            self.assertIn("silx_statistics_maximum", h5f["data"].attrs)
+
+        with h5py.File(self.filename, "r") as h5f:
+            dataset = h5f["data"]
+            # the statistics are read from the attributes
+            stats = statistics.get_statistics(dataset)
+            self.assertEqual(stats.maximum, 999)
+            self.assertEqual(stats.mean, 499.5)
+            self.assertIs(statistics.get_statistics(dataset), stats)
+
+    def test_resized(self):
+        with h5py.File(self.filename, "a") as h5f:
+            stats = statistics.get_statistics(h5f["data"], save=True)
+            attrs = stats.to_attrs()
+            del h5f["data"]
+            h5f["data"] = numpy.arange(10)
+            for key, value in attrs.items():
+                h5f["data"].attrs[key] = value
+            stats = statistics.get_statistics(h5f["data"])
+            self.assertEqual(stats.maximum, 9)
+
+    def test_nbins(self):
+        with h5py.File(self.filename, "a") as h5f:
+            statistics.get_statistics(h5f["data"], nbins=16, save=True)
+
+        with h5py.File(self.filename, "r") as h5f:
+            stats = statistics.get_statistics(h5f["data"], nbins=16)
+            self.assertEqual(len(stats.histogram), 16)
+            # the saved histogram does not have the requested bins
+            stats = statistics.get_statistics(h5f["data"], nbins=32)
+            self.assertEqual(len(stats.histogram), 32)
+            # the cached histogram is updated
+            self.assertIs(statistics.get_statistics(h5f["data"], nbins=32), stats)
+            # no histogram needed
+            self.assertIs(statistics.get_statistics(h5f["data"], nbins=0), stats)
+
+    def test_cache(self):
+        with h5py.File(self.filename, "r") as h5f:
+            self.assertIsNone(statistics.get_statistics(h5f["data"], compute=False))
+            stats = statistics.get_statistics(h5f["data"])
+            # another access creates another h5py object
+            self.assertIs(statistics.get_statistics(h5f["/data"], compute=False), stats)
+
+        with h5py.File(self.filename, "r") as h5f:
+            # the cache is invalidated when the file is opened again
+            self.assertIsNone(statistics.get_statistics(h5f["data"], compute=False))
+
+    def test_read_only(self):
+        with h5py.File(self.filename, "r") as h5f:
+            stats = statistics.get_statistics(h5f["data"], save=True)
+            self.assertEqual(stats.minimum, 0)
+            self.assertNotIn("silx_statistics_maximum", h5f["data"].attrs)
+
+
+def suite():
+    loadTests = unittest.defaultTestLoader.loadTestsFromTestCase
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(loadTests(TestComputeStatistics))
+    test_suite.addTest(loadTests(TestGetStatistics))
+    return test_suite
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest="suite")
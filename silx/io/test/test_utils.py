@@ -392,6 +392,52 @@ class TestOpen(unittest.TestCase):
             self.assertIsNotNone(f)
             self.assertEquals(f.h5py_class, h5py.File)
 
+    def testNumpy(self):
+        tmp = tempfile.NamedTemporaryFile(suffix=".npy", delete=True)
+        tmp.file.close()
+        numpy.save(tmp.name, numpy.arange(10))
+
+        with utils.open(tmp.name) as f:
+            self.assertEqual(f["data"].shape, (10,))
+
+    def testRegisterFormat(self):
+        tmp = tempfile.NamedTemporaryFile(mode="w+t", suffix=".txt", delete=False)
+        tmp.write("MYFORMAT 10")
+        tmp.close()
+        self.addCleanup(os.unlink, tmp.name)
+
+        def sniffer(header, filename):
+            return header.startswith(b"MYFORMAT")
+
+        def opener(filename):
+            from .. import commonh5
+            h5 = commonh5.File(filename, mode="w")
+            h5["value"] = 10
+            return h5
+
+        utils.register_format("myformat", sniffer, opener)
+        self.addCleanup(utils._formats.remove,
+                        ("myformat", sniffer, opener))
+
+        f = utils.open(tmp.name)
+        self.assertEqual(f["value"][()], 10)
+
+    def testSniffing(self):
+        self.assertTrue(utils._is_spec_header(b"\n#F /tmp/a.dat\n#D\n", ""))
+        self.assertTrue(utils._is_spec_header(b"#S 1 ascan\n", ""))
+        self.assertFalse(utils._is_spec_header(b"#Seconds\n", ""))
+        self.assertTrue(utils._is_numpy_header(b"\x93NUMPY\x01\x00", ""))
+        self.assertTrue(utils._is_numpy_header(b"PK\x03\x04", "a.npz"))
+        self.assertFalse(utils._is_numpy_header(b"PK\x03\x04", "a.zip"))
+        self.assertTrue(utils._is_fabio_header(b"II*\x00", ""))
+        self.assertTrue(utils._is_fabio_header(b"{\nHeaderID = EH:1;\n}", ""))
+        if h5py is not None:
+            self.assertTrue(utils._is_hdf5_header(utils._HDF5_SIGNATURE, ""))
+            header = b"\x00" * 1024 + utils._HDF5_SIGNATURE
+            self.assertTrue(utils._is_hdf5_header(header, ""))
+            header = b"\x00" * 1000 + utils._HDF5_SIGNATURE
+            self.assertFalse(utils._is_hdf5_header(header, ""))
+
     def testUnsupported(self):
         # create a file
         tmp = tempfile.NamedTemporaryFile(mode="w+t", suffix=".txt", delete=True)
@@ -377,6 +377,93 @@ def h5ls(h5group, lvl=0):
     return h5repr
 
 
+_SNIFF_SIZE = 4096
+"""Number of bytes read at the beginning of a file to guess its format"""
+
+_HDF5_SIGNATURE = b"\x89HDF\r\n\x1a\n"
+
+_formats = []
+"""Registered formats as a list of (name, sniffer, opener)"""
+
+
+def register_format(name, sniffer, opener):
+    """Register a file format which can be loaded by :meth:`open`.
+
+    The sniffers of the registered formats are called with the first bytes
+    of the file, the first format recognizing the file is used to load it.
+    Formats registered last are checked first, which allows to override
+    the formats provided by silx.
+
+    :param str name: Name of the format
+    :param callable sniffer: Function with the signature
+        ``sniffer(header, filename)`` returning True if the file is in this
+        format. ``header`` contains at most the 4096 first bytes of the file.
+        It should be fast and should not read the file.
+    :param callable opener: Function with the signature ``opener(filename)``
+        returning an `h5py.File`-like object
+    """
+    _formats.insert(0, (name, sniffer, opener))
+
+
+def _is_hdf5_header(header, filename):
+    """Check the HDF5 signature, which can be found after a user block
+    of 512, 1024, 2048… bytes"""
+    if h5py_missing:
+        return False
+    offset = 0
+    while offset + len(_HDF5_SIGNATURE) <= len(header):
+        if header[offset:offset + len(_HDF5_SIGNATURE)] == _HDF5_SIGNATURE:
+            return True
+        offset = 512 if offset == 0 else offset * 2
+    return False
+
+
+def _open_hdf5(filename):
+    return h5py.File(filename, "r")
+
+
+def _is_numpy_header(header, filename):
+    if header.startswith(b"\x93NUMPY"):
+        return True
+    _, extension = os.path.splitext(filename)
+    return extension == ".npz" and header.startswith(b"PK\x03\x04")
+
+
+def _open_numpy(filename):
+    from . import rawh5
+    return rawh5.NumpyFile(filename)
+
+
+def _is_spec_header(header, filename):
+    """A SPEC file starts with a file header (``#F``) or a scan (``#S``)"""
+    first_line = header.lstrip().split(b"\n", 1)[0]
+    return first_line[:2] in (b"#F", b"#S") and first_line[2:3].isspace()
+
+
+def _open_spec(filename):
+    from . import spech5
+    return spech5.SpecH5(filename)
+
+
+def _is_fabio_header(header, filename):
+    """Detect the most common raster formats: EDF and TIFF"""
+    if header.startswith((b"II*\x00", b"MM\x00*")):
+        return True
+    return header.lstrip().startswith(b"{") and b"}" in header
+
+
+def _open_fabio(filename):
+    from . import fabioh5
+    return fabioh5.File(filename)
+
+
+# Checked in the reverse order
+register_format("fabio", _is_fabio_header, _open_fabio)
+register_format("spec", _is_spec_header, _open_spec)
+register_format("numpy", _is_numpy_header, _open_numpy)
+register_format("hdf5", _is_hdf5_header, _open_hdf5)
+
+
 def open(filename):  # pylint:disable=redefined-builtin
     """
     Load a file as an `h5py.File`-like object.
@@ -387,6 +474,10 @@ def open(filename):  # pylint:disable=redefined-builtin
     - raster files exposed as a NeXus layout (if `fabio` is installed)
     - Numpy files ('npy' and 'npz' files)
 
+    The format is guessed from the first bytes of the file (see
+    :meth:`register_format`). If it is not recognized, each format is tried
+    in turn.
+
     The file is opened in read-only mode.
 
     :param str filename: A filename
@@ -397,14 +488,34 @@ def open(filename):  # pylint:disable=redefined-builtin
         raise IOError("Filename '%s' must be a file path" % filename)
 
     debugging_info = []
+    tried = set()
+
+    with builtin_open(filename, "rb") as f:
+        header = f.read(_SNIFF_SIZE)
+
+    for name, sniffer, opener in list(_formats):
+        try:
+            recognized = sniffer(header, filename)
+        except Exception:
+            debugging_info.append((sys.exc_info(),
+                                   "Format '%s' sniffer failed." % name))
+            continue
+        if not recognized:
+            continue
+        tried.add(name)
+        try:
+            return opener(filename)
+        except Exception:
+            debugging_info.append((sys.exc_info(),
+                                   "File '%s' can't be read as '%s' file." % (filename, name)))
 
     _, extension = os.path.splitext(filename)
 
-    if not h5py_missing:
+    if not h5py_missing and "hdf5" not in tried:
         if h5py.is_hdf5(filename):
             return h5py.File(filename, "r")
 
-    if extension in [".npz", ".npy"]:
+    if extension in [".npz", ".npy"] and "numpy" not in tried:
         try:
             from . import rawh5
             return rawh5.NumpyFile(filename)
@@ -412,24 +523,26 @@ def open(filename):  # pylint:disable=redefined-builtin
             debugging_info.append((sys.exc_info(),
                                   "File '%s' can't be read as a numpy file." % filename))
 
-    try:
-        from . import fabioh5
-        return fabioh5.File(filename)
-    except ImportError:
-        debugging_info.append((sys.exc_info(), "fabioh5 can't be loaded."))
-    except Exception:
-        debugging_info.append((sys.exc_info(),
-                               "File '%s' can't be read as fabio file." % filename))
-
-    try:
-        from . import spech5
-        return spech5.SpecH5(filename)
-    except ImportError:
-        debugging_info.append((sys.exc_info(),
-                               "spech5 can't be loaded."))
-    except IOError:
-        debugging_info.append((sys.exc_info(),
-                               "File '%s' can't be read as spec file." % filename))
+    if "fabio" not in tried:
+        try:
+            from . import fabioh5
+            return fabioh5.File(filename)
+        except ImportError:
+            debugging_info.append((sys.exc_info(), "fabioh5 can't be loaded."))
+        except Exception:
+            debugging_info.append((sys.exc_info(),
+                                   "File '%s' can't be read as fabio file." % filename))
+
+    if "spec" not in tried:
+        try:
+            from . import spech5
+            return spech5.SpecH5(filename)
+        except ImportError:
+            debugging_info.append((sys.exc_info(),
+                                   "spech5 can't be loaded."))
+        except IOError:
+            debugging_info.append((sys.exc_info(),
+                                   "File '%s' can't be read as spec file." % filename))
 
     for exc_info, message in debugging_info:
         logger.debug(message, exc_info=exc_info)
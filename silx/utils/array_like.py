@@ -48,13 +48,14 @@ Functions:
 """
 
 from __future__ import absolute_import, print_function, division
+import collections
 import numpy
 import sys
 from silx.third_party import six
 
 __authors__ = ["P. Knobel"]
 __license__ = "MIT"
-__date__ = "26/04/2017"
+__date__ = "18/10/2017"
 
 
 def is_array(obj):
@@ -195,6 +196,37 @@ def get_concatenated_dtype(arrays):
     return numpy.array(dummy).dtype
 
 
+_INTEGER_TYPES = six.integer_types + (numpy.integer,)
+
+
+class _BlockCache(object):
+    """Least recently used cache of blocks of data.
+
+    :param int size: Maximum number of blocks kept in memory
+    """
+    def __init__(self, size):
+        self.__size = size
+        self.__blocks = collections.OrderedDict()
+
+    def get(self, key):
+        """Returns the block stored for a key, else None."""
+        block = self.__blocks.pop(key, None)
+        if block is not None:
+            self.__blocks[key] = block
+        return block
+
+    def put(self, key, block):
+        """Store a block, removing the least recently used ones if needed."""
+        self.__blocks.pop(key, None)
+        self.__blocks[key] = block
+        while len(self.__blocks) > self.__size:
+            self.__blocks.popitem(last=False)
+
+    def clear(self):
+        """Remove all the blocks."""
+        self.__blocks.clear()
+
+
 class ListOfImages(object):
     """This class provides a way to access values and slices in a stack of
     images stored as a list of 2D numpy arrays, without creating a 3D numpy
@@ -236,6 +268,9 @@ class ListOfImages(object):
         self.images = images
         """List of images"""
 
+        self.__ranges = {}
+        """Min and max of each image, indexed by image id"""
+
         self.shape = (len(images), ) + image0_shape
         """Tuple of array dimensions"""
         self.dtype = get_concatenated_dtype(images)
@@ -314,8 +349,10 @@ class ListOfImages(object):
         elif list(self.transposition) != list(range(self.ndim)):
             transposition = [self.transposition[i] for i in transposition]
 
-        return ListOfImages(self.images,
+        view = ListOfImages(self.images,
                             transposition)
+        view.__ranges = self.__ranges
+        return view
 
     @property
     def T(self):
@@ -361,7 +398,7 @@ class ListOfImages(object):
         frozen_dimensions = []
         for i, idx in enumerate(item):
             # slices and sequences
-            if not isinstance(idx, int):
+            if not isinstance(idx, _INTEGER_TYPES):
                 output_dimensions.append(self.transposition[i])
             # regular integer index
             else:
@@ -392,25 +429,39 @@ class ListOfImages(object):
             return numpy.transpose(numpy.array(output_stack),
                                    axes=output_dimensions)
 
+    def __get_range(self, image):
+        """Returns the min and max of an image, from the cache if possible.
+
+        :rtype: tuple
+        """
+        cached = self.__ranges.get(id(image))
+        if cached is not None and cached[0] is image:
+            return cached[1], cached[2]
+        vmin, vmax = image.min(), image.max()
+        # the image is stored to avoid reuse of its id
+        self.__ranges[id(image)] = image, vmin, vmax
+        return vmin, vmax
+
+    def clear_cache(self):
+        """Drop the cached min and max of the images.
+
+        It has to be called if the content of the images is modified.
+        Images added to or replaced in :attr:`images` are detected
+        without it.
+        """
+        self.__ranges.clear()
+
     def min(self):
         """
         :return: Global minimum value
         """
-        min_value = self.images[0].min()
-        if len(self.images) > 1:
-            for img in self.images[1:]:
-                min_value = min(min_value, img.min())
-        return min_value
+        return min(self.__get_range(img)[0] for img in self.images)
 
     def max(self):
         """
         :return: Global maximum value
         """
-        max_value = self.images[0].max()
-        if len(self.images) > 1:
-            for img in self.images[1:]:
-                max_value = max(max_value, img.max())
-        return max_value
+        return max(self.__get_range(img)[1] for img in self.images)
 
 
 class DatasetView(object):
@@ -425,10 +476,25 @@ class DatasetView(object):
         in an unfavorable direction may still require the entire dataset to
         be read from disk.
 
+    To limit the reads, indices lists are read as a few contiguous
+    hyperslabs, and the chunks read by integer indices along the first
+    dimension of the dataset are kept in a small cache
+    (:meth:`clear_cache` has to be called if the dataset is modified).
+
     :param dataset: h5py dataset
     :param transposition: List of dimensions sorted in the order of
         transposition (relative to the original h5py dataset)
     """
+    _BLOCK_CACHE_SIZE = 4
+    """Number of chunks kept in memory"""
+
+    _BLOCK_MAX_BYTES = 2**24
+    """Chunks bigger than this size in bytes are not cached"""
+
+    _BLOCK_MIN_FRACTION = 0.25
+    """Reads covering less than this fraction of an item of the first
+    dimension are done directly, without reading and caching the chunk"""
+
     def __init__(self, dataset, transposition=None):
         """
 
@@ -437,6 +503,8 @@ class DatasetView(object):
         self.dataset = dataset
         """original dataset"""
 
+        self.__cache = _BlockCache(self._BLOCK_CACHE_SIZE)
+
         self.shape = dataset.shape
         """Tuple of array dimensions"""
         self.dtype = dataset.dtype
@@ -505,7 +573,10 @@ class DatasetView(object):
         """
         # no transposition, let the original dataset handle indexing
         if self.transposition == list(range(self.ndim)):
-            return self.dataset[item]
+            indices = self.__expand_indices(item)
+            if indices is None:
+                return self.dataset[item]
+            return self.__read(indices)
 
         # 1-D slicing: create a list of indices to switch to n-D slicing
         if not hasattr(item, "__len__"):
@@ -523,14 +594,14 @@ class DatasetView(object):
         # get list of indices sorted in the original dataset order
         sorted_indices = self.__sort_indices(item)
 
-        output_data_not_transposed = self.dataset[sorted_indices]
+        output_data_not_transposed = self.__read(sorted_indices)
 
         # now we must transpose the output data
         output_dimensions = []
         frozen_dimensions = []
         for i, idx in enumerate(item):
             # slices and sequences
-            if not isinstance(idx, int):
+            if not isinstance(idx, _INTEGER_TYPES):
                 output_dimensions.append(self.transposition[i])
             # regular integer index
             else:
@@ -550,6 +621,122 @@ class DatasetView(object):
         return numpy.transpose(output_data_not_transposed,
                                axes=output_dimensions)
 
+    def __expand_indices(self, item):
+        """Returns a tuple of one index per dimension from a numpy-like
+        index, or None if the index is not supported by :meth:`__read`.
+        """
+        if not isinstance(item, tuple):
+            item = (item,)
+        if len(item) > self.ndim:
+            return None
+        for idx in item:
+            if idx is Ellipsis or idx is None:
+                return None
+        return item + (slice(None),) * (self.ndim - len(item))
+
+    def __read(self, indices):
+        """Read data from the dataset.
+
+        An index list is sorted and read as contiguous slices, which is
+        much faster with h5py than a point selection.
+
+        :param tuple indices: One index per dimension of the dataset
+        :rtype: numpy.ndarray
+        """
+        fancy = [i for i, idx in enumerate(indices)
+                 if not isinstance(idx, _INTEGER_TYPES + (slice,))]
+        if len(fancy) != 1:
+            return self.__read_block(indices)
+
+        axis = fancy[0]
+        values = numpy.asarray(indices[axis])
+        if values.dtype.kind == "b" and values.ndim == 1:
+            values = numpy.nonzero(values)[0]
+        if values.ndim != 1 or values.size == 0 or values.dtype.kind not in "iu":
+            return self.dataset[indices]
+        size = self.dataset.shape[axis]
+        if values.min() < -size or values.max() >= size:
+            raise IndexError("Index out of range")
+        values = numpy.where(values < 0, values + size, values)
+
+        unique, inverse = numpy.unique(values, return_inverse=True)
+        runs = numpy.split(unique, numpy.nonzero(numpy.diff(unique) != 1)[0] + 1)
+        # position of the axis in the output array
+        output_axis = len([idx for idx in indices[:axis]
+                           if not isinstance(idx, _INTEGER_TYPES)])
+        parts = []
+        for run in runs:
+            run_indices = list(indices)
+            run_indices[axis] = slice(int(run[0]), int(run[-1]) + 1)
+            parts.append(self.__read_block(tuple(run_indices)))
+        data = numpy.concatenate(parts, axis=output_axis)
+        if len(unique) != len(values) or numpy.any(unique != values):
+            data = numpy.take(data, inverse, axis=output_axis)
+        return data
+
+    def __read_block(self, indices):
+        """Read data from the dataset, using the cached chunks when the first
+        dimension is indexed with an integer.
+
+        :param tuple indices: One index per dimension of the dataset
+        :rtype: numpy.ndarray
+        """
+        chunks = getattr(self.dataset, "chunks", None)
+        first = indices[0] if len(indices) > 0 else None
+        if chunks is None or not isinstance(first, _INTEGER_TYPES):
+            return self.dataset[indices]
+
+        shape = self.dataset.shape
+        block_bytes = self.dataset.dtype.itemsize * chunks[0]
+        for dim in shape[1:]:
+            block_bytes *= dim
+        if block_bytes > self._BLOCK_MAX_BYTES:
+            return self.dataset[indices]
+
+        if first < -shape[0] or first >= shape[0]:
+            raise IndexError("Index (%d) out of range (0-%d)" % (first, shape[0] - 1))
+        if first < 0:
+            first += shape[0]
+        start = first - first % chunks[0]
+        block = self.__cache.get(start)
+        if block is None:
+            if self.__selection_fraction(indices[1:]) < self._BLOCK_MIN_FRACTION:
+                return self.dataset[indices]
+            block = self.dataset[start:start + chunks[0]]
+            self.__cache.put(start, block)
+        data = block[(first - start,) + tuple(indices[1:])]
+        if isinstance(data, numpy.ndarray):
+            # do not expose the cached block
+            data = data.copy()
+        return data
+
+    def __selection_fraction(self, indices):
+        """Returns the fraction of the last dimensions of the dataset
+        selected by indices.
+
+        :param tuple indices: One index per dimension, except the first one
+        :rtype: float
+        """
+        fraction = 1.
+        for idx, dim in zip(indices, self.dataset.shape[1:]):
+            if dim == 0:
+                continue
+            if isinstance(idx, _INTEGER_TYPES):
+                count = 1
+            elif isinstance(idx, slice):
+                count = len(six.moves.range(*idx.indices(dim)))
+            else:
+                count = numpy.asarray(idx).size
+            fraction *= count / dim
+        return fraction
+
+    def clear_cache(self):
+        """Drop the chunks of data kept in memory.
+
+        It has to be called if the content of the dataset is modified.
+        """
+        self.__cache.clear()
+
     def __array__(self, dtype=None):
         """Cast the dataset into a numpy array, and return it.
 
@@ -581,8 +768,10 @@ class DatasetView(object):
         elif list(self.transposition) != list(range(self.ndim)):
             transposition = [self.transposition[i] for i in transposition]
 
-        return DatasetView(self.dataset,
+        view = DatasetView(self.dataset,
                            transposition)
+        view.__cache = self.__cache
+        return view
 
     @property
     def T(self):
@@ -26,7 +26,7 @@
 
 __authors__ = ["P. Knobel"]
 __license__ = "MIT"
-__date__ = "09/01/2017"
+__date__ = "18/10/2017"
 
 try:
     import h5py
@@ -208,6 +208,45 @@ class TestTransposedDatasetView(unittest.TestCase):
         self.assertTrue(numpy.array_equal(self.volume[:, 1, :],
                                           b[1]))
 
+    def testListIndex(self):
+        a = DatasetView(self.h5f["volume"])
+        self.assertTrue(numpy.array_equal(self.volume[[3, 0, 1, 1]],
+                                          a[[3, 0, 1, 1]]))
+        self.assertTrue(numpy.array_equal(self.volume[:, [8, 2, 3, -1], 1],
+                                          a[:, [8, 2, 3, -1], 1]))
+
+        b = DatasetView(self.h5f["volume"], transposition=(2, 0, 1))
+        expected = self.volume.transpose(2, 0, 1)[[5, 4, 6], 1, :]
+        self.assertTrue(numpy.array_equal(expected, b[[5, 4, 6], 1, :]))
+
+    def testChunkCache(self):
+        self.h5f.close()
+        with h5py.File(self.h5_fname, "a") as f:
+            f.create_dataset("chunked", data=self.volume, chunks=(2, 10, 20))
+        self.h5f = h5py.File(self.h5_fname, "a")
+
+        a = DatasetView(self.h5f["chunked"])
+        b = a.transpose((0, 2, 1))
+        for i in range(self.volume.shape[0]):
+            self.assertTrue(numpy.array_equal(self.volume[i], a[i]))
+            self.assertTrue(numpy.array_equal(self.volume[i, 2:5, 3], a[i, 2:5, 3]))
+            self.assertTrue(numpy.array_equal(self.volume[i].T, b[i]))
+        self.assertEqual(a[-1, 0, 0], self.volume[-1, 0, 0])
+
+        # the returned data is not the cached block
+        a[0][...] = -1
+        self.assertEqual(a[0, 0, 0], self.volume[0, 0, 0])
+
+        self.h5f["chunked"][0] = -1
+        self.assertEqual(a[0, 0, 0], self.volume[0, 0, 0])
+        a.clear_cache()
+        self.assertEqual(a[0, 0, 0], -1)
+
+        # small reads are not cached
+        self.assertEqual(a[2, 0, 0], self.volume[2, 0, 0])
+        self.h5f["chunked"][2] = -1
+        self.assertEqual(a[2, 0, 0], -1)
+
 
 class TestTransposedListOfImages(unittest.TestCase):
     def setUp(self):
@@ -374,6 +413,23 @@ class TestTransposedListOfImages(unittest.TestCase):
         self.assertTrue(numpy.array_equal(self.images_as_3D_array[:, 1, :],
                                           b[1]))
 
+    def testMinMax(self):
+        a = ListOfImages(self.images)
+        self.assertEqual(a.min(), 0)
+        self.assertEqual(a.max(), self.size - 1)
+
+        # new images are taken into account
+        a.images.append(numpy.full((10, 20), self.size))
+        self.assertEqual(a.max(), self.size)
+        a.images[0] = numpy.full((10, 20), -1)
+        self.assertEqual(a.T.min(), -1)
+
+        # modified images require to clear the cache
+        a.images[0][0, 0] = -5
+        self.assertEqual(a.min(), -1)
+        a.clear_cache()
+        self.assertEqual(a.min(), -5)
+
 
 class TestFunctions(unittest.TestCase):
     """Test functions to guess the dtype and shape of an array_like